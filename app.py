@@ -5,19 +5,36 @@ from flask_login import LoginManager, login_user, logout_user, login_required, c
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect, generate_csrf
 from argon2 import PasswordHasher
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.utils import secure_filename
 import os
 from services.db import db
-from services.models import Recipe, RecipeSlugHistory, User
+from services.models import Recipe, User
 from services.forms import RecipeForm
+from services import (
+    assets, authors, backfill, change_log, compression, costs, db_maint, fragment_cache, instrumentation, invalidation,
+    jobs, json_provider, metrics, profiler, ratings, read_index, recipe_api, recipe_batch, rendering, sitemap,
+    slug_redirects, view_counts,
+)
 
 ph = PasswordHasher()
 login_manager = LoginManager()
 csrf = CSRFProtect()
 migrate = Migrate()
 
-def create_app():
+
+class _BytecodeCache(FileSystemBytecodeCache):
+    """Creates its directory on the first write, not when an app is merely created."""
+
+    def dump_bytecode(self, bucket):
+        os.makedirs(self.directory, exist_ok=True)
+        super().dump_bytecode(bucket)
+
+
+def create_app(config: dict | None = None):
     app = Flask(__name__, static_folder="static", template_folder="templates")
     # --- security & session config ---
     app.config.update(
@@ -30,13 +47,89 @@ def create_app():
         PERMANENT_SESSION_LIFETIME=timedelta(hours=8),
         WTF_CSRF_TIME_LIMIT=None,        # CSRF token lifetime (optional)
         MAX_CONTENT_LENGTH=2 * 1024 * 1024,  # 2MB file upload limit
+        # --- sitemap / feed ---
+        SITEMAP_CACHE_DIR=None,          # defaults to <instance>/sitemap_cache
+        SITEMAP_MAX_URLS=50_000,         # per-file URL limit from the sitemap protocol
+        SITEMAP_MAX_AGE=3600,            # Cache-Control max-age for cached documents
+        FEED_MAX_ENTRIES=50,
+        # --- per-request instrumentation (opt-in) ---
+        INSTRUMENTATION_ENABLED=False,
+        INSTRUMENTATION_QUERY_BUDGET=20,  # warn when a request runs more queries than this
+        INSTRUMENTATION_SERVER_TIMING=True,
+        # --- /metrics (Prometheus text format) ---
+        METRICS_ENABLED=True,
+        METRICS_DIR=None,                # shared by all workers; defaults to <instance>/metrics
+        # --- sampling profiler (off unless a token or sample rate is set) ---
+        PROFILER_TOKEN=None,             # requests with a matching X-Profile header are profiled
+        PROFILER_SAMPLE_RATE=0.0,        # fraction of all requests to profile
+        PROFILER_INTERVAL=0.005,         # seconds between stack samples
+        PROFILER_TOP_N=20,
+        PROFILER_DUMP_INTERVAL=10.0,     # seconds between writes of sampled-traffic profiles
+        PROFILER_OUTPUT_DIR=None,        # defaults to <instance>/profiles
+        # --- template caching ---
+        FRAGMENT_CACHE_SIZE=2048,        # rendered partials kept per worker (LRU)
+        JINJA_BYTECODE_CACHE_DIR=None,   # compiled templates; defaults to <instance>/jinja_cache
+        # --- dynamic response compression ---
+        COMPRESS_ENABLED=True,
+        COMPRESS_MIN_SIZE=500,           # bytes; smaller buffered bodies are sent as-is
+        COMPRESS_LEVEL=6,                # gzip
+        COMPRESS_BROTLI_QUALITY=4,       # used when the brotli package is installed
+        COMPRESS_ZSTD_LEVEL=3,           # used when the zstandard package is installed
+        COMPRESS_STREAM_FLUSH_BYTES=16 * 1024,
+        COMPRESS_MIMETYPES={
+            "text/html", "text/css", "text/plain", "text/xml", "text/javascript",
+            "application/json", "application/javascript", "application/xml", "application/atom+xml",
+        },
+        # --- recipe API ---
+        RECIPE_BATCH_MAX_SIZE=500,       # items per POST /api/recipes/batch
+        RECIPE_API_MAX_IDS=100,          # ids per GET /api/recipes?ids=...
+        RECIPE_CHANGES_PAGE_SIZE=500,    # max changes per GET /api/recipes/changes page
+        # --- background jobs (`flask jobs-worker`) ---
+        JOBS_LOCK_TIMEOUT=300,           # seconds before a running job of a dead worker is retried
+        SITE_URL=None,                   # e.g. "https://tastytruths.example"; enables sitemap warming
+        # --- write-behind view counters ---
+        VIEW_FLUSH_INTERVAL=10.0,        # seconds between background flushes
+        VIEW_FLUSH_EVENTS=500,           # flush early once this many views are buffered
+        # --- shared mmap'd read index (`flask read-index build`) ---
+        READ_INDEX_PATH=None,            # defaults to <instance>/read_index.bin
+        READ_INDEX_REBUILD_DELAY=10.0,   # seconds of commits coalesced into one rebuild
+        # --- cross-worker cache invalidation (services/invalidation.py) ---
+        INVALIDATION_POLL_INTERVAL=1.0,  # max seconds before a worker sees another worker's write
+        INVALIDATION_RETENTION=3600,     # seconds messages are kept for idle workers to catch up
+        # --- parsed recipe costs (services/costs.py) ---
+        COST_DEFAULT_CURRENCY="USD",     # currency of costs entered without a symbol or code
     )
+    if config:
+        app.config.update(config)
+    if not app.config["SITEMAP_CACHE_DIR"]:
+        app.config["SITEMAP_CACHE_DIR"] = os.path.join(app.instance_path, "sitemap_cache")
+
+    # Compiled templates persist on disk so new workers start warm
+    bytecode_dir = app.config["JINJA_BYTECODE_CACHE_DIR"] or os.path.join(app.instance_path, "jinja_cache")
+    app.jinja_options = {**app.jinja_options, "bytecode_cache": _BytecodeCache(bytecode_dir)}
 
     # --- init extensions in the right order ---
+    json_provider.init_app(app)
     db.init_app(app)
     Migrate(app, db)
     csrf.init_app(app)
     login_manager.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    profiler.init_app(app)
+    invalidation.init_app(app)
+    fragment_cache.init_app(app)
+    assets.init_app(app)
+    rendering.init_app(app)
+    costs.init_app(app)
+    compression.init_app(app)
+    jobs.init_app(app)
+    ratings.init_app(app)
+    view_counts.init_app(app)
+    slug_redirects.init_app(app)
+    backfill.init_app(app)
+    read_index.init_app(app)
+    db_maint.init_app(app)
     
     @app.route("/logout")
     @login_required
@@ -55,7 +148,9 @@ def create_app():
     @app.route("/recipes")
     def recipes():
         # Fetch featured recipes (first 3 or random)
-        featured_recipes = Recipe.query.order_by(Recipe.created_at.desc()).limit(3).all()
+        featured_recipes = (
+            Recipe.query.options(joinedload(Recipe.author)).order_by(Recipe.created_at.desc()).limit(3).all()
+        )
         return render_template("recipes.html", featured_recipes=featured_recipes)
 
     @app.route("/blog")
@@ -86,7 +181,9 @@ def create_app():
                 upload_dir = os.path.join(app.static_folder, "uploads", "recipes")
                 os.makedirs(upload_dir, exist_ok=True)
                 
-                file.save(os.path.join(upload_dir, filename))
+                file_path = os.path.join(upload_dir, filename)
+                file.save(file_path)
+                metrics.UPLOAD_BYTES.inc(os.path.getsize(file_path), kind="recipe_image")
                 image_filename = f"uploads/recipes/{filename}"
             
             # Normalize ingredients: split by newline, strip whitespace, filter empty lines
@@ -107,6 +204,7 @@ def create_app():
                 prep_time_minutes=form.prep_time_minutes.data,
                 cook_time_minutes=form.cook_time_minutes.data,
                 estimated_cost=form.estimated_cost.data,
+                servings=form.servings.data,
                 author_id=current_user.id if current_user.is_authenticated else None,
             )
             
@@ -297,22 +395,56 @@ def create_app():
 
         return jsonify({"id": r.id, "slug": r.slug, "title": r.title}), 201
 
+    # Create many recipes at once (JSON array or NDJSON of {title, instructions, ingredients, ...})
+    @csrf.exempt
+    @app.post("/api/recipes/batch")
+    @login_required
+    def create_recipes_batch():
+        if not recipe_batch.accepts(request):
+            return jsonify({"error": "Content-Type must be application/json or NDJSON"}), 415
+        try:
+            items = recipe_batch.parse_items(request)
+        except ValueError as e:
+            return jsonify({"error": f"invalid batch body: {e}"}), 400
+        max_size = app.config["RECIPE_BATCH_MAX_SIZE"]
+        if len(items) > max_size:
+            return jsonify({"error": f"batch too large ({len(items)} items, max {max_size})"}), 413
+        if not items:
+            return jsonify({"error": "batch is empty"}), 400
+
+        created, errors = recipe_batch.create_batch(items, current_user.id)
+        try:
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.exception("batch recipe insert failed")
+            return jsonify({"error": "server error saving recipes", "detail": str(e)}), 500
+
+        status = 201 if not errors else (207 if created else 422)
+        return jsonify({
+            "created": [{"index": i, "id": r.id, "slug": r.slug, "title": r.title} for i, r in created],
+            "errors": errors,
+        }), status
+
     # Canonical detail URL: /recipes/<id>-<slug>
     @app.get("/recipes/<id_slug>")
     def recipe_detail(id_slug: str):
-        try:
-            rid_str, _, tail = id_slug.partition("-")
-            rid = int(rid_str)
-        except Exception:
-            flash("Recipe not found.", "error")
-            return redirect(url_for("recipes"))
-
-        r = db.session.get(Recipe, rid)
+        rid_str, _, tail = id_slug.partition("-")
+        r = db.session.get(Recipe, int(rid_str), options=[joinedload(Recipe.author)]) if rid_str.isdecimal() else None
+        if not r and not rid_str.isdecimal():
+            # Bare current slug: the read index maps it to an id without a slug query
+            index = read_index.current()
+            rid = index.id_for_slug(id_slug) if index is not None else None
+            by_slug = db.session.get(Recipe, rid) if rid is not None else None
+            # The snapshot may predate a rename or a new recipe: on a miss or a mismatch ask SQL
+            if by_slug is None or by_slug.slug != id_slug:
+                by_slug = db.session.execute(select(Recipe).where(Recipe.slug == id_slug)).scalar()
+            if by_slug is not None:
+                return redirect(url_for("recipe_detail", id_slug=f"{by_slug.id}-{by_slug.slug}"), code=301)
         if not r:
-            # check old slugs -> redirect
-            old = RecipeSlugHistory.query.filter_by(old_slug=tail or id_slug).first()
-            if old:
-                canonical = f"{old.recipe_id}-{db.session.get(Recipe, old.recipe_id).slug}"
+            # old slugs -> one 301 straight to the current canonical URL
+            canonical = slug_redirects.resolve(tail if rid_str.isdecimal() else id_slug)
+            if canonical:
                 return redirect(url_for("recipe_detail", id_slug=canonical), code=301)
             flash("Recipe not found.", "error")
             return redirect(url_for("recipes"))
@@ -321,6 +453,8 @@ def create_app():
         if id_slug != canonical:
             return redirect(url_for("recipe_detail", id_slug=canonical), code=301)
 
+        view_counts.record(r.id)
+
         # Parse ingredients if stored as newline-separated text
         ingredients_list = []
         if r.ingredients:
@@ -328,11 +462,142 @@ def create_app():
 
         return render_template("recipe_detail.html", recipe=r, ingredients=ingredients_list)
 
-    # Simple list
+    # List; ?sort=popular orders by view count (ix_recipes_view_count), ?ids=1,2,3 fetches
+    # those recipes in one IN query, ?fields=title,slug,... picks the columns returned
     @app.get("/api/recipes")
     def list_recipes():
-        rows = Recipe.query.order_by(Recipe.created_at.desc()).all()
-        return jsonify([{"id": r.id, "title": r.title, "slug": r.slug} for r in rows])
+        try:
+            columns = recipe_api.parse_fields(request.args.get("fields"), recipe_api.LIST_FIELDS)
+            if "ids" in request.args:
+                ids = recipe_api.parse_ids(request.args["ids"], app.config["RECIPE_API_MAX_IDS"])
+                return recipe_api.conditional(jsonify(recipe_api.fetch_many(ids, columns)), request)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        try:
+            order = recipe_api.list_order(request.args.get("sort", "newest"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        # Only the requested columns are loaded; the JSON provider encodes the Rows as-is
+        rows = db.session.execute(recipe_api.select_fields(columns).order_by(*order)).all()
+        return recipe_api.conditional(jsonify(rows), request)
+
+    # Author profile: their recipes newest first, ?cursor= for the next page
+    @app.get("/users/<int:user_id>")
+    def author_page(user_id: int):
+        author = db.session.get(User, user_id)
+        if author is None:
+            return render_template("404.html"), 404
+        try:
+            rows, next_cursor = authors.recipes_page(db.session, user_id, [Recipe], cursor=request.args.get("cursor"))
+        except ValueError:
+            return redirect(url_for("author_page", user_id=user_id))
+        # recipe.author resolves from the identity map: no query per card
+        return render_template("author.html", author=author, recipes=[r for (r,) in rows], next_cursor=next_cursor)
+
+    # Author's recipes as JSON: ?limit=&cursor=&fields=
+    @app.get("/api/users/<int:user_id>/recipes")
+    def author_recipes(user_id: int):
+        author = db.session.get(User, user_id)
+        if author is None:
+            return jsonify({"error": "user not found"}), 404
+        try:
+            limit = min(max(int(request.args.get("limit", authors.PAGE_SIZE)), 1), 100)
+            columns = recipe_api.parse_fields(request.args.get("fields"), recipe_api.LIST_FIELDS)
+            if not any(c is Recipe.created_at for c in columns):
+                columns.append(Recipe.created_at)  # the cursor is built from it
+            rows, next_cursor = authors.recipes_page(
+                db.session, user_id, columns, limit=limit, cursor=request.args.get("cursor"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({
+            "user": {"id": author.id, "username": author.username, "recipe_count": author.recipe_count},
+            "recipes": rows,
+            "next_cursor": next_cursor,
+        })
+
+    # Change feed for client sync: ?since=<cursor>&limit=N&fields=... (see services/change_log.py)
+    @app.get("/api/recipes/changes")
+    def recipe_changes():
+        max_page = app.config["RECIPE_CHANGES_PAGE_SIZE"]
+        try:
+            since = int(request.args.get("since", 0))
+            limit = min(int(request.args.get("limit", max_page)), max_page)
+            columns = recipe_api.parse_fields(request.args.get("fields"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if since < 0 or limit < 1:
+            return jsonify({"error": "since must be >= 0 and limit >= 1"}), 400
+        return jsonify(change_log.changes_since(db.session, since, limit, columns))
+
+    # Title autocomplete: ?q=<prefix>&limit=, served from the mmap'd read index when built
+    @app.get("/api/recipes/suggest")
+    def suggest_recipes():
+        prefix = request.args.get("q", "").strip()
+        limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
+        if not prefix:
+            return jsonify([])
+        columns = [Recipe.id, Recipe.title, Recipe.slug]
+        index = read_index.current()
+        if index is None:
+            stmt = select(*columns).where(Recipe.title.istartswith(prefix, autoescape=True)).order_by(Recipe.title).limit(limit)
+            return jsonify(db.session.execute(stmt).all())
+        return jsonify(recipe_api.fetch_many(index.autocomplete(prefix, limit), columns))
+
+    # One recipe by id or slug (?fields= as above); old slugs redirect to the current URL
+    @app.get("/api/recipes/<id_or_slug>")
+    def get_recipe(id_or_slug: str):
+        try:
+            columns = recipe_api.parse_fields(request.args.get("fields"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        row = recipe_api.fetch_one(id_or_slug, columns)
+        if row is None:
+            canonical = slug_redirects.resolve(id_or_slug)
+            if canonical:
+                rid = canonical.partition("-")[0]
+                # The query string goes along verbatim: repeated keys, and a key named id_or_slug
+                location = url_for("get_recipe", id_or_slug=rid)
+                if request.query_string:
+                    location += "?" + request.query_string.decode("latin-1")
+                return redirect(location, code=301)
+            return jsonify({"error": "recipe not found"}), 404
+        return recipe_api.conditional(jsonify(row), request)
+
+    # Rate a recipe (JSON: {stars: 1-5}); voting again replaces the user's earlier vote
+    @csrf.exempt
+    @app.post("/api/recipes/<int:recipe_id>/rating")
+    @login_required
+    def rate_recipe(recipe_id: int):
+        data = request.get_json(silent=True) or {}
+        stars = data.get("stars")
+        if not isinstance(stars, int) or isinstance(stars, bool) or not ratings.MIN_STARS <= stars <= ratings.MAX_STARS:
+            return jsonify({"error": f"stars must be an integer from {ratings.MIN_STARS} to {ratings.MAX_STARS}"}), 400
+
+        result = ratings.rate(recipe_id, current_user.id, stars)
+        if result is None:
+            db.session.rollback()
+            return jsonify({"error": "recipe not found"}), 404
+        db.session.commit()
+        count, average = result
+        return jsonify({"recipe_id": recipe_id, "stars": stars, "rating_count": count, "average_rating": average})
+
+    # Crawler entry points, served from the on-disk cache when fresh
+    @app.get("/sitemap.xml")
+    def sitemap_index():
+        return sitemap.sitemap_response()
+
+    @app.get("/sitemap-<int:shard>.xml")
+    def sitemap_shard(shard: int):
+        resp = sitemap.sitemap_shard_response(shard)
+        if resp is None:
+            return render_template("404.html"), 404
+        return resp
+
+    @app.get("/feed.xml")
+    def feed():
+        return sitemap.feed_response()
 
     @app.get("/api/whoami")
     def whoami():
@@ -0,0 +1,123 @@
+"""
+ASGI entry point:
+
+    uvicorn asgi:app --workers 4
+
+GET requests to the recipe JSON API are answered by async handlers
+(services/async_api.py) that never hold a thread while SQLite works.
+Everything else (HTML pages, logins, API writes and anything the async
+handlers pass on) runs the regular Flask app in a thread pool, so all routes
+keep working unchanged. The async path skips Flask's before/after_request
+hooks, so its responses are neither compressed nor recorded in the
+per-request metrics; compress at the proxy when serving this way.
+"""
+
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app as flask_app
+from services.async_api import Database, RecipeAPI
+
+
+class ASGIApp:
+    def __init__(self, flask_app, threads: int = 16):
+        self.flask_app = flask_app
+        self.database = Database(self.flask_app)
+        self.api = RecipeAPI(self.flask_app, self.database)
+        self._pool = ThreadPoolExecutor(threads, thread_name_prefix="tt-wsgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise NotImplementedError(f"unsupported ASGI scope {scope['type']!r}")
+
+        if scope["method"] == "GET":
+            headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+            resp = await self.api.handle(scope["path"], scope["query_string"], headers)
+            if resp is not None:
+                await send({"type": "http.response.start", "status": resp.status, "headers": resp.headers})
+                await send({"type": "http.response.body", "body": resp.body})
+                return
+        await self._wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.database.close()
+                self._pool.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # --- Flask in a worker thread, response streamed back chunk by chunk ---
+    async def _wsgi(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._pool, self.flask_app, _environ(scope, bytes(body)), start_response)
+        chunks = iter(result)
+        try:
+            await send({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+            while True:
+                chunk = await loop.run_in_executor(self._pool, next, chunks, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(result, "close"):
+                # Runs Flask's teardown (stream_with_context, sessions) in a worker thread too
+                await loop.run_in_executor(self._pool, result.close)
+
+
+def _environ(scope, body: bytes) -> dict:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client")
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0] if client else "",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope["headers"]:
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[name] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+app = ASGIApp(flask_app)
@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the Flask app.
+
+See benchmarks/run.py for usage. Generated catalogs are cached under
+benchmarks/data/ and are not committed.
+"""
@@ -0,0 +1,232 @@
+"""
+WSGI vs ASGI throughput for the JSON read API under concurrent requests.
+
+Fires the same request mix with N requests in flight at once, against the
+Flask app (a thread per in-flight request, as a threaded WSGI server would)
+and against asgi.ASGIApp (N concurrent tasks on one event loop):
+
+    python -m benchmarks.concurrency --size 1k --concurrency 1,16,64
+    python -m benchmarks.concurrency --size 100k --mode server --workers 4 --concurrency 64
+
+--mode app drives both apps in-process, so it measures request handling and
+not the network. --mode server starts real servers on a shared listening
+socket (werkzeug pre-fork workers for WSGI, uvicorn workers for ASGI, which
+needs uvicorn installed) and uses the HTTP driver from benchmarks.run.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, select
+
+from benchmarks.catalog import build_catalog, catalog_path, parse_size
+from benchmarks.run import DEFAULT_DATA_DIR, _http, _listen, _serve, bench_config, summarize
+
+
+def request_paths(app, count: int, seed: int = 11) -> list:
+    """A mix of list, batch, detail and change feed requests."""
+    from services.db import db
+    from services.models import Recipe
+
+    with app.app_context():
+        max_id = db.session.execute(select(func.max(Recipe.id))).scalar() or 1
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            paths.append("/api/recipes?fields=id,title,slug,view_count&sort=popular")
+        elif kind == 1:
+            ids = ",".join(str(rng.randint(1, max_id)) for _ in range(20))
+            paths.append(f"/api/recipes?ids={ids}&fields=id,title,slug,cuisine")
+        elif kind == 2:
+            paths.append(f"/api/recipes/{rng.randint(1, max_id)}")
+        else:
+            paths.append(f"/api/recipes/changes?since={rng.randint(0, max_id)}&limit=100&fields=id,title")
+    return paths
+
+
+# ---- in-process drivers ----
+def run_wsgi(app, paths: list, concurrency: int) -> dict:
+    def one(path):
+        started = time.perf_counter()
+        resp = app.test_client().get(path)
+        resp.close()
+        return time.perf_counter() - started, resp.status_code
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, paths))
+    return summarize([lat for lat, _ in outcomes], sum(1 for _, s in outcomes if s >= 400),
+                     time.perf_counter() - wall_start)
+
+
+def run_asgi(asgi_app, paths: list, concurrency: int) -> dict:
+    async def one(path, gate):
+        raw_path, _, query = path.partition("?")
+        scope = {
+            "type": "http", "method": "GET", "path": raw_path, "query_string": query.encode(),
+            "headers": [], "http_version": "1.1", "scheme": "http", "server": ("127.0.0.1", 80),
+        }
+        status = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        async with gate:
+            started = time.perf_counter()
+            await asgi_app(scope, receive, send)
+            return time.perf_counter() - started, status[0]
+
+    async def main():
+        gate = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(one(p, gate) for p in paths))
+
+    wall_start = time.perf_counter()
+    outcomes = asyncio.run(main())
+    return summarize([lat for lat, _ in outcomes], sum(1 for _, s in outcomes if s >= 400),
+                     time.perf_counter() - wall_start)
+
+
+# ---- HTTP driver against real servers ----
+def _drive_http(port: int, paths: list, concurrency: int) -> dict:
+    def one(path):
+        started = time.perf_counter()
+        status, _ = _http(port, "GET", path, None, None)
+        return time.perf_counter() - started, status
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, paths))
+    return summarize([lat for lat, _ in outcomes], sum(1 for _, s in outcomes if s >= 400),
+                     time.perf_counter() - wall_start)
+
+
+def _wait_for(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _http(port, "GET", "/api/whoami", None, None)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def _serve_asgi(config: dict, fd: int) -> None:
+    """One pre-forked uvicorn worker accepting on the shared listening socket."""
+    import uvicorn
+    from app import create_app
+    from asgi import ASGIApp
+
+    uvicorn.run(ASGIApp(create_app(config)), fd=fd, log_level="warning")
+
+
+def run_servers(config: dict, paths: list, levels: list, workers: int) -> dict:
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError:
+        sys.exit("--mode server needs uvicorn installed for the ASGI side")
+
+    results = {"wsgi": {}, "asgi": {}}
+    sock = _listen()
+    port = sock.getsockname()[1]
+    ctx = multiprocessing.get_context("fork")
+    servers = [ctx.Process(target=_serve, args=(config, sock.fileno()), daemon=True) for _ in range(workers)]
+    for server in servers:
+        server.start()
+    try:
+        _wait_for(port)
+        for level in levels:
+            results["wsgi"][level] = _drive_http(port, paths, level)
+    finally:
+        for server in servers:
+            server.terminate()
+        sock.close()
+
+    sock = _listen()
+    port = sock.getsockname()[1]
+    servers = [ctx.Process(target=_serve_asgi, args=(config, sock.fileno()), daemon=True) for _ in range(workers)]
+    for server in servers:
+        server.start()
+    try:
+        _wait_for(port)
+        for level in levels:
+            results["asgi"][level] = _drive_http(port, paths, level)
+    finally:
+        for server in servers:
+            server.terminate()
+        sock.close()
+    return results
+
+
+def _print(results: dict) -> None:
+    print(f"{'server':<8}{'in flight':>10}{'reqs':>7}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for server, by_level in results.items():
+        for level, r in by_level.items():
+            print(f"{server:<8}{level:>10}{r['requests']:>7}{r['errors']:>8}{r['throughput_rps']:>10}"
+                  f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="WSGI vs ASGI JSON API concurrency benchmark")
+    parser.add_argument("--size", default="1k", help="catalog size: 1k, 100k, 1m or a number")
+    parser.add_argument("--mode", choices=("app", "server"), default="app")
+    parser.add_argument("--workers", type=int, default=4, help="server processes (server mode)")
+    parser.add_argument("--concurrency", default="1,16,64", help="comma-separated requests in flight")
+    parser.add_argument("--requests", type=int, default=400, help="requests per run")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args(argv)
+    levels = [int(n) for n in args.concurrency.split(",")]
+
+    from app import create_app
+
+    recipes = parse_size(args.size)
+    os.makedirs(args.data_dir, exist_ok=True)
+    template_db = catalog_path(args.data_dir, recipes)
+    with tempfile.TemporaryDirectory(prefix="tt-bench-") as scratch:
+        if not os.path.exists(template_db):
+            print(f"Generating {recipes} recipe catalog at {template_db} ...")
+            build_catalog(create_app(bench_config(template_db, scratch)), recipes)
+        db_path = os.path.join(scratch, "bench.db")
+        with open(template_db, "rb") as src, open(db_path, "wb") as dst:
+            dst.write(src.read())
+        config = bench_config(db_path, scratch)
+        app = create_app(config)
+        paths = request_paths(app, args.requests)
+
+        if args.mode == "server":
+            results = run_servers(config, paths, levels, args.workers)
+        else:
+            from asgi import ASGIApp
+
+            asgi_app = ASGIApp(app)
+            print(f"async database driver: {asgi_app.database.driver}")
+            results = {
+                "wsgi": {level: run_wsgi(app, paths, level) for level in levels},
+                "asgi": {level: run_asgi(asgi_app, paths, level) for level in levels},
+            }
+
+    _print(results)
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump({"size": recipes, "mode": args.mode, "results": results}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
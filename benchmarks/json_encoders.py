@@ -0,0 +1,90 @@
+"""
+JSON encoder microbenchmark.
+
+Serializes a realistic /api/recipes-style payload (the catalog generator's
+recipe rows, loaded from an in-memory SQLite table) with Flask's default
+provider and with services.json_provider, on both the stdlib and orjson
+backends when orjson is installed, from dicts and from SQLAlchemy Rows.
+
+    python -m benchmarks.json_encoders --items 1000 --repeat 7
+"""
+
+import argparse
+import random
+import timeit
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import create_engine, insert, select
+
+import services.json_provider as json_provider
+from benchmarks.catalog import _recipe_rows
+from services.models import Recipe
+
+LIST_COLUMNS = (
+    Recipe.id, Recipe.title, Recipe.slug, Recipe.description, Recipe.cuisine, Recipe.dietary_tags,
+    Recipe.prep_time_minutes, Recipe.cook_time_minutes, Recipe.average_rating, Recipe.created_at,
+)
+
+
+def load_rows(items: int):
+    """`items` recipe Rows with the list endpoint's kind of columns."""
+    engine = create_engine("sqlite://")
+    Recipe.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Recipe.__table__), list(_recipe_rows(items, 100, random.Random(42))))
+        return conn.execute(select(*LIST_COLUMNS)).all()
+
+
+def _time(fn, number: int, repeat: int) -> float:
+    """Best-of-`repeat` seconds per call."""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def run(items: int, repeat: int) -> list:
+    rows = load_rows(items)
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    fast = json_provider.FastJSONProvider(app)
+    number = max(1, 20_000 // items)
+
+    # The dict cases pay for building the dicts, as a route doing so per request would
+    cases = [("flask default, dicts", lambda: default.response([row._asdict() for row in rows]))]
+    backends = [("stdlib", None)]
+    if json_provider.orjson is not None:
+        backends.append(("orjson", json_provider.orjson))
+    installed = json_provider.orjson
+    results = []
+    with app.app_context():
+        results.append((cases[0][0], _time(cases[0][1], number, repeat)))
+        for name, backend in backends:
+            json_provider.orjson = backend
+            try:
+                results.append((f"{name}, dicts", _time(
+                    lambda: fast.response([row._asdict() for row in rows]), number, repeat)))
+                results.append((f"{name}, rows", _time(lambda: fast.response(rows), number, repeat)))
+            finally:
+                json_provider.orjson = installed
+        cached = json_provider.RawJSON(fast.dumps_bytes(rows))
+        results.append(("pre-serialized", _time(lambda: fast.response(cached), number, repeat)))
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare JSON encoders on a recipe list payload")
+    parser.add_argument("--items", type=int, default=1000, help="recipes in the payload")
+    parser.add_argument("--repeat", type=int, default=7, help="timing rounds; the best is reported")
+    args = parser.parse_args(argv)
+
+    results = run(args.items, args.repeat)
+    baseline = results[0][1]
+    print(f"{'encoder':<24}{'ms/response':>12}{'speedup':>10}")
+    for name, seconds in results:
+        print(f"{name:<24}{seconds * 1000:>12.3f}{baseline / seconds:>9.1f}x")
+    if json_provider.orjson is None:
+        print("orjson is not installed; only the stdlib backend was measured")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
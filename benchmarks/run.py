@@ -0,0 +1,355 @@
+"""
+Benchmark runner.
+
+Drives the real routes against a synthetic catalog and reports throughput
+and p50/p95/p99 latency per scenario, either in-process through the Flask
+test client or over HTTP against a local multi-process server.
+
+    python -m benchmarks.run --size 1k
+    python -m benchmarks.run --size 100k --mode server --workers 4 --concurrency 16
+    python -m benchmarks.run --size 1k --out bench.json --baseline baseline.json --threshold 0.15
+
+With --baseline the run exits non-zero if any scenario's p95 latency grew, or
+its throughput shrank, by more than --threshold (a fraction) compared with the
+baseline file.
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from benchmarks.catalog import (
+    BENCH_PASSWORD,
+    BENCH_USERNAME,
+    build_catalog,
+    catalog_path,
+    parse_size,
+    sample_detail_paths,
+)
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+# name -> (method, number of requests, needs a logged-in session)
+SCENARIOS = {
+    "recipes_page": ("GET", 200, False),
+    "recipe_detail": ("GET", 500, False),
+    "api_list": ("GET", 50, False),
+    "login": ("POST", 20, False),
+    "create": ("POST", 50, True),
+}
+
+
+def bench_config(db_path: str, scratch: str, extra: dict | None = None) -> dict:
+    config = {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.abspath(db_path)}",
+        "WTF_CSRF_ENABLED": False,
+        "SITEMAP_CACHE_DIR": os.path.join(scratch, "sitemap_cache"),
+        "METRICS_DIR": os.path.join(scratch, "metrics"),
+        "PROFILER_OUTPUT_DIR": os.path.join(scratch, "profiles"),
+    }
+    config.update(extra or {})
+    return config
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: list, errors: int, wall: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+def _form_for(scenario: str, i: int) -> dict | None:
+    if scenario == "login":
+        return {"username": BENCH_USERNAME, "password": BENCH_PASSWORD}
+    if scenario == "create":
+        return {
+            "title": f"Benchmark Recipe {i}",
+            "instructions": "Mix everything together and bake for twenty minutes.",
+            "ingredients": "1 cup flour\n2 eggs\n1 cup milk",
+            "prep_time_minutes": "10",
+            "cook_time_minutes": "20",
+            "estimated_cost": "$8",
+        }
+    return None
+
+
+def _path_for(scenario: str, i: int, detail_paths: list) -> str:
+    if scenario == "recipes_page":
+        return "/recipes"
+    if scenario == "recipe_detail":
+        return detail_paths[i % len(detail_paths)]
+    if scenario == "api_list":
+        return "/api/recipes"
+    if scenario == "login":
+        return "/login"
+    return "/recipes/create"
+
+
+# ---- in-process driver ----
+def run_client(app, scenarios: dict, detail_paths: list) -> dict:
+    results = {}
+    for name, (method, count, needs_login) in scenarios.items():
+        client = app.test_client()
+        if needs_login:
+            client.post("/login", data=_form_for("login", 0))
+        latencies, errors = [], 0
+        wall_start = time.perf_counter()
+        for i in range(count):
+            path = _path_for(name, i, detail_paths)
+            started = time.perf_counter()
+            resp = client.open(path, method=method, data=_form_for(name, i))
+            latencies.append(time.perf_counter() - started)
+            if resp.status_code >= 400 and not (name == "login" and resp.status_code == 401):
+                errors += 1
+            resp.close()
+        results[name] = summarize(latencies, errors, time.perf_counter() - wall_start)
+    return results
+
+
+# ---- HTTP driver against a local multi-process server ----
+def _serve(config: dict, fd: int) -> None:
+    """One pre-forked worker accepting on the shared listening socket."""
+    import logging
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    make_server("127.0.0.1", 0, create_app(config), fd=fd).serve_forever()
+
+
+def _listen() -> socket.socket:
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(128)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _http(port: int, method: str, path: str, form: dict | None, cookie: str | None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    headers = {}
+    body = None
+    if form is not None:
+        body = urlencode(form)
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    if cookie:
+        headers["Cookie"] = cookie
+    try:
+        conn.request(method, path, body=body, headers=headers)
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status, resp.getheader("Set-Cookie")
+    finally:
+        conn.close()
+
+
+def run_server(config: dict, scenarios: dict, detail_paths: list, workers: int, concurrency: int) -> dict:
+    sock = _listen()
+    port = sock.getsockname()[1]
+    ctx = multiprocessing.get_context("fork")
+    servers = [ctx.Process(target=_serve, args=(config, sock.fileno()), daemon=True) for _ in range(workers)]
+    for server in servers:
+        server.start()
+    try:
+        _, set_cookie = _http(port, "POST", "/login", _form_for("login", 0), None)
+        session_cookie = set_cookie.split(";", 1)[0] if set_cookie else None
+
+        results = {}
+        for name, (method, count, needs_login) in scenarios.items():
+            cookie = session_cookie if needs_login else None
+
+            def one(i, name=name, method=method, cookie=cookie):
+                started = time.perf_counter()
+                status, _ = _http(port, method, _path_for(name, i, detail_paths), _form_for(name, i), cookie)
+                return time.perf_counter() - started, status
+
+            wall_start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                outcomes = list(pool.map(one, range(count)))
+            wall = time.perf_counter() - wall_start
+            errors = sum(1 for _, status in outcomes if status >= 400 and not (name == "login" and status == 401))
+            results[name] = summarize([lat for lat, _ in outcomes], errors, wall)
+        return results
+    finally:
+        for server in servers:
+            server.terminate()
+        for server in servers:
+            server.join(timeout=10)
+        sock.close()
+
+
+# ---- baseline comparison ----
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Return human-readable regressions of `current` against `baseline`."""
+    failures = []
+    for name, base in baseline.get("scenarios", {}).items():
+        now = current["scenarios"].get(name)
+        if now is None:
+            continue
+        if base["p95_ms"] and now["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            failures.append(f"{name}: p95 {now['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if base["throughput_rps"] and now["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            failures.append(f"{name}: {now['throughput_rps']} req/s vs baseline {base['throughput_rps']} req/s")
+    return failures
+
+
+def _print_table(scenarios: dict) -> None:
+    print(f"{'scenario':<16}{'reqs':>7}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in scenarios.items():
+        print(f"{name:<16}{r['requests']:>7}{r['errors']:>8}{r['throughput_rps']:>10}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tasty Truths benchmark suite")
+    parser.add_argument("--size", default="1k", help="catalog size: 1k, 100k, 1m or a number")
+    parser.add_argument("--mode", choices=("client", "server"), default="client")
+    parser.add_argument("--workers", type=int, default=4, help="server processes (server mode)")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads (server mode)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset to run")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every scenario's request count")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where generated catalogs are kept")
+    parser.add_argument("--config", action="append", default=[], metavar="KEY=JSON",
+                        help="extra app config, e.g. --config INSTRUMENTATION_ENABLED=true")
+    parser.add_argument("--compare-config", action="append", default=[], metavar="KEY=JSON",
+                        help="run a second pass with this config added and report its overhead")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed regression fraction")
+    return parser.parse_args(argv)
+
+
+def _parse_config(items: list) -> dict:
+    extra = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        extra[key] = json.loads(value)
+    return extra
+
+
+def _run_pass(args, template_db: str, extra: dict, selected: dict) -> dict:
+    from app import create_app
+    from services import view_counts
+
+    with tempfile.TemporaryDirectory(prefix="tt-bench-") as scratch:
+        # Work on a copy so 'create' runs never change the cached catalog
+        db_path = os.path.join(scratch, "bench.db")
+        with open(template_db, "rb") as src, open(db_path, "wb") as dst:
+            dst.write(src.read())
+
+        config = bench_config(db_path, scratch, extra)
+        app = create_app(config)
+        detail_paths = sample_detail_paths(app, selected.get("recipe_detail", ("", 1, False))[1])
+
+        if args.mode == "client":
+            results = run_client(app, selected, detail_paths)
+            # Write buffered views while the scratch database still exists
+            view_counts.flush(app)
+            return results
+        return run_server(config, selected, detail_paths, args.workers, args.concurrency)
+
+
+def overhead(base: dict, variant: dict) -> dict:
+    """Relative cost of `variant` over `base` per scenario (positive = slower)."""
+    report = {}
+    for name, b in base.items():
+        v = variant[name]
+        report[name] = {
+            "p50_pct": round((v["p50_ms"] / b["p50_ms"] - 1) * 100, 2) if b["p50_ms"] else 0.0,
+            "p95_pct": round((v["p95_ms"] / b["p95_ms"] - 1) * 100, 2) if b["p95_ms"] else 0.0,
+            "throughput_pct": round((1 - v["throughput_rps"] / b["throughput_rps"]) * 100, 2)
+            if b["throughput_rps"] else 0.0,
+        }
+    return report
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    recipes = parse_size(args.size)
+    os.makedirs(args.data_dir, exist_ok=True)
+    template_db = catalog_path(args.data_dir, recipes)
+    extra = _parse_config(args.config)
+
+    if not os.path.exists(template_db):
+        from app import create_app
+
+        print(f"Generating {recipes} recipe catalog at {template_db} ...")
+        with tempfile.TemporaryDirectory(prefix="tt-bench-") as scratch:
+            build_catalog(create_app(bench_config(template_db, scratch)), recipes)
+
+    selected = {
+        name: (method, max(1, int(count * args.scale)), login)
+        for name, (method, count, login) in SCENARIOS.items()
+        if name in args.scenarios.split(",")
+    }
+    scenarios = _run_pass(args, template_db, extra, selected)
+
+    result = {
+        "meta": {
+            "size": recipes,
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "server" else 1,
+            "concurrency": args.concurrency if args.mode == "server" else 1,
+            "config": extra,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "scenarios": scenarios,
+    }
+    _print_table(scenarios)
+
+    if args.compare_config:
+        compare_extra = {**extra, **_parse_config(args.compare_config)}
+        variant = _run_pass(args, template_db, compare_extra, selected)
+        result["variant"] = {"config": compare_extra, "scenarios": variant,
+                             "overhead": overhead(scenarios, variant)}
+        print(f"\nwith {_parse_config(args.compare_config)}:")
+        _print_table(variant)
+        print(f"\n{'overhead':<16}{'p50':>10}{'p95':>10}{'req/s':>10}")
+        for name, o in result["variant"]["overhead"].items():
+            print(f"{name:<16}{o['p50_pct']:>9}%{o['p95_pct']:>9}%{o['throughput_pct']:>9}%")
+
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(result, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        failures = compare(result, baseline, args.threshold)
+        if failures:
+            print("\nFAIL: regressions beyond {:.0%}".format(args.threshold))
+            for line in failures:
+                print(f"  - {line}")
+            return 1
+        print("\nPASS: within {:.0%} of baseline".format(args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+"""Index recipes.created_at for newest-first listings
+
+Revision ID: 0f7c3b95d2a8
+Revises: e6b48c1f90d3
+Create Date: 2026-10-19 15:58:42.730156
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0f7c3b95d2a8'
+down_revision = 'e6b48c1f90d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_recipes_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recipes_created_at'))
@@ -0,0 +1,32 @@
+"""Add cache_invalidations table for the cross-worker invalidation bus
+
+Revision ID: 2d6a8f1e4b93
+Revises: b4e17a9c3d52
+Create Date: 2026-10-19 18:02:51.730442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d6a8f1e4b93'
+down_revision = 'b4e17a9c3d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cache_invalidations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('key', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True,
+    )
+
+
+def downgrade():
+    op.drop_table('cache_invalidations')
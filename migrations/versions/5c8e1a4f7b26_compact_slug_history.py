@@ -0,0 +1,35 @@
+"""Composite (old_slug, recipe_id) index and one history row per old slug
+
+Revision ID: 5c8e1a4f7b26
+Revises: d27a5e93b8f1
+Create Date: 2026-10-19 12:31:48.092417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c8e1a4f7b26'
+down_revision = 'd27a5e93b8f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Live slugs never redirect, and only the newest row per old slug is reachable
+    op.execute(
+        "DELETE FROM recipe_slug_history WHERE old_slug IN (SELECT slug FROM recipes)"
+    )
+    op.execute(
+        "DELETE FROM recipe_slug_history WHERE id NOT IN "
+        "(SELECT MAX(id) FROM recipe_slug_history GROUP BY old_slug)"
+    )
+    op.drop_index('ix_recipe_slug_history_old_slug', table_name='recipe_slug_history', if_exists=True)
+    op.create_index('ix_recipe_slug_history_old_slug_recipe_id', 'recipe_slug_history',
+                    ['old_slug', 'recipe_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_recipe_slug_history_old_slug_recipe_id', table_name='recipe_slug_history')
+    op.create_index('ix_recipe_slug_history_old_slug', 'recipe_slug_history', ['old_slug'], unique=False)
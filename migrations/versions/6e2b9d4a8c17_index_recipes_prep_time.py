@@ -0,0 +1,26 @@
+"""Index recipes.prep_time_minutes for the max prep time filter
+
+Revision ID: 6e2b9d4a8c17
+Revises: 9c3e5a7d1f28
+Create Date: 2026-10-19 21:12:05.384920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2b9d4a8c17'
+down_revision = '9c3e5a7d1f28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_recipes_prep_time_minutes'), ['prep_time_minutes'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recipes_prep_time_minutes'))
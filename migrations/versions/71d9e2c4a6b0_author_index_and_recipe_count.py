@@ -0,0 +1,31 @@
+"""Index recipes by (author_id, created_at) and add users.recipe_count
+
+Revision ID: 71d9e2c4a6b0
+Revises: 0f7c3b95d2a8
+Create Date: 2026-10-19 16:44:27.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '71d9e2c4a6b0'
+down_revision = '0f7c3b95d2a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.create_index('ix_recipes_author_id_created_at', ['author_id', 'created_at'], unique=False)
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recipe_count', sa.Integer(), nullable=False, server_default='0'))
+    # Fill existing counts with `flask backfill run users_recipe_count`
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('recipe_count')
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_index('ix_recipes_author_id_created_at')
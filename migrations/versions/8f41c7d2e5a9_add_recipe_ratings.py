@@ -0,0 +1,42 @@
+"""Add recipe_ratings table and running rating aggregates
+
+Revision ID: 8f41c7d2e5a9
+Revises: 3b9d2f6a1c04
+Create Date: 2026-10-19 11:02:17.884610
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f41c7d2e5a9'
+down_revision = '3b9d2f6a1c04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'recipe_ratings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('stars', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('recipe_id', 'user_id', name='uq_recipe_ratings_recipe_user'),
+    )
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('rating_total', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_column('rating_total')
+        batch_op.drop_column('rating_count')
+    op.drop_table('recipe_ratings')
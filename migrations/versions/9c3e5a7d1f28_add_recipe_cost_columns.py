@@ -0,0 +1,37 @@
+"""Add parsed cost columns and servings to recipes
+
+Revision ID: 9c3e5a7d1f28
+Revises: 2d6a8f1e4b93
+Create Date: 2026-10-19 19:42:17.336120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e5a7d1f28'
+down_revision = '2d6a8f1e4b93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('servings', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('cost_cents', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('cost_per_serving_cents', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('cost_currency', sa.String(length=3), nullable=True))
+        batch_op.create_index(batch_op.f('ix_recipes_cost_cents'), ['cost_cents'], unique=False)
+        batch_op.create_index(batch_op.f('ix_recipes_cost_per_serving_cents'), ['cost_per_serving_cents'], unique=False)
+    # Parse existing estimated_cost text with `flask backfill run recipes_cost`
+
+
+def downgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recipes_cost_per_serving_cents'))
+        batch_op.drop_index(batch_op.f('ix_recipes_cost_cents'))
+        batch_op.drop_column('cost_currency')
+        batch_op.drop_column('cost_per_serving_cents')
+        batch_op.drop_column('cost_cents')
+        batch_op.drop_column('servings')
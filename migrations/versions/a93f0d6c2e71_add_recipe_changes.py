@@ -0,0 +1,40 @@
+"""Add recipe_changes feed, seeded with one upsert per existing recipe
+
+Revision ID: a93f0d6c2e71
+Revises: 5c8e1a4f7b26
+Create Date: 2026-10-19 14:05:33.617920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93f0d6c2e71'
+down_revision = '5c8e1a4f7b26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'recipe_changes',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(length=10), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    with op.batch_alter_table('recipe_changes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_recipe_changes_recipe_id'), ['recipe_id'], unique=False)
+    # A client syncing from cursor 0 must see the recipes that predate the feed
+    op.execute(
+        "INSERT INTO recipe_changes (recipe_id, op, changed_at) "
+        "SELECT id, 'upsert', updated_at FROM recipes ORDER BY id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('recipe_changes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recipe_changes_recipe_id'))
+    op.drop_table('recipe_changes')
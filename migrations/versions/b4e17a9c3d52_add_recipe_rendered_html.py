@@ -0,0 +1,31 @@
+"""Add rendered instructions_html/content_html columns to recipes
+
+Revision ID: b4e17a9c3d52
+Revises: 71d9e2c4a6b0
+Create Date: 2026-10-19 17:21:08.402961
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e17a9c3d52'
+down_revision = '71d9e2c4a6b0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('instructions_html', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('content_html', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('html_version', sa.Integer(), nullable=False, server_default='0'))
+    # Render existing rows with `flask backfill run recipes_html_v1`
+
+
+def downgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_column('html_version')
+        batch_op.drop_column('content_html')
+        batch_op.drop_column('instructions_html')
@@ -0,0 +1,28 @@
+"""Add recipe view_count for the popular sort
+
+Revision ID: d27a5e93b8f1
+Revises: 8f41c7d2e5a9
+Create Date: 2026-10-19 11:47:05.216334
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd27a5e93b8f1'
+down_revision = '8f41c7d2e5a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('view_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.create_index(batch_op.f('ix_recipes_view_count'), ['view_count'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recipes_view_count'))
+        batch_op.drop_column('view_count')
@@ -0,0 +1,34 @@
+"""Add backfill_checkpoints for chunked, resumable backfills
+
+Revision ID: e6b48c1f90d3
+Revises: a93f0d6c2e71
+Create Date: 2026-10-19 15:20:09.441873
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b48c1f90d3'
+down_revision = 'a93f0d6c2e71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'backfill_checkpoints',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('last_id', sa.Integer(), nullable=False),
+        sa.Column('rows_done', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade():
+    op.drop_table('backfill_checkpoints')
@@ -0,0 +1,133 @@
+"""
+Fingerprinted, precompressed static assets.
+
+`flask assets-build` copies everything under static/ (except user uploads)
+to static/dist/ with a content hash in the filename, writes .gz and, when
+the `brotli` package is installed, .br variants of text assets next to each
+copy, and records the mapping in static/dist/manifest.json.
+
+At runtime `url_for('static', filename='css/styles.css')` is rewritten to the
+hashed name from the manifest, and the static view serves hashed files with
+one-year immutable caching, picking the precompressed variant that the
+client's Accept-Encoding allows. Without a manifest everything behaves like
+Flask's default static handler.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants are still written
+    brotli = None
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+SKIP_DIRS = {DIST_DIR, "uploads"}
+COMPRESSIBLE = {".css", ".js", ".mjs", ".json", ".svg", ".txt", ".html", ".xml", ".webmanifest", ".map"}
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# (extension, Content-Encoding) in order of preference
+_ENCODINGS = (("br", "br"), ("gz", "gzip"))
+
+
+def _hashed_name(rel_path: str, digest: str) -> str:
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest}{ext}"
+
+
+def build(static_folder: str) -> dict:
+    """Fingerprint and precompress every static asset; return the manifest."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        rel_root = os.path.relpath(root, static_folder)
+        if rel_root == ".":
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            if name.startswith("."):
+                continue
+            rel_path = os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, "/")
+            with open(os.path.join(root, name), "rb") as fh:
+                data = fh.read()
+            hashed = _hashed_name(rel_path, hashlib.sha256(data).hexdigest()[:12])
+            target = os.path.join(dist, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as fh:
+                fh.write(data)
+
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                # mtime=0 keeps .gz output byte-for-byte reproducible
+                with open(f"{target}.gz", "wb") as fh:
+                    fh.write(gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(f"{target}.br", "wb") as fh:
+                        fh.write(brotli.compress(data, quality=11))
+
+            manifest[rel_path] = f"{DIST_DIR}/{hashed}"
+
+    with open(os.path.join(dist, MANIFEST_NAME), "w") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder: str) -> dict:
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def _rewrite_static_url(endpoint, values):
+    if endpoint != "static":
+        return
+    hashed = current_app.extensions["asset_manifest"].get(values.get("filename"))
+    if hashed is not None:
+        values["filename"] = hashed
+
+
+def send_static(filename: str):
+    """Static view: precompressed, immutable responses for fingerprinted files."""
+    app = current_app
+    if not filename.startswith(f"{DIST_DIR}/"):
+        return app.send_static_file(filename)
+
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    dist = os.path.join(app.static_folder, DIST_DIR)
+    name = filename[len(DIST_DIR) + 1:]
+    response = None
+    for ext, encoding in _ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(dist, f"{name}.{ext}")):
+            response = send_from_directory(dist, f"{name}.{ext}", mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+            response.headers["Content-Encoding"] = encoding
+            break
+    if response is None:
+        response = send_from_directory(dist, name, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.cache_control.immutable = True
+    return response
+
+
+def init_app(app) -> None:
+    app.extensions["asset_manifest"] = load_manifest(app.static_folder)
+    app.url_defaults(_rewrite_static_url)
+    app.view_functions["static"] = send_static
+
+    @app.cli.command("assets-build")
+    def assets_build():
+        """Fingerprint and precompress static assets into static/dist/."""
+        manifest = build(app.static_folder)
+        app.extensions["asset_manifest"] = manifest
+        print(f"Built {len(manifest)} assets into {os.path.join(app.static_folder, DIST_DIR)}")
+        if brotli is None:
+            print("brotli is not installed; only gzip variants were written")
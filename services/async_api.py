@@ -0,0 +1,156 @@
+"""
+Async read side of the recipe JSON API, served by the ASGI entry point (asgi.py).
+
+Covers the GET endpoints that the frontend polls hardest, with the same
+query parameters, status codes, JSON and ETags as their Flask routes in
+app.py, which remain the reference implementation:
+
+    GET /api/recipes            ?fields= ?sort= ?ids=
+    GET /api/recipes/changes    ?since= ?limit= ?fields=
+    GET /api/recipes/<id|slug>  ?fields=
+
+Statements come from services/recipe_api.py and services/change_log.py, so
+both paths run identical SQL. On SQLite, queries go through an async
+SQLAlchemy engine on aiosqlite (pinned in requirements.txt); on other
+backends, or if aiosqlite is missing, they run on the app's own engine in a
+small thread pool, which still keeps the event loop free.
+
+A handler returns None for anything it does not answer itself (an old slug
+to redirect, an unknown recipe, fixed routes such as /api/recipes/suggest),
+and the request falls through to Flask.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from werkzeug.http import generate_etag, parse_etags, quote_etag
+
+from services import change_log, recipe_api
+from services.db import db
+from services.models import Recipe
+
+try:
+    import aiosqlite  # noqa: F401  (driver for the sqlite+aiosqlite dialect)
+    from sqlalchemy.ext.asyncio import create_async_engine
+except ImportError:  # pragma: no cover - thread pool fallback
+    aiosqlite = None
+
+
+class Database:
+    """Runs Core statements without blocking the event loop."""
+
+    def __init__(self, app, threads: int = 8):
+        with app.app_context():
+            self.sync_engine = db.engine
+        url = self.sync_engine.url
+        self.engine = None
+        self._pool = None
+        if aiosqlite is not None and url.get_backend_name() == "sqlite":
+            self.engine = create_async_engine(url.set(drivername="sqlite+aiosqlite"))
+        else:
+            self._pool = ThreadPoolExecutor(threads, thread_name_prefix="tt-async-db")
+
+    @property
+    def driver(self) -> str:
+        return "aiosqlite" if self.engine is not None else "threadpool"
+
+    async def all(self, stmt) -> list:
+        if self.engine is not None:
+            async with self.engine.connect() as conn:
+                return (await conn.execute(stmt)).all()
+        return await asyncio.get_running_loop().run_in_executor(self._pool, self._all_sync, stmt)
+
+    def _all_sync(self, stmt) -> list:
+        with self.sync_engine.connect() as conn:
+            return conn.execute(stmt).all()
+
+    async def close(self) -> None:
+        if self.engine is not None:
+            await self.engine.dispose()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+
+class Response:
+    __slots__ = ("status", "body", "headers")
+
+    def __init__(self, status: int, body: bytes, headers: list):
+        self.status = status
+        self.body = body
+        self.headers = headers
+
+
+class RecipeAPI:
+    def __init__(self, app, database: Database):
+        self.json = app.json
+        self.db = database
+        self.max_ids = app.config["RECIPE_API_MAX_IDS"]
+        self.max_changes = app.config["RECIPE_CHANGES_PAGE_SIZE"]
+        # Fixed Flask routes such as /api/recipes/suggest are not slugs; leave them to Flask
+        self.flask_only = {
+            rule.rule[len("/api/recipes/"):] for rule in app.url_map.iter_rules()
+            if rule.rule.startswith("/api/recipes/") and "<" not in rule.rule
+        }
+
+    async def handle(self, path: str, query_string: bytes, headers: dict) -> Response | None:
+        """Answer a GET for `path`, or None to hand the request to Flask."""
+        if not path.startswith("/api/recipes"):
+            return None
+        # Flask's request.args.get() returns the first value of a repeated key
+        args = {}
+        for key, value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True):
+            args.setdefault(key, value)
+        rest = path[len("/api/recipes"):]
+        try:
+            if rest == "":
+                return await self.list_recipes(args, headers)
+            if rest == "/changes":
+                return await self.changes(args)
+            if rest.count("/") == 1 and len(rest) > 1 and rest[1:] not in self.flask_only:
+                return await self.get_recipe(rest[1:], args, headers)
+        except ValueError as e:
+            return self._json({"error": str(e)}, 400)
+        return None
+
+    async def list_recipes(self, args: dict, headers: dict) -> Response:
+        columns = recipe_api.parse_fields(args.get("fields"), recipe_api.LIST_FIELDS)
+        stmt = recipe_api.select_fields(columns)
+        if "ids" in args:
+            ids = recipe_api.parse_ids(args["ids"], self.max_ids)
+            rows = recipe_api.in_request_order(await self.db.all(stmt.where(Recipe.id.in_(ids))), ids)
+        else:
+            rows = await self.db.all(stmt.order_by(*recipe_api.list_order(args.get("sort", "newest"))))
+        return self._conditional(self._json(rows), headers)
+
+    async def changes(self, args: dict) -> Response:
+        since = int(args.get("since", 0))
+        limit = min(int(args.get("limit", self.max_changes)), self.max_changes)
+        columns = recipe_api.parse_fields(args.get("fields"))
+        if since < 0 or limit < 1:
+            return self._json({"error": "since must be >= 0 and limit >= 1"}, 400)
+        page = await self.db.all(change_log.latest_changes(since, limit))
+        ids = change_log.page_recipe_ids(page, limit)
+        rows = await self.db.all(recipe_api.select_fields(columns).where(Recipe.id.in_(ids))) if ids else []
+        return self._json(change_log.build_page(page, rows, since, limit))
+
+    async def get_recipe(self, id_or_slug: str, args: dict, headers: dict) -> Response | None:
+        columns = recipe_api.parse_fields(args.get("fields"))
+        rows = await self.db.all(recipe_api.select_fields(columns).where(recipe_api.lookup(id_or_slug)))
+        if not rows:
+            return None  # Flask resolves old slugs (301) and answers the 404
+        return self._conditional(self._json(rows[0]), headers)
+
+    def _json(self, obj, status: int = 200) -> Response:
+        body = self.json.dumps_bytes(obj) + b"\n"
+        return Response(status, body, [(b"content-type", b"application/json")])
+
+    def _conditional(self, resp: Response, headers: dict) -> Response:
+        """Same strong ETag as Response.add_etag(), and 304 on a matching If-None-Match."""
+        etag = generate_etag(resp.body)
+        resp.headers += [(b"etag", quote_etag(etag).encode()), (b"cache-control", b"no-cache")]
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and parse_etags(if_none_match).contains_weak(etag):
+            resp.status = 304
+            resp.body = b""
+        return resp
@@ -0,0 +1,109 @@
+"""
+Author pages and per-user recipe listings.
+
+Listings are keyset-paginated on (created_at, id) newest first, which the
+(author_id, created_at) index serves directly no matter how deep the page.
+`User.recipe_count` is kept in step with recipe inserts, deletes and author
+changes: deltas are collected during a flush and applied in one grouped
+UPDATE per author, in the same transaction. Rows written outside the ORM are
+repaired with `flask backfill run users_recipe_count`.
+"""
+
+import base64
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import bindparam, event, func, inspect, select, tuple_, update
+from sqlalchemy.orm import Session, object_session
+
+from services.backfill import backfill
+from services.models import Recipe, User
+from services.recipe_api import select_fields
+
+PAGE_SIZE = 24
+
+
+def encode_cursor(created_at: datetime, recipe_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{recipe_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(created_at, id) from a cursor; raises ValueError if it is not one of ours."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, _, recipe_id = raw.partition("|")
+        return datetime.fromisoformat(created_at), int(recipe_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor") from None
+
+
+def recipes_page(session, user_id: int, columns, limit: int = PAGE_SIZE, cursor: str | None = None):
+    """
+    One page of `user_id`'s recipes, newest first, as (rows, next_cursor).
+    `columns` may be ORM entities or columns; next_cursor is None on the last page.
+    """
+    stmt = select_fields(columns).where(Recipe.author_id == user_id)
+    if cursor:
+        stmt = stmt.where(tuple_(Recipe.created_at, Recipe.id) < tuple_(*decode_cursor(cursor)))
+    rows = session.execute(
+        stmt.order_by(Recipe.created_at.desc(), Recipe.id.desc()).limit(limit + 1)
+    ).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1][0] if isinstance(rows[-1][0], Recipe) else rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
+
+
+# --- recipe_count maintenance ---
+def _count(session, author_id, delta):
+    if author_id is not None:
+        session.info.setdefault("author_recipe_deltas", Counter())[author_id] += delta
+
+
+@event.listens_for(Recipe, "after_insert")
+def _recipe_added(mapper, connection, target):
+    _count(object_session(target), target.author_id, +1)
+
+
+@event.listens_for(Recipe, "after_delete")
+def _recipe_removed(mapper, connection, target):
+    hist = inspect(target).attrs.author_id.history
+    _count(object_session(target), (hist.deleted or [target.author_id])[0], -1)
+
+
+@event.listens_for(Recipe, "after_update")
+def _recipe_moved(mapper, connection, target):
+    hist = inspect(target).attrs.author_id.history
+    if hist.has_changes():
+        session = object_session(target)
+        _count(session, (hist.deleted or [None])[0], -1)
+        _count(session, target.author_id, +1)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_deltas(session, flush_context):
+    deltas = session.info.pop("author_recipe_deltas", None)
+    params = [{"uid": uid, "delta": d} for uid, d in (deltas or {}).items() if d]
+    if params:
+        session.connection().execute(
+            update(User.__table__)
+            .where(User.__table__.c.id == bindparam("uid"))
+            .values(recipe_count=User.__table__.c.recipe_count + bindparam("delta")),
+            params,
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_deltas(session):
+    session.info.pop("author_recipe_deltas", None)
+
+
+@backfill("users_recipe_count", User.__table__)
+def _users_recipe_count(t):
+    return {
+        "recipe_count": select(func.count(Recipe.id))
+        .where(Recipe.author_id == t.c.id)
+        .scalar_subquery()
+    }
@@ -0,0 +1,219 @@
+"""
+Online, resumable backfills in id-range chunks.
+
+Schema migrations only add columns (on SQLite `ADD COLUMN` is a constant-time
+change, batch_alter_table does not rebuild for it); filling them in is a
+registered backfill, run afterwards while the site stays up:
+
+    @backfill("recipes_total_time", Recipe.__table__, where=Recipe.total_time_minutes.is_(None))
+    def _total_time(t):
+        return {"total_time_minutes": t.c.prep_time_minutes + t.c.cook_time_minutes}
+
+    flask backfill run recipes_total_time --chunk-size 2000 --pause 0.05
+
+Each chunk is its own short transaction covering the next `chunk_size` ids:
+it applies the update and advances the checkpoint row in
+`backfill_checkpoints` together, so an interrupted run (Ctrl-C, deploy,
+crash) resumes exactly after the last committed chunk without skipping or
+repeating rows. The pause between chunks leaves the SQLite write lock free
+for request traffic. Backfills over `recipes` also log the chunk's changed
+ids to the change feed in that transaction, so synced clients pick up the
+new values, and leave `updated_at` as it was.
+
+A backfill is either SQL (`kind="sql"`, the function returns SET values built
+from the table's columns) or Python (`kind="python"`, the function receives
+the chunk's rows and returns `{"id": ..., column: value}` dicts, written with
+one executemany).
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+import click
+from sqlalchemy import bindparam, func, insert, select, update
+
+from services import change_log, invalidation
+from services.db import db
+from services.models import BackfillCheckpoint, Recipe
+
+_registry = {}
+
+
+@dataclass
+class Backfill:
+    name: str
+    table: object
+    func: object
+    kind: str = "sql"
+    where: object = None
+    columns: tuple = ()       # python backfills: columns to load for each row
+
+    def _chunk_end(self, conn, last_id: int, chunk_size: int):
+        """Highest id of the next chunk, or None when nothing is left."""
+        pk = self.table.c.id
+        end = conn.execute(
+            select(pk).where(pk > last_id).order_by(pk).offset(chunk_size - 1).limit(1)
+        ).scalar()
+        if end is None:
+            end = conn.execute(select(func.max(pk)).where(pk > last_id)).scalar()
+        return end
+
+    @staticmethod
+    def _untouched(t) -> dict:
+        # A backfill is not an edit: passing updated_at through keeps its onupdate from
+        # restamping the catalog (sitemap lastmod, feed order, cached cards)
+        return {"updated_at": t.c.updated_at} if t is Recipe.__table__ else {}
+
+    def _apply(self, conn, lo: int, hi: int) -> list:
+        """Update the chunk (lo, hi]; returns the ids of the rows written."""
+        t = self.table
+        in_range = (t.c.id > lo) & (t.c.id <= hi)
+        if self.where is not None:
+            in_range &= self.where
+        if self.kind == "sql":
+            values = {**self.func(t), **self._untouched(t)}
+            return conn.execute(update(t).where(in_range).values(values).returning(t.c.id)).scalars().all()
+
+        rows = conn.execute(select(t.c.id, *self.columns).where(in_range).order_by(t.c.id)).all()
+        changes = [c for c in self.func(rows) if c]
+        if not changes:
+            return []
+        keys = sorted(set().union(*changes) - {"id"})
+        stmt = (
+            update(t)
+            .where(t.c.id == bindparam("_id"))
+            .values({**{k: bindparam(f"_{k}") for k in keys}, **self._untouched(t)})
+        )
+        conn.execute(stmt, [{"_id": c["id"], **{f"_{k}": c.get(k) for k in keys}} for c in changes])
+        return [c["id"] for c in changes]
+
+
+def backfill(name: str, table, where=None, kind: str = "sql", columns=()):
+    """Register the decorated function as backfill `name` over `table`."""
+    def register(fn):
+        _registry[name] = Backfill(name, table, fn, kind, where, tuple(columns))
+        return fn
+    return register
+
+
+def registered() -> dict:
+    return dict(_registry)
+
+
+def checkpoint(name: str, engine=None):
+    """The stored progress row for `name`, or None if it never ran."""
+    engine = engine or db.engine
+    cp = BackfillCheckpoint.__table__
+    with engine.connect() as conn:
+        return conn.execute(select(cp).where(cp.c.name == name)).first()
+
+
+def run(spec: Backfill, engine=None, chunk_size: int = 1000, pause: float = 0.0,
+        max_chunks: int | None = None, progress=None) -> bool:
+    """
+    Process chunks from the stored checkpoint on. Returns True once the whole
+    table is done, False if `max_chunks` stopped it first.
+    """
+    engine = engine or db.engine
+    cp = BackfillCheckpoint.__table__
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        state = conn.execute(select(cp).where(cp.c.name == spec.name)).first()
+        if state is None:
+            conn.execute(insert(cp).values(name=spec.name, last_id=0, rows_done=0, status="running",
+                                           started_at=now, updated_at=now))
+            last_id, rows_done = 0, 0
+        elif state.status == "done":
+            return True
+        else:
+            last_id, rows_done = state.last_id, state.rows_done
+
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        with engine.begin() as conn:
+            end = spec._chunk_end(conn, last_id, chunk_size)
+            if end is None:
+                conn.execute(update(cp).where(cp.c.name == spec.name).values(
+                    status="done", updated_at=datetime.utcnow(), finished_at=datetime.utcnow()))
+                return True
+            changed = spec._apply(conn, last_id, end)
+            rows_done += len(changed)
+            if changed:
+                if spec.table is Recipe.__table__:
+                    # Core UPDATEs skip the ORM hooks that feed /api/recipes/changes
+                    change_log.record(conn, changed)
+                # Rows changed under every worker's caches; one message per chunk keeps them fresh
+                invalidation.publish(conn, invalidation.GENERATION)
+            # Same transaction as the data: the checkpoint can never run ahead or lag behind
+            conn.execute(update(cp).where(cp.c.name == spec.name).values(
+                last_id=end, rows_done=rows_done, updated_at=datetime.utcnow()))
+        last_id = end
+        chunks += 1
+        if progress is not None:
+            progress(last_id, rows_done)
+        if pause:
+            time.sleep(pause)
+    return False
+
+
+def reset(name: str, engine=None) -> None:
+    """Forget `name`'s progress so the next run starts from the first id."""
+    engine = engine or db.engine
+    cp = BackfillCheckpoint.__table__
+    with engine.begin() as conn:
+        conn.execute(cp.delete().where(cp.c.name == name))
+
+
+def init_app(app) -> None:
+    @app.cli.group("backfill")
+    def backfill_cli():
+        """Run and inspect chunked data backfills."""
+
+    @backfill_cli.command("run")
+    @click.argument("name")
+    @click.option("--chunk-size", default=1000, show_default=True, help="ids per transaction")
+    @click.option("--pause", default=0.05, show_default=True, help="seconds to sleep between chunks")
+    @click.option("--max-chunks", type=int, default=None, help="stop after this many chunks")
+    def backfill_run(name, chunk_size, pause, max_chunks):
+        """Run (or resume) backfill NAME."""
+        spec = _registry.get(name)
+        if spec is None:
+            raise click.ClickException(f"unknown backfill {name!r}; known: {', '.join(sorted(_registry)) or 'none'}")
+
+        def report(last_id, rows_done):
+            click.echo(f"\r{name}: through id {last_id}, {rows_done} rows updated", nl=False)
+
+        done = run(spec, chunk_size=chunk_size, pause=pause, max_chunks=max_chunks, progress=report)
+        click.echo()
+        click.echo(f"{name}: {'done' if done else 'paused; run again to resume'}")
+
+    @backfill_cli.command("status")
+    def backfill_status():
+        """Show every registered backfill and its checkpoint."""
+        for name in sorted(_registry):
+            state = checkpoint(name)
+            if state is None:
+                click.echo(f"{name}: not started")
+            else:
+                click.echo(f"{name}: {state.status}, through id {state.last_id}, "
+                           f"{state.rows_done} rows, updated {state.updated_at:%Y-%m-%d %H:%M:%S}")
+
+    @backfill_cli.command("reset")
+    @click.argument("name")
+    def backfill_reset(name):
+        """Forget NAME's checkpoint so it starts over."""
+        reset(name)
+        click.echo(f"{name}: checkpoint cleared")
+
+
+# --- Registered backfills ---
+@backfill(
+    "recipes_total_time",
+    Recipe.__table__,
+    where=Recipe.total_time_minutes.is_(None)
+    & Recipe.prep_time_minutes.is_not(None)
+    & Recipe.cook_time_minutes.is_not(None),
+)
+def _recipes_total_time(t):
+    return {"total_time_minutes": t.c.prep_time_minutes + t.c.cook_time_minutes}
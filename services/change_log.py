@@ -0,0 +1,119 @@
+"""
+Recipe change feed for incremental client sync.
+
+Every flushed insert, update or delete of a Recipe appends a row to
+`recipe_changes` in the same transaction, and Core writes that bypass the
+ORM (rating aggregates, backfills) call `record()` themselves. Buffered view
+counts are deliberately not logged: they would turn every page view into a
+change. Each batch of log rows also queues a rebuild of the shared read index
+(services/read_index.py), whose freshness is measured against this log.
+
+`GET /api/recipes/changes?since=<cursor>` reads the next `limit` log rows
+after the cursor and returns, in cursor order, each recipe changed in them
+once, at its latest change: as an upsert with its current fields if it
+still exists, otherwise as a tombstone. A recipe changed again in a later
+page shows up again there. A client applies a page, stores `cursor`, and
+repeats while `has_more` is set.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session, object_session
+
+from services import read_index
+from services.models import Recipe, RecipeChange
+from services.recipe_api import fetch_many
+
+
+def record(connection, recipe_ids, op: str = "upsert") -> None:
+    """Log changes made outside the ORM, on the connection that made them."""
+    now = datetime.utcnow()
+    rows = [{"recipe_id": rid, "op": op, "changed_at": now} for rid in recipe_ids]
+    if rows:
+        connection.execute(insert(RecipeChange.__table__), rows)
+        read_index.queue_rebuild(connection)
+
+
+def _collect(op):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        # after_update also fires for objects that were dirty without any net change
+        if session is not None and (op != "update" or session.is_modified(target, include_collections=False)):
+            session.info.setdefault("recipe_changes", []).append((target.id, "delete" if op == "delete" else "upsert"))
+    return listener
+
+
+event.listen(Recipe, "after_insert", _collect("insert"))
+event.listen(Recipe, "after_update", _collect("update"))
+event.listen(Recipe, "after_delete", _collect("delete"))
+
+
+@event.listens_for(Session, "after_flush")
+def _write_changes(session, flush_context):
+    # One executemany per flush rather than one INSERT per recipe
+    pending = session.info.pop("recipe_changes", None)
+    if pending:
+        now = datetime.utcnow()
+        connection = session.connection()
+        connection.execute(
+            insert(RecipeChange.__table__),
+            [{"recipe_id": rid, "op": op, "changed_at": now} for rid, op in pending],
+        )
+        read_index.queue_rebuild(connection)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session):
+    session.info.pop("recipe_changes", None)
+
+
+def latest_changes(cursor: int, limit: int):
+    """
+    The next `limit` log rows after `cursor` (plus one, to detect more).
+
+    A primary-key range, so a poll costs O(new changes) however long the log
+    grows; `build_page` folds repeated recipes within the page.
+    """
+    return (
+        select(RecipeChange.id, RecipeChange.recipe_id)
+        .where(RecipeChange.id > cursor)
+        .order_by(RecipeChange.id)
+        .limit(limit + 1)
+    )
+
+
+def page_recipe_ids(page: list, limit: int) -> list:
+    """Distinct recipe ids in a `latest_changes()` page."""
+    return list(dict.fromkeys(row.recipe_id for row in page[:limit]))
+
+
+def build_page(page: list, rows: list, cursor: int, limit: int) -> dict:
+    """The feed page for `latest_changes()` rows, given the current `rows` of those recipes."""
+    has_more = len(page) > limit
+    page = page[:limit]
+    # Each recipe once per page, at its latest change in the page
+    latest = {}
+    for change in page:
+        latest[change.recipe_id] = change.id
+    current = {row.id: row for row in rows}
+    changes = []
+    for recipe_id, change_cursor in sorted(latest.items(), key=lambda item: item[1]):
+        row = current.get(recipe_id)
+        if row is None:
+            changes.append({"op": "delete", "cursor": change_cursor, "id": recipe_id})
+        else:
+            changes.append({"op": "upsert", "cursor": change_cursor, "recipe": row})
+    return {
+        "changes": changes,
+        # The last log row read, even if its recipe came earlier in the page
+        "cursor": page[-1].id if page else cursor,
+        "has_more": has_more,
+    }
+
+
+def changes_since(session, cursor: int, limit: int, columns) -> dict:
+    """One page of the feed after `cursor`, with upserts limited to `columns`."""
+    page = session.execute(latest_changes(cursor, limit)).all()
+    rows = fetch_many(page_recipe_ids(page, limit), columns)
+    return build_page(page, rows, cursor, limit)
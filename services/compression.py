@@ -0,0 +1,149 @@
+"""
+Dynamic response compression.
+
+Compresses HTML, JSON, XML and other text responses with the best encoding
+the client accepts: brotli or zstd when their packages are installed,
+otherwise gzip. Buffered responses below COMPRESS_MIN_SIZE are left alone.
+Streamed responses (sitemaps, exports) are compressed chunk by chunk as they
+are produced, flushing roughly every COMPRESS_STREAM_FLUSH_BYTES of input so
+the client keeps receiving data without the body ever being buffered.
+Responses that already carry a Content-Encoding (precompressed static files)
+or ask for no-transform pass through untouched.
+"""
+
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class _Gzip:
+    def __init__(self, config):
+        # wbits=31: zlib stream with a gzip header and trailer
+        self._obj = zlib.compressobj(config["COMPRESS_LEVEL"], zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, config):
+        self._obj = brotli.Compressor(quality=config["COMPRESS_BROTLI_QUALITY"])
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self, config):
+        self._obj = zstandard.ZstdCompressor(level=config["COMPRESS_ZSTD_LEVEL"]).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def _encoders():
+    """Available encoders, most preferred first."""
+    found = []
+    if brotli is not None:
+        found.append(("br", _Brotli))
+    if zstandard is not None:
+        found.append(("zstd", _Zstd))
+    found.append(("gzip", _Gzip))
+    return found
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    for name, encoder in _encoders():
+        if accepted[name]:
+            return name, encoder
+    return None, None
+
+
+def _compress_stream(chunks, original, encoder, flush_bytes: int):
+    pending = 0
+    try:
+        for chunk in chunks:
+            out = encoder.compress(chunk)
+            pending += len(chunk)
+            if pending >= flush_bytes:
+                out += encoder.flush()
+                pending = 0
+            if out:
+                yield out
+        yield encoder.finish()
+    finally:
+        # Replacing response.response means its close() (e.g. stream_with_context cleanup) is ours to call
+        close = getattr(original, "close", None)
+        if close is not None:
+            close()
+
+
+def _compress_response(response):
+    config = current_app.config
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in config["COMPRESS_MIMETYPES"]
+        or "no-transform" in (response.headers.get("Cache-Control") or "")
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    name, encoder_cls = _choose_encoding()
+    if name is None:
+        return response
+    encoder = encoder_cls(config)
+
+    if response.is_streamed:
+        original = response.response
+        response.response = _compress_stream(
+            response.iter_encoded(), original, encoder, config["COMPRESS_STREAM_FLUSH_BYTES"])
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config["COMPRESS_MIN_SIZE"]:
+            return response
+        response.set_data(encoder.compress(data) + encoder.finish())
+
+    response.headers["Content-Encoding"] = name
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # Byte-for-byte different body: only a weak validator still holds
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app) -> None:
+    if app.config["COMPRESS_ENABLED"]:
+        app.after_request(_compress_response)
@@ -0,0 +1,183 @@
+"""
+Numeric recipe costs parsed from the free-text `Recipe.estimated_cost`.
+
+The text stays what the author typed ("$12 or $12.50", "about 8 EUR",
+"£3 per serving"). On write it is parsed into integer minor units (cents)
+with an ISO currency code, and combined with `servings` into both a total
+and a per-serving figure. Each figure has its own index, so cost filters and
+cost sorting never parse text per request.
+
+Parsing rules, deliberately forgiving:
+  - amounts next to a currency symbol, code or name are used, whether it
+    comes before or after ("$12", "12,50 €", "8 EUR", "20 dollars")
+  - several amounts ("$10-15", "$12 or $12.50") average to one estimate
+  - without any currency, the first bare amount or range is used, in
+    COST_DEFAULT_CURRENCY; serving counts ("serves 4", "4 portions") are
+    never taken for a price
+  - "per serving", "per person", "each", "/serving" mark a per-serving price
+  - a separator followed by exactly three digits groups thousands ("1,200",
+    "1.200"); otherwise it is the decimal point ("12,50", "1,5"); with both,
+    the last one is the decimal point ("1.200,50", "1,200.50")
+Text with no usable amount, or an amount beyond MAX_CENTS, leaves the
+numeric columns NULL.
+
+Existing rows are filled with `flask backfill run recipes_cost`.
+"""
+
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import NamedTuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+
+from services.backfill import backfill
+from services.models import Recipe
+
+DEFAULT_CURRENCY = "USD"
+# Largest stored amount (about 21 million): anything above is a typo, not an estimate
+MAX_CENTS = 2**31 - 1
+
+SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY", "₹": "INR"}
+CODES = ("USD", "EUR", "GBP", "CAD", "AUD", "NZD", "JPY", "INR", "MXN", "CHF")
+_DISPLAY_SYMBOLS = {"USD": "$", "EUR": "€", "GBP": "£"}
+
+_NUMBER = r"\d{1,3}(?:[.,]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?"
+_CODE = "|".join(CODES)
+_SYMBOL = f"[{''.join(SYMBOLS)}]"
+# No "pound": in a recipe it is as likely a weight
+NAMES = {"dollar": "USD", "buck": "USD", "euro": "EUR", "quid": "GBP"}
+_NAME = rf"(?:{'|'.join(NAMES)})s?"
+_MARK = rf"{_SYMBOL}|\b(?:{_CODE}|{_NAME})\b"
+_TO = rf"\s*(?:-|–|to)\s*"  # "$10-15", "10 to 15 EUR"
+_MONEY = re.compile(
+    # Currency first: "$12", "$10-$15", "EUR 8"
+    rf"(?P<pre>{_MARK})\s*(?P<a>{_NUMBER})(?:{_TO}(?:{_SYMBOL})?\s*(?P<a2>{_NUMBER}))?"
+    # Currency after: "12,50 €", "10 to 15 EUR", "20 dollars"
+    rf"|(?:(?P<b2>{_NUMBER}){_TO})?(?P<b>{_NUMBER})\s*(?P<post>{_MARK})",
+    re.IGNORECASE,
+)
+_BARE = re.compile(rf"(?P<a>{_NUMBER})(?:{_TO}(?P<a2>{_NUMBER}))?")
+_COUNTS = re.compile(
+    r"\b(?:serves|feeds|makes|for)\s+\d+|\b\d+\s*(?:servings?|people|persons?|portions?|pieces?)\b",
+    re.IGNORECASE,
+)
+_PER_SERVING = re.compile(r"\bper\s+(?:serving|person|portion|head)\b|/\s*(?:serving|person|portion)\b|\beach\b",
+                          re.IGNORECASE)
+
+
+class Cost(NamedTuple):
+    cents: int
+    currency: str
+    per_serving: bool
+
+
+def _currency(mark: str) -> str:
+    mark = mark.lower()
+    if mark in SYMBOLS:
+        return SYMBOLS[mark]
+    if mark.upper() in CODES:
+        return mark.upper()
+    return NAMES[mark.rstrip("s")]
+
+
+def _amount(text: str) -> Decimal | None:
+    last = max(text.rfind(","), text.rfind("."))
+    if last != -1 and ("," in text and "." in text or len(text) - last - 1 != 3):
+        # The last separator is the decimal point; any others group thousands
+        text = re.sub(r"[.,]", "", text[:last]) + "." + text[last + 1:]
+    else:
+        text = re.sub(r"[.,]", "", text)
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        return None
+
+
+def parse_cost(text: str | None, default_currency: str = DEFAULT_CURRENCY) -> Cost | None:
+    """The estimate in `text` as integer cents, or None if it has no usable amount."""
+    if not text:
+        return None
+    currency = None
+    amounts = []
+    for m in _MONEY.finditer(text):
+        found = _currency(m["pre"] or m["post"])
+        # The first currency mentioned wins; amounts in any other are ignored
+        currency = currency or found
+        if found == currency:
+            amounts.extend(_amount(n) for n in m.group("a", "a2", "b2", "b") if n)
+    if currency is None:
+        currency = default_currency
+        bare = _BARE.search(_COUNTS.sub(" ", text))
+        amounts = [_amount(n) for n in bare.group("a", "a2") if n] if bare else []
+    amounts = [a for a in amounts if a is not None]
+    if not amounts:
+        return None
+    try:
+        cents = int((sum(amounts) / len(amounts) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except InvalidOperation:  # more digits than the decimal context holds
+        return None
+    if cents > MAX_CENTS:
+        return None
+    return Cost(cents, currency, bool(_PER_SERVING.search(text)))
+
+
+def to_cents(amount) -> int:
+    """A user-facing amount in major units (12.5, "12.50") as integer cents, at most MAX_CENTS."""
+    return min(int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)), MAX_CENTS)
+
+
+def cost_columns(text: str | None, servings: int | None, default_currency: str = DEFAULT_CURRENCY) -> dict:
+    """cost_cents / cost_per_serving_cents / cost_currency values for a recipe."""
+    cost = parse_cost(text, default_currency)
+    if cost is None:
+        return {"cost_cents": None, "cost_per_serving_cents": None, "cost_currency": None}
+    servings = servings if servings and servings > 0 else None
+    if cost.per_serving:
+        total, per_serving = (cost.cents * servings if servings else None), cost.cents
+        if total is not None and total > MAX_CENTS:
+            total = None
+    else:
+        total, per_serving = cost.cents, (round(cost.cents / servings) if servings else None)
+    return {"cost_cents": total, "cost_per_serving_cents": per_serving, "cost_currency": cost.currency}
+
+
+def format_cents(cents: int | None, currency: str | None = None) -> str:
+    if cents is None:
+        return ""
+    amount = f"{cents / 100:,.2f}"
+    symbol = _DISPLAY_SYMBOLS.get(currency or DEFAULT_CURRENCY)
+    return f"{symbol}{amount}" if symbol else f"{amount} {currency}"
+
+
+def _default_currency() -> str:
+    return current_app.config["COST_DEFAULT_CURRENCY"] if has_app_context() else DEFAULT_CURRENCY
+
+
+def apply_cost(target: Recipe) -> None:
+    for column, value in cost_columns(target.estimated_cost, target.servings, _default_currency()).items():
+        setattr(target, column, value)
+
+
+# --- Parse on write, only when the text or the servings changed ---
+@event.listens_for(Recipe, "before_insert")
+def _cost_new(mapper, connection, target):
+    apply_cost(target)
+
+
+@event.listens_for(Recipe, "before_update")
+def _cost_changed(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if attrs.estimated_cost.history.has_changes() or attrs.servings.history.has_changes():
+        apply_cost(target)
+
+
+@backfill("recipes_cost", Recipe.__table__, where=Recipe.estimated_cost.is_not(None), kind="python",
+          columns=(Recipe.estimated_cost, Recipe.servings))
+def _recipes_cost(rows):
+    currency = _default_currency()
+    return [{"id": row.id, **cost_columns(row.estimated_cost, row.servings, currency)} for row in rows]
+
+
+def init_app(app) -> None:
+    app.add_template_filter(format_cents, "cents")
@@ -0,0 +1,217 @@
+"""
+`flask db-maint`: SQLite maintenance and health checks.
+
+    flask db-maint optimize          ANALYZE + PRAGMA optimize (refresh planner stats)
+    flask db-maint vacuum            return free pages to the OS with incremental VACUUM
+    flask db-maint checkpoint        fold the WAL back into the database file
+    flask db-maint check             integrity and foreign-key checks (exit 1 on problems)
+    flask db-maint report            table/index sizes and query plans of the hot queries
+
+The report EXPLAINs the statements the app actually runs on busy pages,
+built with the same helpers as the routes, and flags full table scans,
+temp-table sorts and, on tables of LARGE_TABLE_ROWS or more, full index
+scans, so a missing index shows up before the catalog is big enough for it
+to hurt. Queries that walk a whole index or table by design (unpaginated
+lists, substring and JSON tag filters) say why and count as expected.
+"""
+
+from datetime import datetime
+
+import click
+from sqlalchemy import and_, or_, select, text
+from sqlalchemy.orm import joinedload
+
+from services import change_log, recipe_api, slug_redirects
+from services.db import db
+from services.models import Job, Recipe
+
+# Tables from this many rows on get their full index scans flagged
+LARGE_TABLE_ROWS = 10_000
+
+_LIST = recipe_api.select_fields(recipe_api.parse_fields(None, recipe_api.LIST_FIELDS))
+_DETAIL = recipe_api.select_fields(recipe_api.parse_fields(None))
+_NOW = datetime(2026, 1, 1)
+
+# (name, statement, why a full scan or sort is expected by design, or None)
+HOT_QUERIES = (
+    ("recipes: newest list", _LIST.order_by(*recipe_api.list_order("newest")),
+        "unpaginated list returns every row"),
+    ("recipes: popular list", _LIST.order_by(*recipe_api.list_order("popular")),
+        "unpaginated list returns every row"),
+    ("recipes: featured", select(Recipe).options(joinedload(Recipe.author))
+        .order_by(Recipe.created_at.desc()).limit(3), "LIMIT 3 stops the index walk"),
+    ("recipes: detail by id", _DETAIL.where(recipe_api.lookup("1")), None),
+    ("recipes: lookup by slug", _DETAIL.where(recipe_api.lookup("example")), None),
+    ("recipes: batch by ids", _LIST.where(Recipe.id.in_([1, 2, 3])), None),
+    ("recipes: by author", _DETAIL.where(Recipe.author_id == 1)
+        .order_by(Recipe.created_at.desc(), Recipe.id.desc()).limit(26), None),
+    ("slug history: old slug", slug_redirects.lookup("example"), None),
+    ("filter: max prep time", select(Recipe).where(Recipe.prep_time_minutes <= 30)
+        .order_by(Recipe.prep_time_minutes.asc()), None),
+    ("filter: max cost", select(Recipe).where(Recipe.cost_cents <= 1500)
+        .order_by(Recipe.cost_cents.asc(), Recipe.id), None),
+    ("filter: max cost per serving", select(Recipe).where(Recipe.cost_per_serving_cents <= 500)
+        .order_by(Recipe.cost_per_serving_cents.asc(), Recipe.id), None),
+    ("filter: cuisine", select(Recipe).where(Recipe.cuisine.ilike("%italian%"))
+        .order_by(Recipe.created_at.desc()), "substring match cannot use an index"),
+    ("filter: dietary tag", select(Recipe).where(Recipe.dietary_tags.contains("vegan"))
+        .order_by(Recipe.created_at.desc()), "JSON tag match cannot use an index"),
+    ("change feed page", change_log.latest_changes(0, 500), None),
+    ("jobs: claim", select(Job.id).where(or_(
+        and_(Job.status == "queued", Job.run_at <= _NOW),
+        and_(Job.status == "running", Job.locked_at < _NOW),
+    )).order_by(Job.run_at, Job.id).limit(1), "two index ranges merged; sorts only the due jobs"),
+)
+
+
+def _pragma(conn, name: str):
+    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def explain(conn, stmt) -> list:
+    """EXPLAIN QUERY PLAN detail lines for a SQLAlchemy statement."""
+    sql = stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def plan_problems(details: list, large_tables=frozenset()) -> list:
+    """Full table scans, temp-table sorts, and full index scans of `large_tables`, in a query plan."""
+    problems = []
+    for line in details:
+        if line.startswith("SCAN "):
+            if " USING " not in line:
+                problems.append(f"full scan ({line})")
+            elif " INDEX " in line and line.split()[1] in large_tables:
+                # SCAN ... USING [COVERING] INDEX walks the whole index, not a range of it
+                problems.append(f"full index scan ({line})")
+        elif line.startswith("USE TEMP B-TREE"):
+            problems.append(line.lower())
+    return problems
+
+
+def table_stats(conn) -> list:
+    """(table, rows, table bytes, index bytes) for every user table."""
+    tables = conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )).scalars().all()
+    sizes = {}
+    try:
+        # dbstat is optional in SQLite builds; without it only row counts are shown
+        for name, owner, size in conn.execute(text(
+            "SELECT d.name, COALESCE(m.tbl_name, d.name), SUM(d.pgsize) FROM dbstat d "
+            "LEFT JOIN sqlite_master m ON m.name = d.name GROUP BY d.name"
+        )):
+            entry = sizes.setdefault(owner, [0, 0])
+            entry[0 if name == owner else 1] += size
+    except Exception:
+        sizes = None
+    stats = []
+    for table in tables:
+        rows = conn.exec_driver_sql(f'SELECT COUNT(*) FROM "{table}"').scalar()
+        table_bytes, index_bytes = (sizes or {}).get(table, (None, None))
+        stats.append((table, rows, table_bytes, index_bytes))
+    return stats
+
+
+def _fmt_bytes(n) -> str:
+    if n is None:
+        return "-"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def init_app(app) -> None:
+    @app.cli.group("db-maint")
+    def db_maint():
+        """SQLite maintenance: optimize, vacuum, checkpoint, check, report."""
+
+    @db_maint.command("optimize")
+    def optimize():
+        """Refresh query planner statistics (ANALYZE, PRAGMA optimize)."""
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+            conn.exec_driver_sql("PRAGMA optimize")
+        click.echo("ANALYZE and PRAGMA optimize done")
+
+    @db_maint.command("vacuum")
+    @click.option("--pages", type=int, default=0, help="free pages to release (0 = all)")
+    @click.option("--enable-incremental", is_flag=True,
+                  help="switch to auto_vacuum=INCREMENTAL (one full VACUUM, locks the database)")
+    def vacuum(pages, enable_incremental):
+        """Release free pages with incremental VACUUM."""
+        with db.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            if enable_incremental and _pragma(conn, "auto_vacuum") != 2:
+                conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.exec_driver_sql("VACUUM")
+                click.echo("auto_vacuum set to INCREMENTAL (database rebuilt once)")
+            if _pragma(conn, "auto_vacuum") != 2:
+                raise click.ClickException(
+                    "auto_vacuum is not INCREMENTAL; run once with --enable-incremental during a quiet period")
+            before = _pragma(conn, "freelist_count")
+            conn.exec_driver_sql(f"PRAGMA incremental_vacuum({pages})" if pages else "PRAGMA incremental_vacuum")
+            after = _pragma(conn, "freelist_count")
+        click.echo(f"released {before - after} pages ({after} still free)")
+
+    @db_maint.command("checkpoint")
+    @click.option("--mode", type=click.Choice(["PASSIVE", "FULL", "RESTART", "TRUNCATE"]), default="TRUNCATE",
+                  show_default=True)
+    def checkpoint(mode):
+        """Copy the WAL into the database file."""
+        with db.engine.connect() as conn:
+            if _pragma(conn, "journal_mode") != "wal":
+                click.echo("journal_mode is not WAL; nothing to checkpoint")
+                return
+            busy, log, done = conn.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").first()
+        click.echo(f"checkpoint {mode}: {done}/{log} frames copied" + (" (busy, retry later)" if busy else ""))
+
+    @db_maint.command("check")
+    @click.option("--quick", is_flag=True, help="quick_check instead of the full integrity_check")
+    def check(quick):
+        """Integrity and foreign-key checks; exits 1 if anything is wrong."""
+        pragma = "quick_check" if quick else "integrity_check"
+        with db.engine.connect() as conn:
+            integrity = [row[0] for row in conn.exec_driver_sql(f"PRAGMA {pragma}")]
+            fk = conn.exec_driver_sql("PRAGMA foreign_key_check").all()
+        ok = integrity == ["ok"] and not fk
+        for line in integrity if integrity != ["ok"] else []:
+            click.echo(f"integrity: {line}")
+        for table, rowid, parent, _ in fk:
+            click.echo(f"foreign key: {table} rowid {rowid} references missing {parent} row")
+        click.echo(f"{pragma}: {'ok' if ok else 'PROBLEMS FOUND'}")
+        if not ok:
+            raise SystemExit(1)
+
+    @db_maint.command("report")
+    @click.option("--strict", is_flag=True, help="exit 1 if a hot query has an unexpected full scan or sort")
+    def report(strict):
+        """Table/index sizes and query plans for the app's hot queries."""
+        with db.engine.connect() as conn:
+            page_size, pages, free = (_pragma(conn, p) for p in ("page_size", "page_count", "freelist_count"))
+            click.echo(f"database: {_fmt_bytes(page_size * pages)}, {free} free pages, "
+                       f"journal_mode={_pragma(conn, 'journal_mode')}")
+            click.echo(f"\n{'table':<26}{'rows':>10}{'data':>12}{'indexes':>12}")
+            large = set()
+            for table, rows, table_bytes, index_bytes in table_stats(conn):
+                click.echo(f"{table:<26}{rows:>10}{_fmt_bytes(table_bytes):>12}{_fmt_bytes(index_bytes):>12}")
+                if rows >= LARGE_TABLE_ROWS:
+                    large.add(table)
+
+            unexpected = 0
+            click.echo("\nhot query plans:")
+            for name, stmt, expected in HOT_QUERIES:
+                details = explain(conn, stmt)
+                problems = plan_problems(details, large)
+                if problems and not expected:
+                    unexpected += 1
+                    status = "WARN"
+                else:
+                    status = "ok  " if not problems else "ok* "
+                click.echo(f"  [{status}] {name}: {' | '.join(details)}")
+                for problem in problems:
+                    click.echo(f"           - {problem}" + (f" (expected: {expected})" if expected else ""))
+        click.echo(f"\n{unexpected} hot queries with unexpected scans or sorts")
+        if strict and unexpected:
+            raise SystemExit(1)
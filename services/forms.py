@@ -86,4 +86,10 @@ class RecipeForm(FlaskForm):
         render_kw={"placeholder": "e.g., $12 or $12.50"},
     )
 
+    servings = IntegerField(
+        "Servings",
+        validators=[Optional(), NumberRange(min=1, message="Servings must be at least 1.")],
+        render_kw={"min": "1", "placeholder": "e.g., 4"},
+    )
+
     submit = SubmitField("Create Recipe")
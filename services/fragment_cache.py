@@ -0,0 +1,118 @@
+"""
+Rendered-fragment cache for templates.
+
+Listing pages include the same recipe cards over and over; each include
+re-runs url_for, the tag badge loop and the description truncation. The
+`recipe_card(recipe)` template global renders `partials/_recipe_card.html`
+once per (recipe.id, recipe.updated_at) and afterwards returns the stored
+HTML, so an edited recipe simply gets a new key and the old entry ages out
+of the LRU. `fragment(template, key, **context)` does the same for any other
+partial.
+
+Rating votes and reconciles change the stars on a card but deliberately
+keep updated_at (services/ratings.py), so the key stays the same. Those
+writes, like author renames, reach every worker through
+services/invalidation.py, which drops the cards of those recipes or, for
+users, the whole cache.
+"""
+
+import threading
+from collections import OrderedDict
+
+from flask import current_app, has_app_context, request
+from markupsafe import Markup
+
+from services import invalidation
+from services.metrics import CACHE_REQUESTS
+
+RECIPE_CARD_TEMPLATE = "partials/_recipe_card.html"
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered HTML keyed by arbitrary hashable keys."""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def set(self, key, html) -> None:
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def discard_recipe_cards(self, recipe_ids) -> int:
+        """Drop the cached cards of `recipe_ids`, whatever their updated_at."""
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == RECIPE_CARD_TEMPLATE and k[2][0] in recipe_ids]
+            for k in stale:
+                del self._entries[k]
+        return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _cache() -> FragmentCache:
+    return current_app.extensions["fragment_cache"]
+
+
+def fragment(template_name: str, key, **context) -> Markup:
+    """Render `template_name` with `context`, reusing the HTML cached under `key`."""
+    if current_app.debug:
+        # Templates auto-reload in debug; never serve markup from an older version
+        return Markup(current_app.jinja_env.get_template(template_name).render(**context))
+
+    # url_for output depends on the mount point, so it is part of the key
+    full_key = (template_name, request.script_root, key)
+    cache = _cache()
+    html = cache.get(full_key)
+    if html is not None:
+        CACHE_REQUESTS.inc(cache="fragment", result="hit")
+        return html
+
+    CACHE_REQUESTS.inc(cache="fragment", result="miss")
+    html = Markup(current_app.jinja_env.get_template(template_name).render(**context))
+    cache.set(full_key, html)
+    return html
+
+
+def recipe_card(recipe) -> Markup:
+    return fragment(RECIPE_CARD_TEMPLATE, (recipe.id, recipe.updated_at), recipe=recipe)
+
+
+@invalidation.subscribe(invalidation.RECIPE, invalidation.RATING)
+def _drop_recipe_cards(recipe_ids):
+    if has_app_context():
+        _cache().discard_recipe_cards(recipe_ids)
+
+
+@invalidation.subscribe(invalidation.USER, invalidation.GENERATION)
+def _drop_all(keys):
+    # Cards show the author's username; renames are rare enough to start over
+    if has_app_context():
+        _cache().clear()
+
+
+def init_app(app) -> None:
+    app.extensions["fragment_cache"] = FragmentCache(app.config["FRAGMENT_CACHE_SIZE"])
+    app.add_template_global(recipe_card)
+    app.add_template_global(fragment)
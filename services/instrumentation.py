@@ -0,0 +1,129 @@
+"""
+Opt-in per-request instrumentation.
+
+With INSTRUMENTATION_ENABLED set, each request records its SQL query count,
+time spent in the database, time spent rendering templates and total time.
+The numbers go out as a `Server-Timing` header (visible in browser devtools)
+and as one JSON log line on the `tasty_truths.perf` logger. Requests that run
+more queries than INSTRUMENTATION_QUERY_BUDGET are logged as warnings along
+with their most repeated statement, which is usually the N+1 culprit.
+"""
+
+import json
+import logging
+import time
+from collections import Counter
+
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+from services.db import db
+
+logger = logging.getLogger("tasty_truths.perf")
+
+
+class RequestStats:
+    """Counters for a single request, stored on `flask.g`."""
+
+    __slots__ = ("started", "queries", "db_time", "render_time", "render_started", "statements")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_started = []
+        self.statements = Counter()
+
+
+def current_stats() -> RequestStats | None:
+    if not has_request_context():
+        return None
+    return g.get("_request_stats")
+
+
+# ---- SQLAlchemy cursor hooks ----
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_stats() is not None:
+        conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    started = conn.info.get("_query_started")
+    if stats is None or not started:
+        return
+    stats.db_time += time.perf_counter() - started.pop()
+    stats.queries += 1
+    stats.statements[statement] += 1
+
+
+# ---- Jinja render hooks (only top-level render_template calls fire these) ----
+def _before_render(sender, template, context, **extra):
+    stats = current_stats()
+    if stats is not None:
+        stats.render_started.append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    stats = current_stats()
+    if stats is not None and stats.render_started:
+        stats.render_time += time.perf_counter() - stats.render_started.pop()
+
+
+# ---- request lifecycle ----
+def _start_request():
+    g._request_stats = RequestStats()
+
+
+def _finish_request(response):
+    stats = current_stats()
+    if stats is None:
+        return response
+
+    total_ms = (time.perf_counter() - stats.started) * 1000
+    db_ms = stats.db_time * 1000
+    render_ms = stats.render_time * 1000
+    budget = current_app.config["INSTRUMENTATION_QUERY_BUDGET"]
+    over_budget = stats.queries > budget
+
+    if current_app.config["INSTRUMENTATION_SERVER_TIMING"]:
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={db_ms:.2f};desc="{stats.queries} queries", '
+            f"render;dur={render_ms:.2f}, total;dur={total_ms:.2f}",
+        )
+
+    record = {
+        "event": "request",
+        "method": request.method,
+        "path": request.path,
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+        "queries": stats.queries,
+        "db_ms": round(db_ms, 2),
+        "render_ms": round(render_ms, 2),
+        "total_ms": round(total_ms, 2),
+    }
+    if over_budget:
+        statement, repeats = stats.statements.most_common(1)[0]
+        record.update(query_budget=budget, top_statement=statement, top_statement_count=repeats)
+        logger.warning(json.dumps(record))
+    else:
+        logger.info(json.dumps(record))
+    return response
+
+
+def init_app(app) -> None:
+    """Wire the hooks into `app` if INSTRUMENTATION_ENABLED is set."""
+    if not app.config["INSTRUMENTATION_ENABLED"]:
+        return
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
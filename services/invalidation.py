@@ -0,0 +1,188 @@
+"""
+Cross-worker cache invalidation bus on a shared SQLite table.
+
+In-process caches (filter results, the slug redirect map, rendered
+fragments) live in every worker, but model events only fire in the worker
+that made the write. Writes therefore also append typed messages to
+`cache_invalidations`, in the same transaction as the data, so a message
+exists exactly when its change was committed:
+
+    recipe      key = recipe id      a recipe was inserted, updated or deleted
+    rating      key = recipe id      votes changed only a recipe's rating aggregates
+    user        key = user id        a user was updated or deleted
+    slug        no key               a rename rewrote recipe slug history
+    generation  no key               drop everything (bulk or Core writes)
+
+ORM writes publish by themselves. Core writes call `publish(connection,
+kind, keys)` on the connection that made them. Caches register handlers with
+`@subscribe(kind, ...)`, and a handler receives the set of keys (empty for
+"generation"). Handlers must be idempotent: a worker applies its own messages
+on commit and then reads them again from the table.
+
+Each worker keeps a cursor (the last message id it applied) and, before
+serving a request, reads anything newer at most once per
+INVALIDATION_POLL_INTERVAL seconds, with one primary-key range query. So
+another worker's commit is seen within that interval, and the committing
+worker applies its own messages at once. Messages older than
+INVALIDATION_RETENTION seconds are pruned. A worker idle for longer than
+that finds a gap behind its cursor and treats it as a "generation" message.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session, object_session
+
+from services.db import db
+from services.models import CacheInvalidation, Recipe, User
+
+logger = logging.getLogger("tasty_truths.invalidation")
+
+RECIPE = "recipe"
+RATING = "rating"
+USER = "user"
+SLUG = "slug"
+GENERATION = "generation"
+KINDS = (RECIPE, RATING, USER, SLUG, GENERATION)
+
+# Messages read per round-trip while catching up
+POLL_BATCH = 1000
+
+_handlers = {kind: [] for kind in KINDS}
+_lock = threading.Lock()
+_cursor = None          # id of the last message applied; None until the first poll
+_polled_at = 0.0
+_pruned_at = 0.0
+
+
+def subscribe(*kinds):
+    """Register the decorated `handler(keys)` for messages of `kinds`."""
+    def register(handler):
+        for kind in kinds:
+            _handlers[kind].append(handler)
+        return handler
+    return register
+
+
+def dispatch(messages) -> None:
+    """Run handlers for (kind, key) pairs, once per kind with all of its keys."""
+    keys = {}
+    for kind, key in messages:
+        keys.setdefault(kind, set())
+        if key is not None:
+            keys[kind].add(key)
+    for kind, kind_keys in keys.items():
+        for handler in _handlers.get(kind, ()):
+            try:
+                handler(kind_keys)
+            except Exception:
+                # One broken cache must not stall the cursor for all the others
+                logger.exception("invalidation handler %s failed for %s", handler.__qualname__, kind)
+
+
+def publish(connection, kind: str, keys=(None,)) -> None:
+    """Broadcast a message per key, on the connection (and transaction) that made the change."""
+    now = datetime.utcnow()
+    connection.execute(
+        insert(CacheInvalidation.__table__),
+        [{"kind": kind, "key": key, "created_at": now} for key in keys],
+    )
+
+
+def poll(engine=None, interval: float = 0.0, retention: float = 3600.0) -> int:
+    """Apply messages committed since the last poll; returns how many were read."""
+    global _cursor, _polled_at, _pruned_at
+    now = time.monotonic()
+    if now - _polled_at < interval:
+        return 0
+    engine = engine or db.engine
+    table = CacheInvalidation.__table__
+    # One poller at a time per process; other threads just go ahead with their request
+    if not _lock.acquire(blocking=False):
+        return 0
+    try:
+        _polled_at = now
+        read = 0
+        with engine.connect() as conn:
+            if _cursor is None:
+                # A new worker's caches are empty: nothing before this point concerns it
+                _cursor = conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar_one()
+                return 0
+            while True:
+                rows = conn.execute(
+                    select(table.c.id, table.c.kind, table.c.key)
+                    .where(table.c.id > _cursor).order_by(table.c.id).limit(POLL_BATCH)
+                ).all()
+                if not rows:
+                    break
+                messages = [(row.kind, row.key) for row in rows]
+                if read == 0 and rows[0].id != _cursor + 1:
+                    oldest = conn.execute(select(func.min(table.c.id))).scalar_one()
+                    if oldest > _cursor + 1:
+                        # Pruned before we read them: we cannot know what changed
+                        messages.append((GENERATION, None))
+                dispatch(messages)
+                _cursor = rows[-1].id
+                read += len(rows)
+                if len(rows) < POLL_BATCH:
+                    break
+
+        if now - _pruned_at >= retention / 4:
+            _pruned_at = now
+            cutoff = datetime.utcnow() - timedelta(seconds=retention)
+            with engine.begin() as conn:
+                conn.execute(delete(table).where(table.c.created_at < cutoff))
+        return read
+    finally:
+        _lock.release()
+
+
+# --- Publishing ORM writes: collect on flush, write with the flush, apply locally on commit ---
+def _collect(kind):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault("invalidations", []).append((kind, target.id))
+    return listener
+
+
+for _evt in ("after_insert", "after_update", "after_delete"):
+    event.listen(Recipe, _evt, _collect(RECIPE))
+for _evt in ("after_update", "after_delete"):
+    event.listen(User, _evt, _collect(USER))
+
+
+@event.listens_for(Session, "after_flush")
+def _write_messages(session, flush_context):
+    pending = session.info.pop("invalidations", None)
+    if pending:
+        now = datetime.utcnow()
+        session.connection().execute(
+            insert(CacheInvalidation.__table__),
+            [{"kind": kind, "key": key, "created_at": now} for kind, key in pending],
+        )
+        session.info.setdefault("invalidations_sent", []).extend(pending)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_own_messages(session):
+    sent = session.info.pop("invalidations_sent", None)
+    if sent:
+        dispatch(sent)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_messages(session):
+    session.info.pop("invalidations", None)
+    session.info.pop("invalidations_sent", None)
+
+
+def init_app(app) -> None:
+    @app.before_request
+    def _poll_invalidations():
+        poll(db.engine, current_app.config["INVALIDATION_POLL_INTERVAL"],
+             current_app.config["INVALIDATION_RETENTION"])
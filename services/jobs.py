@@ -0,0 +1,186 @@
+"""
+Lightweight background job queue backed by the `jobs` table.
+
+Register work with the `@task` decorator and enqueue it with `.delay()`:
+
+    @task(max_attempts=3)
+    def make_thumbnail(recipe_id):
+        ...
+
+    make_thumbnail.delay(recipe.id, idempotency_key=f"thumb:{recipe.id}")
+    db.session.commit()
+
+`.delay()` adds the job to the current session, so it commits (or rolls
+back) together with the row it belongs to. Model event hooks that cannot use
+the session pass `bind=connection` to write through a Core connection instead.
+A job whose idempotency key already exists is silently not enqueued again.
+
+Jobs run in `flask jobs-worker` processes. A worker claims one due job with a
+single UPDATE (SQLite serializes writers, so two workers never get the same
+row), runs it inside an app context and marks it done, or on error requeues
+it with exponential backoff until max_attempts is reached. Jobs locked by a
+worker that died are reclaimed after JOBS_LOCK_TIMEOUT seconds.
+"""
+
+import logging
+import multiprocessing
+import os
+import random
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from services.db import db
+from services.models import Job
+
+logger = logging.getLogger("tasty_truths.jobs")
+
+_tasks = {}
+
+
+class Task:
+    def __init__(self, func, max_attempts: int, backoff: float):
+        self.func = func
+        self.name = f"{func.__module__}.{func.__qualname__}"
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, idempotency_key: str | None = None, run_at: datetime | None = None,
+              bind=None, **kwargs) -> None:
+        enqueue(self.name, args, kwargs, idempotency_key=idempotency_key, run_at=run_at,
+                max_attempts=self.max_attempts, bind=bind)
+
+
+def task(func=None, *, max_attempts: int = 5, backoff: float = 2.0):
+    """Register `func` as a background task; usable bare or with options."""
+    def register(f):
+        t = Task(f, max_attempts, backoff)
+        _tasks[t.name] = t
+        return t
+    return register(func) if func is not None else register
+
+
+def enqueue(name: str, args=(), kwargs=None, idempotency_key: str | None = None,
+            run_at: datetime | None = None, max_attempts: int = 5, bind=None) -> None:
+    stmt = insert(Job.__table__).values(
+        name=name,
+        payload={"args": list(args), "kwargs": kwargs or {}},
+        idempotency_key=idempotency_key,
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=run_at or datetime.utcnow(),
+        created_at=datetime.utcnow(),
+    ).on_conflict_do_nothing(index_elements=["idempotency_key"])
+    (bind or db.session).execute(stmt)
+
+
+def claim(worker_id: str, lock_timeout: float) -> Job | None:
+    """Atomically take the next due job (or a stale running one) for `worker_id`."""
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=lock_timeout)
+    due = or_(
+        and_(Job.status == "queued", Job.run_at <= now),
+        and_(Job.status == "running", Job.locked_at < stale),
+    )
+    next_id = select(Job.id).where(due).order_by(Job.run_at, Job.id).limit(1).scalar_subquery()
+    token = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+    result = db.session.execute(
+        update(Job)
+        .where(Job.id == next_id, due)
+        .values(status="running", locked_by=token, locked_at=now, attempts=Job.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result.rowcount == 0:
+        return None
+    return db.session.execute(select(Job).where(Job.locked_by == token)).scalar_one_or_none()
+
+
+def run_job(job: Job) -> bool:
+    """Execute one claimed job and record the outcome; True on success."""
+    t = _tasks.get(job.name)
+    try:
+        if t is None:
+            raise LookupError(f"unknown task {job.name!r}")
+        t.func(*job.payload.get("args", []), **job.payload.get("kwargs", {}))
+    except Exception:
+        db.session.rollback()
+        job.last_error = traceback.format_exc(limit=20)
+        job.locked_by = job.locked_at = None
+        if t is not None and job.attempts < job.max_attempts:
+            delay = t.backoff ** job.attempts + random.uniform(0, 1)
+            job.status = "queued"
+            job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+            logger.warning("job %s (%s) failed, retry %d in %.1fs", job.id, job.name, job.attempts, delay)
+        else:
+            job.status = "failed"
+            job.finished_at = datetime.utcnow()
+            logger.error("job %s (%s) failed permanently", job.id, job.name)
+        db.session.commit()
+        return False
+
+    job.status = "done"
+    job.locked_by = job.locked_at = None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def work(app, poll_interval: float = 1.0, burst: bool = False) -> int:
+    """Run jobs until interrupted (or, with burst, until none are due). Returns jobs processed."""
+    worker_id = f"{os.uname().nodename}:{os.getpid()}"
+    processed = 0
+    with app.app_context():
+        lock_timeout = app.config["JOBS_LOCK_TIMEOUT"]
+        while True:
+            job = claim(worker_id, lock_timeout)
+            if job is None:
+                if burst:
+                    return processed
+                time.sleep(poll_interval)
+                continue
+            run_job(job)
+            processed += 1
+            db.session.remove()
+
+
+def _worker_main(app, poll_interval):
+    with app.app_context():
+        # Never share pooled SQLite connections across fork
+        db.engine.dispose(close=False)
+    try:
+        work(app, poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def init_app(app) -> None:
+    @app.cli.command("jobs-worker")
+    @click.option("--processes", default=1, show_default=True, help="worker processes to run")
+    @click.option("--poll", default=1.0, show_default=True, help="seconds between polls when idle")
+    @click.option("--burst", is_flag=True, help="exit once no jobs are due (single process)")
+    def jobs_worker(processes, poll, burst):
+        """Run background job workers."""
+        if burst:
+            click.echo(f"processed {work(app, poll, burst=True)} jobs")
+            return
+        ctx = multiprocessing.get_context("fork")
+        procs = [ctx.Process(target=_worker_main, args=(app, poll)) for _ in range(processes)]
+        for p in procs:
+            p.start()
+        click.echo(f"started {processes} job worker(s)")
+        try:
+            for p in procs:
+                p.join()
+        except KeyboardInterrupt:
+            for p in procs:
+                p.terminate()
@@ -0,0 +1,441 @@
+"""
+Prometheus-style metrics shared across worker processes.
+
+Every process writes its samples into one small mmap'd file under
+METRICS_DIR, `<pid>.db`, with its threads taking turns under a lock.
+`/metrics` reads the files in the directory and adds them up, which is how
+numbers from all gunicorn workers end up in one scrape. Gauges hold
+process-wide values (pool size, connections checked out), so only processes
+that are still alive count towards them. Counters and histograms keep the
+totals of workers that have exited: a scrape folds a dead process's file into
+`archive.db` and deletes it, so recycled workers never pile up files, the same
+as prometheus_client's multiprocess mode. Empty the directory when deploying a
+new release.
+
+Without a configured directory (scripts, the shell) samples go to a plain
+in-process dict so instrumented code never has to check whether metrics are
+switched on.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: scrapes fold dead files without a file lock
+    fcntl = None
+
+from flask import Response, g, request
+
+from services.db import db
+
+_USED = struct.Struct("<I")    # file header: bytes in use
+_KEYLEN = struct.Struct("<I")  # entry header: length of the key that follows
+_VALUE = struct.Struct("<d")
+_HEADER_SIZE = 8
+_INITIAL_SIZE = 64 * 1024
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ARCHIVE = "archive.db"
+
+_directory = None
+_registry = {}
+_lock = threading.Lock()
+_process = {}       # pid -> this process's store
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _read_entries(data) -> dict:
+    """Parse a metrics file image into {key: (value_offset, value)}."""
+    used = _USED.unpack_from(data, 0)[0]
+    entries = {}
+    pos = _HEADER_SIZE
+    while pos < used:
+        keylen = _KEYLEN.unpack_from(data, pos)[0]
+        key = bytes(data[pos + 4:pos + 4 + keylen]).decode("utf-8")
+        value_pos = pos + _align8(4 + keylen)
+        entries[key] = (value_pos, _VALUE.unpack_from(data, value_pos)[0])
+        pos = value_pos + _VALUE.size
+    return entries
+
+
+class _MmapStore:
+    """Append-only key/value file; writers hold _lock, one process per file."""
+
+    def __init__(self, path: str):
+        self._fh = open(path, "a+b")
+        if os.fstat(self._fh.fileno()).st_size < _INITIAL_SIZE:
+            self._fh.truncate(_INITIAL_SIZE)
+        self._map = mmap.mmap(self._fh.fileno(), 0)
+        self._used = _USED.unpack_from(self._map, 0)[0]
+        if self._used == 0:
+            self._used = _HEADER_SIZE
+            _USED.pack_into(self._map, 0, self._used)
+        self._positions = {k: pos for k, (pos, _) in _read_entries(self._map).items()}
+
+    def _position(self, key: str) -> int:
+        pos = self._positions.get(key)
+        if pos is not None:
+            return pos
+        encoded = key.encode("utf-8")
+        value_pos = self._used + _align8(4 + len(encoded))
+        end = value_pos + _VALUE.size
+        if end > len(self._map):
+            size = len(self._map)
+            while size < end:
+                size *= 2
+            self._fh.truncate(size)
+            self._map.resize(size)
+        _KEYLEN.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + 4:self._used + 4 + len(encoded)] = encoded
+        _VALUE.pack_into(self._map, value_pos, 0.0)
+        # Publish the entry last so readers never see a half-written key
+        self._used = end
+        _USED.pack_into(self._map, 0, end)
+        self._positions[key] = value_pos
+        return value_pos
+
+    def inc(self, key: str, amount: float) -> None:
+        pos = self._position(key)
+        _VALUE.pack_into(self._map, pos, _VALUE.unpack_from(self._map, pos)[0] + amount)
+
+    def set(self, key: str, value: float) -> None:
+        _VALUE.pack_into(self._map, self._position(key), value)
+
+    def close(self) -> None:
+        self._map.close()
+        self._fh.close()
+
+
+class _DictStore:
+    def __init__(self):
+        self.values = {}
+
+    def inc(self, key: str, amount: float) -> None:
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def set(self, key: str, value: float) -> None:
+        self.values[key] = value
+
+
+_fallback = _DictStore()
+
+
+def _store():
+    """The one store of this process; callers hold _lock."""
+    if _directory is None:
+        return _fallback
+    pid = os.getpid()
+    store = _process.get(pid)
+    if store is None:
+        # Forgets a parent's store after fork
+        _process.clear()
+        os.makedirs(_directory, exist_ok=True)
+        store = _process[pid] = _MmapStore(os.path.join(_directory, f"{pid}.db"))
+    return store
+
+
+def _after_fork():
+    # Another thread may have held the lock when the parent forked
+    global _lock
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def _key(name: str, labels: tuple) -> str:
+    return json.dumps([name, labels], separators=(",", ":"))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+        _registry[name] = self
+
+    def _labels(self, labels: dict) -> tuple:
+        return tuple((n, str(labels[n])) for n in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        values = tuple(labels[n] for n in self.labelnames)
+        key = self._keys.get(values)
+        if key is None:
+            key = self._keys[values] = _key(self.name, self._labels(labels))
+        with _lock:
+            _store().inc(key, amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        values = tuple(labels[n] for n in self.labelnames)
+        key = self._keys.get(values)
+        if key is None:
+            key = self._keys[values] = _key(self.name, self._labels(labels))
+        with _lock:
+            _store().set(key, value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _bucket_keys(self, labels: dict):
+        values = tuple(labels[n] for n in self.labelnames)
+        keys = self._keys.get(values)
+        if keys is None:
+            base = self._labels(labels)
+            keys = self._keys[values] = (
+                [_key(f"{self.name}_bucket", base + (("le", _fmt(b)),)) for b in self.buckets]
+                + [_key(f"{self.name}_bucket", base + (("le", "+Inf"),))],
+                _key(f"{self.name}_sum", base),
+                _key(f"{self.name}_count", base),
+            )
+        return keys
+
+    def observe(self, value: float, **labels) -> None:
+        buckets, sum_key, count_key = self._bucket_keys(labels)
+        # Buckets are stored non-cumulatively; exposition adds them up
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with _lock:
+            store = _store()
+            store.inc(buckets[index], 1.0)
+            store.inc(sum_key, value)
+            store.inc(count_key, 1.0)
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labels", "_started")
+
+    def __init__(self, histogram, labels):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._started, **self._labels)
+
+
+# ---- the app's metrics ----
+HTTP_REQUESTS = Counter(
+    "tt_http_requests_total", "HTTP requests by Flask endpoint.", ("endpoint", "method", "status"))
+HTTP_LATENCY = Histogram(
+    "tt_http_request_duration_seconds", "Request latency by Flask endpoint.", ("endpoint",))
+DB_POOL_CHECKED_OUT = Gauge(
+    "tt_db_pool_checked_out", "Database connections currently checked out of the pool.")
+DB_POOL_SIZE = Gauge(
+    "tt_db_pool_size", "Database connections held by the pool.")
+CACHE_REQUESTS = Counter(
+    "tt_cache_requests_total", "Cache lookups by cache name and result (hit/miss).", ("cache", "result"))
+UPLOAD_BYTES = Counter(
+    "tt_upload_bytes_total", "Bytes of user uploads written to disk.", ("kind",))
+PASSWORD_HASH_SECONDS = Histogram(
+    "tt_password_hash_seconds", "Argon2 hash/verify durations.", ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+
+
+# ---- exposition ----
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _is_gauge(key: str) -> bool:
+    metric = _registry.get(json.loads(key)[0])
+    return metric is not None and metric.kind == "gauge"
+
+
+def _read(path: str) -> dict:
+    """{key: value} of a metrics file."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if len(data) < _HEADER_SIZE:
+        return {}
+    return {k: v for k, (_, v) in _read_entries(data).items()}
+
+
+def _archive(dead: list) -> None:
+    """Add the counters and histograms of exited processes to the archive, then delete their files."""
+    archive = _MmapStore(os.path.join(_directory, ARCHIVE))
+    try:
+        for path in dead:
+            for key, value in _read(path).items():
+                if not _is_gauge(key):
+                    archive.inc(key, value)
+            os.remove(path)
+    finally:
+        archive.close()
+
+
+def _read_directory() -> list:
+    """Samples of live processes and the archive; folds the files of dead ones first."""
+    live, dead = [], []
+    for filename in os.listdir(_directory):
+        stem, ext = os.path.splitext(filename)
+        path = os.path.join(_directory, filename)
+        if ext != ".db" or not stem.isdigit():
+            continue
+        pid = int(stem)
+        if pid == os.getpid() or _pid_alive(pid):
+            live.append(path)
+        else:
+            dead.append(path)
+    if dead:
+        _archive(dead)
+    sources = [_read(path) for path in live]
+    archive = os.path.join(_directory, ARCHIVE)
+    if os.path.exists(archive):
+        sources.append(_read(archive))
+    return sources
+
+
+def collect() -> dict:
+    """Sum every process's samples into {(name, labels): value}."""
+    if _directory is None:
+        sources = [_fallback.values]
+    elif not os.path.isdir(_directory):
+        sources = []  # nothing recorded yet
+    elif fcntl is None:
+        sources = _read_directory()
+    else:
+        # Concurrent scrapes must not fold the same dead file twice, nor read
+        # a file and the archive it is being folded into
+        with open(os.path.join(_directory, "archive.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            sources = _read_directory()
+
+    totals = {}
+    for items in sources:
+        for key, value in items.items():
+            name, labels = json.loads(key)
+            sample = (name, tuple(tuple(pair) for pair in labels))
+            totals[sample] = totals.get(sample, 0.0) + value
+    return totals
+
+
+def render() -> str:
+    """Render every registered metric in the Prometheus text format."""
+    totals = collect()
+    by_name = {}
+    for (name, labels), value in totals.items():
+        by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for metric in _registry.values():
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        if metric.kind != "histogram":
+            for labels, value in sorted(by_name.get(metric.name, ())):
+                lines.append(f"{metric.name}{_label_str(labels)} {_fmt(value)}")
+            continue
+
+        # Rebuild cumulative buckets per label set
+        series = {}
+        for labels, value in by_name.get(f"{metric.name}_bucket", ()):
+            base = tuple(p for p in labels if p[0] != "le")
+            le = dict(labels)["le"]
+            series.setdefault(base, {})[le] = value
+        for base in sorted(series):
+            running = 0.0
+            for bound in [_fmt(b) for b in metric.buckets] + ["+Inf"]:
+                running += series[base].get(bound, 0.0)
+                lines.append(f"{metric.name}_bucket{_label_str(base + (('le', bound),))} {_fmt(running)}")
+            lines.append(f"{metric.name}_sum{_label_str(base)} {_fmt(totals.get((f'{metric.name}_sum', base), 0.0))}")
+            lines.append(f"{metric.name}_count{_label_str(base)} {_fmt(totals.get((f'{metric.name}_count', base), 0.0))}")
+    return "\n".join(lines) + "\n"
+
+
+def _label_str(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+# ---- Flask wiring ----
+def configure(directory: str | None) -> None:
+    """Point this process at a shared metrics directory (None: in-memory only); created on the first sample."""
+    global _directory
+    _directory = directory
+    with _lock:
+        _process.clear()
+
+
+def _start_timer():
+    g._metrics_started = time.perf_counter()
+
+
+def _record_request(response):
+    started = g.pop("_metrics_started", None)
+    if started is None:
+        return response
+    endpoint = request.endpoint or "unmatched"
+    HTTP_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
+    HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+
+    pool = db.engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_SIZE.set(pool.size())
+    return response
+
+
+def metrics_view():
+    return Response(render(), mimetype=None, content_type=CONTENT_TYPE)
+
+
+def init_app(app) -> None:
+    if not app.config["METRICS_ENABLED"]:
+        return
+    directory = app.config["METRICS_DIR"] or os.path.join(app.instance_path, "metrics")
+    configure(directory)
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
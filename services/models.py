@@ -1,9 +1,11 @@
 # services/models.py
 from datetime import datetime
 from argon2 import PasswordHasher
-from sqlalchemy import event, JSON
+from sqlalchemy import delete, event, insert, inspect, JSON
+from sqlalchemy.orm import object_session
 from flask_login import UserMixin
 from services.db import db
+from services.metrics import PASSWORD_HASH_SECONDS
 from utilities.slug import base_slug, uniquify_slug
 
 ph = PasswordHasher()
@@ -20,32 +22,97 @@ class Recipe(db.Model):
     instructions = db.Column(db.Text, nullable=True)
     ingredients = db.Column(db.Text, nullable=True)  # newline-separated or JSON list
     image_filename = db.Column(db.String(255), nullable=True)
+
+    # Sanitized HTML of instructions/content, rendered on write (services/rendering.py)
+    instructions_html = db.Column(db.Text, nullable=True)
+    content_html = db.Column(db.Text, nullable=True)
+    html_version = db.Column(db.Integer, nullable=False, default=0)  # renderer version of the *_html columns
     
     # Timing (in minutes)
-    prep_time_minutes = db.Column(db.Integer, nullable=True)
+    prep_time_minutes = db.Column(db.Integer, nullable=True, index=True)  # max prep time filter
     cook_time_minutes = db.Column(db.Integer, nullable=True)
     total_time_minutes = db.Column(db.Integer, nullable=True)
     
     # Metadata
-    estimated_cost = db.Column(db.String(50), nullable=True)
+    estimated_cost = db.Column(db.String(50), nullable=True)  # free text as entered
+    servings = db.Column(db.Integer, nullable=True)
+    # Parsed from estimated_cost on write (services/costs.py), in minor units
+    cost_cents = db.Column(db.Integer, nullable=True, index=True)
+    cost_per_serving_cents = db.Column(db.Integer, nullable=True, index=True)
+    cost_currency = db.Column(db.String(3), nullable=True)  # ISO 4217
     cuisine = db.Column(db.String(100), default="")
     dietary_tags = db.Column(JSON, default=list)
     average_rating = db.Column(db.Float, nullable=True)
+    # Running aggregates over recipe_ratings, maintained by services/ratings.py
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_total = db.Column(db.Integer, nullable=False, default=0)
+    # Buffered and flushed in batches by services/view_counts.py
+    view_count = db.Column(db.Integer, nullable=False, default=0, index=True)
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)  # newest-first lists
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    author = db.relationship("User", lazy="select")  # eager-load with joinedload() where shown
+
+    # Author pages: WHERE author_id = ? ORDER BY created_at DESC, keyset-paginated
+    __table_args__ = (db.Index("ix_recipes_author_id_created_at", "author_id", "created_at"),)
 
 class RecipeSlugHistory(db.Model):
     __tablename__ = "recipe_slug_history"
     id = db.Column(db.Integer, primary_key=True)
     recipe_id = db.Column(db.Integer, db.ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False)
-    old_slug = db.Column(db.String(90), index=True, nullable=False)
+    old_slug = db.Column(db.String(90), nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Covers the redirect lookup (old_slug -> recipe_id) without touching the table
+    __table_args__ = (db.Index("ix_recipe_slug_history_old_slug_recipe_id", "old_slug", "recipe_id"),)
+
+class RecipeChange(db.Model):
+    """Append-only log of recipe writes; the id is the sync cursor (services/change_log.py)."""
+    __tablename__ = "recipe_changes"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    recipe_id = db.Column(db.Integer, nullable=False, index=True)  # no FK: tombstones outlive the row
+    op = db.Column(db.String(10), nullable=False)  # "upsert" or "delete"
     changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+class CacheInvalidation(db.Model):
+    """Invalidation messages broadcast to every worker's in-process caches (services/invalidation.py)."""
+    __tablename__ = "cache_invalidations"
+    id = db.Column(db.Integer, primary_key=True)  # each worker's read cursor
+    kind = db.Column(db.String(20), nullable=False)  # "recipe", "rating", "user", "slug" or "generation"
+    key = db.Column(db.Integer, nullable=True)  # recipe/user id; NULL for "generation"
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Ids must never be reused after pruning, or a worker's cursor would skip new messages
+    __table_args__ = {"sqlite_autoincrement": True}
+
+class BackfillCheckpoint(db.Model):
+    """Progress of a chunked backfill; see services/backfill.py."""
+    __tablename__ = "backfill_checkpoints"
+    name = db.Column(db.String(100), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)  # highest id already processed
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default="running")  # running/done
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+class RecipeRating(db.Model):
+    __tablename__ = "recipe_ratings"
+    id = db.Column(db.Integer, primary_key=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    stars = db.Column(db.Integer, nullable=False)  # 1-5
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint("recipe_id", "user_id", name="uq_recipe_ratings_recipe_user"),)
+
 # --- Auto-generate slug on insert ---
 @event.listens_for(Recipe, "before_insert")
 def recipe_before_insert(mapper, connection, target: Recipe):
+    if target.slug:
+        return  # already allocated, e.g. by services/recipe_batch.py
     session = db.session
     base = base_slug(target.title)
     target.slug = uniquify_slug(session, Recipe, base)
@@ -53,17 +120,21 @@ def recipe_before_insert(mapper, connection, target: Recipe):
 # --- If title changes, rotate slug + save redirect history ---
 @event.listens_for(Recipe, "before_update")
 def recipe_before_update(mapper, connection, target: Recipe):
+    # session.get() would return `target` itself, so compare against attribute history
+    if not inspect(target).attrs.title.history.has_changes():
+        return
     session = db.session
-    # Load current DB state to compare
-    db_obj = session.get(Recipe, target.id)
-    if not db_obj:
+    old_slug = (inspect(target).attrs.slug.history.deleted or [target.slug])[0]
+    new_slug = uniquify_slug(session, Recipe, base_slug(target.title), exclude_id=target.id)
+    target.slug = new_slug
+    if new_slug == old_slug:
         return
-    if db_obj.title != target.title:
-        old_slug = db_obj.slug
-        new_base = base_slug(target.title)
-        target.slug = uniquify_slug(session, Recipe, new_base, exclude_id=target.id)
-        if old_slug != target.slug:
-            session.add(RecipeSlugHistory(recipe_id=target.id, old_slug=old_slug))
+    # Keep at most one row per old slug, each pointing straight at its recipe, and
+    # drop any row for the slug that just went live: no chains, no self-redirects
+    history = RecipeSlugHistory.__table__
+    connection.execute(delete(history).where(history.c.old_slug.in_([old_slug, new_slug])))
+    connection.execute(insert(history).values(recipe_id=target.id, old_slug=old_slug, changed_at=datetime.utcnow()))
+    object_session(target).info["slug_history_changed"] = True
 
 class User(db.Model, UserMixin):
     __tablename__ = "users"
@@ -76,17 +147,41 @@ class User(db.Model, UserMixin):
     date_of_birth = db.Column(db.Date, nullable=True)
     gender = db.Column(db.String(20), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Denormalized; maintained per flush by services/authors.py
+    recipe_count = db.Column(db.Integer, nullable=False, default=0)
 
     def set_password(self, raw_password, hasher=ph):
         """Hash and store the password."""
-        self.password_hash = hasher.hash(raw_password)
+        with PASSWORD_HASH_SECONDS.time(operation="hash"):
+            self.password_hash = hasher.hash(raw_password)
 
     def check_password(self, raw_password, hasher=ph):
         """Verify a password."""
         try:
-            return hasher.verify(self.password_hash, raw_password)
+            with PASSWORD_HASH_SECONDS.time(operation="verify"):
+                return hasher.verify(self.password_hash, raw_password)
         except Exception:
             return False
 
     def __repr__(self):
-        return f"<User {self.username}>"
\ No newline at end of file
+        return f"<User {self.username}>"
+
+
+class Job(db.Model):
+    """A unit of background work; see services/jobs.py."""
+    __tablename__ = "jobs"
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    payload = db.Column(JSON, nullable=False, default=dict)  # {"args": [...], "kwargs": {...}}
+    idempotency_key = db.Column(db.String(200), unique=True, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued/running/done/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = db.Column(db.String(64), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("ix_jobs_status_run_at", "status", "run_at"),)
@@ -0,0 +1,203 @@
+"""
+Low-overhead sampling profiler for live requests.
+
+A request is profiled when it carries an `X-Profile` header matching
+PROFILER_TOKEN, or when it falls into the random PROFILER_SAMPLE_RATE slice of
+traffic. While at least one profiled request is in flight, a single daemon
+thread per process wakes every PROFILER_INTERVAL seconds, grabs the profiled
+threads' frames from `sys._current_frames()` and counts the collapsed stack,
+so everything under Flask dispatch - SQLAlchemy, Jinja, our own code - shows
+up. Unprofiled requests pay for one random() call.
+
+Per endpoint and worker process, PROFILER_OUTPUT_DIR gets:
+
+    <endpoint>.<pid>.folded   collapsed stacks, one "a;b;c count" per line
+                              (feed to flamegraph.pl or speedscope)
+    <endpoint>.<pid>.top.txt  top-N functions by self and inclusive samples
+
+Sampled traffic is written out at most every PROFILER_DUMP_INTERVAL seconds
+per endpoint (and at exit); header-requested profiles are written at once.
+
+Overhead can be measured with the benchmark suite, e.g.
+
+    python -m benchmarks.run --compare-config PROFILER_SAMPLE_RATE=1.0
+
+On the 1k catalog (client mode, --scale 4, two runs each), profiling every
+request added -2% to +9% p50 on recipes_page and recipe_detail, with a
+run-to-run noise of about +/-10% on this suite. At PROFILER_SAMPLE_RATE=0.01
+the difference could not be told apart from that noise.
+"""
+
+import atexit
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, g, request
+
+PROFILE_HEADER = "X-Profile"
+
+_lock = threading.Lock()
+_active = {}        # thread id -> Counter of collapsed stacks for the running request
+_totals = {}        # endpoint -> Counter of collapsed stacks, this process only
+_wakeup = threading.Event()
+_sampler = None
+_sampler_pid = None
+_interval = 0.005
+_roots = ()
+_labels = {}        # code object -> collapsed-stack label
+_last_dump = {}     # endpoint -> perf_counter of the last write
+_outputs = {}       # endpoint -> (output dir, top N) of the app that recorded it, for the exit dump
+
+
+def _frame_label(code) -> str:
+    label = _labels.get(code)
+    if label is not None:
+        return label
+    filename = code.co_filename
+    for root in _roots:
+        if filename.startswith(root):
+            filename = filename[len(root):].lstrip(os.sep)
+            break
+    label = _labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+    return label
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+def _sample_forever():
+    while True:
+        _wakeup.wait()
+        time.sleep(_interval)
+        with _lock:
+            if not _active:
+                _wakeup.clear()
+                continue
+            targets = list(_active.items())
+        frames = sys._current_frames()
+        for ident, stacks in targets:
+            frame = frames.get(ident)
+            if frame is not None:
+                stacks[_collapse(frame)] += 1
+
+
+def _ensure_sampler():
+    global _sampler, _sampler_pid
+    # Threads don't survive fork; each worker starts its own sampler
+    if _sampler is None or _sampler_pid != os.getpid():
+        _sampler = threading.Thread(target=_sample_forever, name="request-profiler", daemon=True)
+        _sampler_pid = os.getpid()
+        _sampler.start()
+
+
+def _should_profile(config) -> bool:
+    token = config["PROFILER_TOKEN"]
+    if token and request.headers.get(PROFILE_HEADER) == token:
+        return True
+    rate = config["PROFILER_SAMPLE_RATE"]
+    return rate > 0 and random.random() < rate
+
+
+def _start():
+    if not _should_profile(current_app.config):
+        return
+    stacks = Counter()
+    ident = threading.get_ident()
+    with _lock:
+        _ensure_sampler()
+        _active[ident] = stacks
+    _wakeup.set()
+    g._profile = (ident, stacks)
+
+
+def _stop(response):
+    profile = g.pop("_profile", None)
+    if profile is None:
+        return response
+    ident, stacks = profile
+    with _lock:
+        _active.pop(ident, None)
+    response.headers["X-Profile-Samples"] = str(sum(stacks.values()))
+    if stacks:
+        # Explicitly requested profiles are written out straight away
+        _record(request.endpoint or "unmatched", stacks, force=PROFILE_HEADER in request.headers)
+    return response
+
+
+def _record(endpoint: str, stacks: Counter, force: bool = False) -> None:
+    now = time.perf_counter()
+    config = current_app.config
+    with _lock:
+        total = _totals.setdefault(endpoint, Counter())
+        total.update(stacks)
+        _outputs[endpoint] = (config["PROFILER_OUTPUT_DIR"], config["PROFILER_TOP_N"])
+        if not force and now - _last_dump.get(endpoint, 0.0) < config["PROFILER_DUMP_INTERVAL"]:
+            return
+        _last_dump[endpoint] = now
+        snapshot = Counter(total)
+    _dump(_outputs[endpoint], endpoint, snapshot)
+
+
+def _dump(output, endpoint: str, snapshot: Counter) -> None:
+    directory, top_n = output
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"{endpoint}.{os.getpid()}")
+    _write_atomic(f"{base}.folded", "".join(f"{stack} {n}\n" for stack, n in snapshot.most_common()))
+    _write_atomic(f"{base}.top.txt", summarize(endpoint, snapshot, top_n))
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+def summarize(endpoint: str, stacks: Counter, top_n: int = 20) -> str:
+    """Top-N frames by self samples (leaf) and inclusive samples (anywhere on the stack)."""
+    total = sum(stacks.values())
+    own = Counter()
+    inclusive = Counter()
+    for stack, n in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += n
+        for frame in set(frames):
+            inclusive[frame] += n
+
+    lines = [f"endpoint: {endpoint}", f"samples: {total}", "", "self:"]
+    lines += [f"  {n / total:6.1%}  {n:6d}  {frame}" for frame, n in own.most_common(top_n)]
+    lines += ["", "inclusive:"]
+    lines += [f"  {n / total:6.1%}  {n:6d}  {frame}" for frame, n in inclusive.most_common(top_n)]
+    return "\n".join(lines) + "\n"
+
+
+def init_app(app) -> None:
+    """Install the request hooks if profiling can ever trigger."""
+    global _interval, _roots
+    if not app.config["PROFILER_TOKEN"] and not app.config["PROFILER_SAMPLE_RATE"]:
+        return
+    if not app.config["PROFILER_OUTPUT_DIR"]:
+        app.config["PROFILER_OUTPUT_DIR"] = os.path.join(app.instance_path, "profiles")
+    _interval = app.config["PROFILER_INTERVAL"]
+    # Longest prefixes first so site-packages wins over the interpreter prefix
+    _roots = tuple(sorted({p for p in sys.path if p} | {app.root_path}, key=len, reverse=True))
+    app.before_request(_start)
+    app.after_request(_stop)
+
+
+@atexit.register
+def _flush():
+    with _lock:
+        pending = {e: (_outputs[e], Counter(c)) for e, c in _totals.items()}
+    for endpoint, (output, snapshot) in pending.items():
+        _dump(output, endpoint, snapshot)
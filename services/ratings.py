@@ -0,0 +1,118 @@
+"""
+Recipe ratings with incrementally maintained aggregates.
+
+Each user has at most one row per recipe in `recipe_ratings`. Casting or
+changing a vote adjusts `Recipe.rating_total` / `Recipe.rating_count` by the
+difference and recomputes `average_rating` from them in the same transaction,
+so listing pages read a plain column instead of aggregating per card.
+`flask ratings-reconcile` rebuilds the aggregates from the ratings table with
+one grouped query, for repair after manual edits or imports.
+"""
+
+from datetime import datetime
+
+import click
+from sqlalchemy import Float, case, cast, exists, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from services import change_log, invalidation
+from services.db import db
+from services.models import Recipe, RecipeRating
+
+MIN_STARS = 1
+MAX_STARS = 5
+
+
+def rate(recipe_id: int, user_id: int, stars: int):
+    """
+    Record `user_id`'s vote on `recipe_id` and return (rating_count,
+    average_rating), or None if the recipe does not exist. The caller commits.
+    """
+    previous = (
+        select(RecipeRating.stars)
+        .where(RecipeRating.recipe_id == recipe_id, RecipeRating.user_id == user_id)
+        .scalar_subquery()
+    )
+    # SET expressions see the pre-update row, so spell out the new values
+    new_total = Recipe.rating_total + stars - func.coalesce(previous, 0)
+    new_count = Recipe.rating_count + case((previous.is_(None), 1), else_=0)
+    # Aggregates are updated before the vote row: the first write takes SQLite's
+    # write lock, so `previous` cannot change under us before the upsert.
+    # updated_at is passed through so its onupdate does not fire: a vote is not an
+    # edit, and must not move the recipe's sitemap lastmod or feed position
+    row = db.session.execute(
+        update(Recipe)
+        .where(Recipe.id == recipe_id)
+        .values(
+            rating_total=new_total,
+            rating_count=new_count,
+            average_rating=cast(new_total, Float) / new_count,
+            updated_at=Recipe.updated_at,
+        )
+        .returning(Recipe.rating_count, Recipe.average_rating)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return None
+
+    now = datetime.utcnow()
+    stmt = insert(RecipeRating).values(
+        recipe_id=recipe_id, user_id=user_id, stars=stars, created_at=now, updated_at=now
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=["recipe_id", "user_id"],
+        set_={"stars": stmt.excluded.stars, "updated_at": now},
+    ))
+    change_log.record(db.session.connection(), [recipe_id])
+    # Cards show the rating; filter results do not depend on it (see invalidation.RATING)
+    invalidation.publish(db.session.connection(), invalidation.RATING, [recipe_id])
+    # RETURNING hands back whole-number averages as ints
+    return row.rating_count, float(row.average_rating)
+
+
+def reconcile() -> int:
+    """Recompute every recipe's aggregates from recipe_ratings; return rows changed. The caller commits."""
+    agg = (
+        select(
+            RecipeRating.recipe_id,
+            func.count().label("n"),
+            func.sum(RecipeRating.stars).label("total"),
+        )
+        .group_by(RecipeRating.recipe_id)
+        .subquery()
+    )
+    fixed = db.session.execute(
+        update(Recipe)
+        .where(Recipe.id == agg.c.recipe_id)
+        .where((Recipe.rating_count != agg.c.n) | (Recipe.rating_total != agg.c.total))
+        .values(
+            rating_count=agg.c.n,
+            rating_total=agg.c.total,
+            average_rating=cast(agg.c.total, Float) / agg.c.n,
+            updated_at=Recipe.updated_at,
+        )
+        .returning(Recipe.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    # Recipes whose ratings were all removed outside the API
+    fixed += db.session.execute(
+        update(Recipe)
+        .where(Recipe.rating_count != 0)
+        .where(~exists().where(RecipeRating.recipe_id == Recipe.id))
+        .values(rating_count=0, rating_total=0, average_rating=None, updated_at=Recipe.updated_at)
+        .returning(Recipe.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    if fixed:
+        change_log.record(db.session.connection(), fixed)
+        invalidation.publish(db.session.connection(), invalidation.GENERATION)
+    return len(fixed)
+
+
+def init_app(app) -> None:
+    @app.cli.command("ratings-reconcile")
+    def ratings_reconcile():
+        """Rebuild recipe rating aggregates from the ratings table."""
+        fixed = reconcile()
+        db.session.commit()
+        click.echo(f"reconciled rating aggregates for {fixed} recipes")
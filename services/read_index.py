@@ -0,0 +1,350 @@
+"""
+Read-only recipe index shared by all worker processes through one mmap'd file.
+
+`flask read-index build` (or the background rebuild job) scans the catalog
+once and writes a versioned binary snapshot holding, per recipe in id order,
+its id, prep time, cuisine code and dietary tag bitmask, plus a sorted slug
+table and a sorted title table for prefix autocomplete. Workers `mmap` the
+file and read it through typed `memoryview` casts: nothing is copied or
+parsed per row, so the pages are shared by every process through the OS page
+cache and a worker starts without touching the database.
+
+Tag, prep-time and cuisine filters (utilities/recipe_filters.py) read it
+through `fresh()`, which only hands out a snapshot built at the current
+catalog generation. Title autocomplete and bare-slug recipe URLs use
+`current()` and tolerate a snapshot a rebuild behind: a slug hit is checked
+against the recipe row, and a miss or a mismatch falls back to SQL.
+
+The snapshot records the catalog generation it was built at, the highest
+`recipe_changes` id. Every write that appends to that log, through the ORM
+or Core (votes, reconciles, backfills), enqueues a rebuild in the same
+transaction; rebuilds are coalesced to at most one per
+READ_INDEX_REBUILD_DELAY seconds and skipped when the file is already
+current. A new file is written next to the old one
+and moved into place with os.replace(); readers notice the new inode on
+their next access and remap, while views of the old file stay valid until
+they are dropped.
+
+Layout: MAGIC, a u32 header length, a JSON header (format version, byte
+order, generation, vocabularies and section offsets), then 8-byte aligned
+sections of native-endian integer arrays and UTF-8 string blobs.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import uuid
+from array import array
+from datetime import datetime
+
+import click
+from flask import current_app, has_app_context
+from sqlalchemy import func, select
+
+from services.db import db
+from services.jobs import task
+from services.models import Recipe, RecipeChange
+
+MAGIC = b"TTRIDX\x00\x00"
+FORMAT_VERSION = 1
+NO_PREP_TIME = -1
+MAX_TAGS = 64  # one bit each in a u64 mask
+
+_HEADER_LEN = struct.Struct("<I")
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class Strings:
+    """Sorted UTF-8 strings in one blob with an offsets array; indexable and bisectable."""
+
+    def __init__(self, blob: memoryview, offsets: memoryview):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]).decode()
+
+
+class ReadIndex:
+    """A mapped snapshot file. All lookups read straight from the mapping."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self.stat = os.fstat(fh.fileno())
+        view = memoryview(self._mmap)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path}: not a read index snapshot")
+        (header_len,) = _HEADER_LEN.unpack_from(view, len(MAGIC))
+        start = len(MAGIC) + _HEADER_LEN.size
+        header = json.loads(bytes(view[start:start + header_len]))
+        if header["format"] != FORMAT_VERSION or header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path}: unsupported snapshot format")
+
+        self.generation = header["generation"]
+        self.built_at = header["built_at"]
+        self.tags = header["tags"]
+        self.cuisines = header["cuisines"]
+        self._tag_bits = {tag: 1 << i for i, tag in enumerate(self.tags)}
+        sections = {
+            name: view[offset:offset + length].cast(fmt)
+            for name, (offset, length, fmt) in header["sections"].items()
+        }
+        self.ids = sections["ids"]
+        self.prep_times = sections["prep_times"]
+        self.cuisine_codes = sections["cuisine_codes"]
+        self.tag_masks = sections["tag_masks"]
+        self.slugs = Strings(sections["slug_blob"], sections["slug_offsets"])
+        self.slug_ids = sections["slug_ids"]
+        self.titles = Strings(sections["title_blob"], sections["title_offsets"])
+        self.title_ids = sections["title_ids"]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def id_for_slug(self, slug: str) -> int | None:
+        i = bisect.bisect_left(self.slugs, slug)
+        if i < len(self.slugs) and self.slugs[i] == slug:
+            return self.slug_ids[i]
+        return None
+
+    def ids_with_tags(self, tags) -> list:
+        """Ids of recipes carrying every tag in `tags` (none if a tag is unknown)."""
+        want = 0
+        for tag in tags:
+            bit = self._tag_bits.get(tag)
+            if bit is None:
+                return []
+            want |= bit
+        ids, masks = self.ids, self.tag_masks
+        return [ids[i] for i in range(len(ids)) if masks[i] & want == want]
+
+    def ids_with_max_prep(self, minutes: int) -> list:
+        ids, prep = self.ids, self.prep_times
+        return [ids[i] for i in range(len(ids)) if 0 <= prep[i] <= minutes]
+
+    def ids_for_cuisine(self, cuisine: str) -> list:
+        """Ids of recipes whose cuisine contains `cuisine`, case-insensitively (like the SQL filter)."""
+        needle = cuisine.casefold()
+        codes = {code for code, name in enumerate(self.cuisines) if needle in name.casefold()}
+        if not codes:
+            return []
+        ids, cuisine_codes = self.ids, self.cuisine_codes
+        return [ids[i] for i in range(len(ids)) if cuisine_codes[i] in codes]
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> list:
+        """Ids of recipes whose title starts with `prefix` (case-insensitive), title order."""
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        out = []
+        i = bisect.bisect_left(self.titles, prefix)
+        while i < len(self.titles) and len(out) < limit and self.titles[i].startswith(prefix):
+            out.append(self.title_ids[i])
+            i += 1
+        return out
+
+
+# --- building ---
+def current_generation(connection) -> int:
+    return connection.execute(select(func.coalesce(func.max(RecipeChange.id), 0))).scalar_one()
+
+
+def _strings_sections(pairs):
+    """(blob, offsets, ids) for (key, id) pairs sorted by key."""
+    blob = bytearray()
+    offsets = array("I", [0])
+    ids = array("I")
+    for key, rid in pairs:
+        blob += key.encode()
+        offsets.append(len(blob))
+        ids.append(rid)
+    return bytes(blob), offsets, ids
+
+
+def build(engine, path: str) -> dict:
+    """Write a fresh snapshot of the catalog to `path` atomically; returns its header."""
+    ids, prep_times = array("I"), array("i")
+    cuisine_codes, tag_masks = array("H"), array("Q")
+    cuisines, tags = {}, {}
+    slugs, titles = [], []
+    with engine.connect() as conn:
+        # Read first: a change committed during the scan makes this snapshot already stale
+        generation = current_generation(conn)
+        stmt = select(
+            Recipe.id, Recipe.slug, Recipe.title, Recipe.prep_time_minutes, Recipe.cuisine, Recipe.dietary_tags,
+        ).order_by(Recipe.id)
+        for rid, slug, title, prep, cuisine, dietary_tags in conn.execution_options(yield_per=2000).execute(stmt):
+            ids.append(rid)
+            prep_times.append(NO_PREP_TIME if prep is None else prep)
+            cuisine_codes.append(cuisines.setdefault(cuisine or "", len(cuisines)))
+            mask = 0
+            for tag in dietary_tags or ():
+                bit = tags.setdefault(tag, len(tags))
+                if bit >= MAX_TAGS:
+                    raise ValueError(f"more than {MAX_TAGS} distinct dietary tags")
+                mask |= 1 << bit
+            tag_masks.append(mask)
+            slugs.append((slug, rid))
+            titles.append(((title or "").casefold(), rid))
+
+    slugs.sort()
+    titles.sort()
+    slug_blob, slug_offsets, slug_ids = _strings_sections(slugs)
+    title_blob, title_offsets, title_ids = _strings_sections(titles)
+    payload = {
+        "ids": (ids, "I"), "prep_times": (prep_times, "i"),
+        "cuisine_codes": (cuisine_codes, "H"), "tag_masks": (tag_masks, "Q"),
+        "slug_blob": (slug_blob, "B"), "slug_offsets": (slug_offsets, "I"), "slug_ids": (slug_ids, "I"),
+        "title_blob": (title_blob, "B"), "title_offsets": (title_offsets, "I"), "title_ids": (title_ids, "I"),
+    }
+    header = {
+        "format": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "generation": generation,
+        "built_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "count": len(ids),
+        "tags": sorted(tags, key=tags.get),
+        "cuisines": sorted(cuisines, key=cuisines.get),
+    }
+
+    # Section offsets depend on the header's length and vice versa: grow the header area until it fits
+    data_start = 0
+    while True:
+        offset, sections = data_start, {}
+        for name, (data, fmt) in payload.items():
+            length = len(data) if isinstance(data, bytes) else len(data) * data.itemsize
+            sections[name] = [offset, length, fmt]
+            offset = _align(offset + length)
+        header["sections"] = sections
+        header_bytes = json.dumps(header).encode()
+        needed = _align(len(MAGIC) + _HEADER_LEN.size + len(header_bytes))
+        if needed <= data_start:
+            break
+        data_start = needed
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "wb") as fh:
+            fh.write(MAGIC + _HEADER_LEN.pack(len(header_bytes)) + header_bytes)
+            for name, (data, _) in payload.items():
+                fh.seek(sections[name][0])
+                fh.write(data if isinstance(data, bytes) else data.tobytes())
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return header
+
+
+# --- reading ---
+_lock = threading.Lock()
+_index = None
+_checked_at = 0.0
+
+
+def current(path: str | None = None, check_interval: float = 1.0) -> ReadIndex | None:
+    """The mapped snapshot, remapped if the file was replaced; None if there is none yet."""
+    global _index, _checked_at
+    path = path or current_app.config["READ_INDEX_PATH"]
+    now = time.monotonic()
+    index = _index
+    if index is not None and index.path == path and now - _checked_at < check_interval:
+        return index
+    with _lock:
+        _checked_at = now
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            _index = None
+            return None
+        if (_index is None or _index.path != path
+                or (_index.stat.st_ino, _index.stat.st_mtime_ns) != (st.st_ino, st.st_mtime_ns)):
+            _index = ReadIndex(path)
+        return _index
+
+
+def fresh() -> ReadIndex | None:
+    """
+    The snapshot if it was built at the catalog's current generation, else
+    None: callers then answer from SQL, so a pending rebuild never serves
+    stale results. Costs one primary-key lookup of the change log.
+    """
+    index = current()
+    if index is None:
+        return None
+    return index if index.generation == current_generation(db.session) else None
+
+
+@task(max_attempts=3)
+def rebuild_read_index() -> None:
+    """Rebuild the snapshot unless it already matches the catalog generation."""
+    path = current_app.config["READ_INDEX_PATH"]
+    with db.engine.connect() as conn:
+        generation = current_generation(conn)
+    index = current(path, check_interval=0)
+    if index is not None and index.generation == generation:
+        return
+    build(db.engine, path)
+
+
+def queue_rebuild(connection) -> None:
+    """
+    Enqueue a rebuild on `connection`, in the transaction that moves the
+    generation forward. services/change_log.py calls this for every batch of
+    change log rows, ORM or Core, so no write can leave the snapshot stale
+    without a rebuild on the way.
+    """
+    # Opt-in: nothing is enqueued until a first snapshot has been built
+    if not has_app_context() or not os.path.exists(current_app.config["READ_INDEX_PATH"]):
+        return
+    delay = current_app.config["READ_INDEX_REBUILD_DELAY"]
+    # One job per window: every commit inside it shares the key and the job runs after the window
+    window = int(time.time() // delay) if delay else time.time_ns()
+    run_at = datetime.utcfromtimestamp((window + 1) * delay) if delay else None
+    rebuild_read_index.delay(idempotency_key=f"read_index:{window}", run_at=run_at, bind=connection)
+
+
+def init_app(app) -> None:
+    if not app.config["READ_INDEX_PATH"]:
+        app.config["READ_INDEX_PATH"] = os.path.join(app.instance_path, "read_index.bin")
+
+    @app.cli.group("read-index")
+    def read_index_cli():
+        """Shared mmap'd recipe index snapshot."""
+
+    @read_index_cli.command("build")
+    def build_cmd():
+        """Build the snapshot now."""
+        started = time.perf_counter()
+        header = build(db.engine, app.config["READ_INDEX_PATH"])
+        size = os.path.getsize(app.config["READ_INDEX_PATH"])
+        click.echo(f"built {header['count']} recipes at generation {header['generation']} "
+                   f"({size} bytes, {time.perf_counter() - started:.2f}s)")
+
+    @read_index_cli.command("info")
+    def info_cmd():
+        """Show the current snapshot and whether it is stale."""
+        index = current(app.config["READ_INDEX_PATH"], check_interval=0)
+        if index is None:
+            click.echo("no snapshot; run `flask read-index build`")
+            return
+        with db.engine.connect() as conn:
+            generation = current_generation(conn)
+        state = "current" if index.generation == generation else f"stale (catalog at {generation})"
+        click.echo(f"{len(index)} recipes, generation {index.generation} {state}, built {index.built_at}")
@@ -0,0 +1,100 @@
+"""
+Read side of the recipe JSON API: sparse fieldsets, batch fetch and ETags.
+
+`fields=title,slug,...` is pushed down into the SELECT, so a card grid that
+only needs four columns never loads instructions or ingredients, and the
+resulting Rows go straight to the JSON provider. `id` is always included so
+clients can key what they get back.
+"""
+
+from sqlalchemy import select
+
+from services.db import db
+from services.models import Recipe, User
+
+# Public name -> column; the API exposes nothing outside this map
+FIELDS = {
+    name: getattr(Recipe, name)
+    for name in (
+        "id", "slug", "title", "description", "content", "instructions", "ingredients", "image_filename",
+        "instructions_html", "content_html",
+        "prep_time_minutes", "cook_time_minutes", "total_time_minutes", "estimated_cost", "servings",
+        "cost_cents", "cost_per_serving_cents", "cost_currency", "cuisine",
+        "dietary_tags", "average_rating", "rating_count", "view_count", "author_id", "created_at", "updated_at",
+    )
+}
+FIELDS["author_name"] = User.username.label("author_name")
+LIST_FIELDS = ("id", "title", "slug", "view_count")
+
+
+def parse_fields(raw: str | None, default=tuple(FIELDS)) -> list:
+    """Columns for a `fields=` value; raises ValueError naming unknown fields."""
+    names = [n.strip() for n in raw.split(",") if n.strip()] if raw else list(default)
+    unknown = sorted(set(names) - FIELDS.keys())
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")
+    return [FIELDS[n] for n in dict.fromkeys(names)]
+
+
+def parse_ids(raw: str, limit: int) -> list:
+    """Distinct ids from `ids=1,2,3` in request order; raises ValueError if malformed."""
+    try:
+        ids = list(dict.fromkeys(int(part) for part in raw.split(",") if part.strip()))
+    except ValueError:
+        raise ValueError("ids must be a comma-separated list of integers") from None
+    if not ids:
+        raise ValueError("ids must not be empty")
+    if len(ids) > limit:
+        raise ValueError(f"at most {limit} ids per request")
+    return ids
+
+
+def select_fields(columns):
+    """SELECT of recipe `columns`, joining the author only if one of its fields was asked for."""
+    stmt = select(*columns).select_from(Recipe)
+    if any(c is FIELDS["author_name"] for c in columns):
+        stmt = stmt.outerjoin(User, User.id == Recipe.author_id)
+    return stmt
+
+
+def lookup(id_or_slug: str):
+    """WHERE clause for a numeric id or a current slug."""
+    return Recipe.id == int(id_or_slug) if id_or_slug.isdecimal() else Recipe.slug == id_or_slug
+
+
+def in_request_order(rows, ids: list) -> list:
+    by_id = {row.id: row for row in rows}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def list_order(sort: str):
+    """ORDER BY for a list `sort=` value; raises ValueError for unknown ones."""
+    if sort == "popular":
+        return (Recipe.view_count.desc(), Recipe.id.desc())
+    if sort == "newest":
+        return (Recipe.created_at.desc(),)
+    if sort == "cost":
+        # Cheapest first; recipes without a parseable cost go last
+        return (Recipe.cost_cents.asc().nulls_last(), Recipe.id)
+    raise ValueError("sort must be 'newest', 'popular' or 'cost'")
+
+
+def fetch_one(id_or_slug: str, columns):
+    """The recipe with this numeric id or current slug, or None."""
+    return db.session.execute(select_fields(columns).where(lookup(id_or_slug))).first()
+
+
+def fetch_many(ids: list, columns) -> list:
+    """Recipes for `ids` in one IN query, in the order requested; missing ids are skipped."""
+    rows = db.session.execute(select_fields(columns).where(Recipe.id.in_(ids))).all()
+    return in_request_order(rows, ids)
+
+
+def conditional(response, request):
+    """Tag a JSON response with an ETag and answer If-None-Match with 304."""
+    response.add_etag()
+    # Cacheable, but revalidated on every use so edits show up immediately
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
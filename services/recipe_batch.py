@@ -0,0 +1,129 @@
+"""
+Bulk recipe creation for POST /api/recipes/batch.
+
+Items arrive as a JSON array or as NDJSON (one object per line), declared in
+the Content-Type: the route is CSRF-exempt for API clients, so it must not
+accept the text/plain or form bodies a cross-site <form> can post. Each is
+validated with the same RecipeForm rules as the create page. Slugs for the
+whole batch are allocated from one round of index range scans instead of
+probing row by row, and every valid item is inserted in a single
+transaction. Invalid items are reported by position and skipped.
+"""
+
+import json
+
+from sqlalchemy import and_, or_, select
+from werkzeug.datastructures import MultiDict
+
+from services.db import db
+from services.forms import RecipeForm
+from services.models import Recipe
+from utilities.slug import base_slug
+
+NDJSON_MIMETYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+FORM_FIELDS = ("title", "instructions", "ingredients", "prep_time_minutes", "cook_time_minutes", "estimated_cost",
+               "servings")
+
+# Bases per slug query; each adds two bound parameters
+_SLUG_QUERY_CHUNK = 200
+
+
+def accepts(request) -> bool:
+    """True if the request declares a JSON or NDJSON body."""
+    return request.is_json or request.mimetype in NDJSON_MIMETYPES
+
+
+def parse_items(request) -> list:
+    """Decode the request body into a list of items; raises ValueError if malformed."""
+    body = request.get_data(as_text=True)
+    if request.mimetype in NDJSON_MIMETYPES:
+        items = []
+        for lineno, line in enumerate(body.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"line {lineno}: {e}") from None
+        return items
+
+    try:
+        items = json.loads(body)
+    except ValueError as e:
+        raise ValueError(str(e)) from None
+    if not isinstance(items, list):
+        raise ValueError("expected a JSON array of recipes")
+    return items
+
+
+def _validate(item):
+    """Return (form, None) for a valid item, else (None, {field: [messages]})."""
+    if not isinstance(item, dict):
+        return None, {"item": ["Must be a JSON object."]}
+    data = dict(item)
+    if isinstance(data.get("ingredients"), list):
+        data["ingredients"] = "\n".join(str(line) for line in data["ingredients"])
+    formdata = MultiDict({k: str(data[k]) for k in FORM_FIELDS if data.get(k) is not None})
+    form = RecipeForm(formdata=formdata, meta={"csrf": False})
+    if form.validate():
+        return form, None
+    return None, {name: errs for name, errs in form.errors.items()}
+
+
+def _taken_slugs(bases: set) -> set:
+    """Existing slugs equal to a base or of the form `<base>-<n>`."""
+    taken = set()
+    bases = sorted(bases)
+    for i in range(0, len(bases), _SLUG_QUERY_CHUNK):
+        chunk = bases[i:i + _SLUG_QUERY_CHUNK]
+        # "<base>-" <= slug < "<base>." is a range scan on the unique slug index
+        cond = or_(Recipe.slug.in_(chunk), *(and_(Recipe.slug >= f"{b}-", Recipe.slug < f"{b}.") for b in chunk))
+        taken.update(db.session.execute(select(Recipe.slug).where(cond)).scalars())
+    return taken
+
+
+def allocate_slugs(titles: list) -> list:
+    """Unique slugs for `titles`, following uniquify_slug's base, base-2, ... scheme."""
+    bases = [base_slug(t) for t in titles]
+    taken = _taken_slugs(set(bases))
+    slugs = []
+    for base in bases:
+        slug, i = base, 2
+        while slug in taken:
+            slug = f"{base}-{i}"
+            i += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def create_batch(items: list, author_id: int | None):
+    """
+    Validate and insert `items`; the caller commits. Returns (created, errors):
+    the new Recipe objects paired with their item index, and per-index errors.
+    """
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        form, item_errors = _validate(item)
+        if form is None:
+            errors.append({"index": index, "errors": item_errors})
+        else:
+            valid.append((index, form))
+
+    slugs = allocate_slugs([form.title.data for _, form in valid])
+    created = []
+    for (index, form), slug in zip(valid, slugs):
+        ingredients = "\n".join(line.strip() for line in form.ingredients.data.split("\n") if line.strip())
+        created.append((index, Recipe(
+            title=form.title.data,
+            slug=slug,
+            instructions=form.instructions.data,
+            ingredients=ingredients,
+            prep_time_minutes=form.prep_time_minutes.data,
+            cook_time_minutes=form.cook_time_minutes.data,
+            estimated_cost=form.estimated_cost.data,
+            servings=form.servings.data,
+            author_id=author_id,
+        )))
+    db.session.add_all(recipe for _, recipe in created)
+    return created, errors
@@ -0,0 +1,162 @@
+"""
+Render-once HTML for `Recipe.instructions` and `Recipe.content`.
+
+Both fields hold a small Markdown subset (headings, bullet and numbered lists,
+paragraphs, **bold**, *italic*, `code` and [links](https://...)). It is
+converted when the source text is written and stored in `instructions_html` /
+`content_html`, so a page view only outputs a column. Rendering never passes
+user markup through: the text is HTML-escaped first and the renderer adds
+only its own fixed tags, and links are limited to http(s), mailto and
+relative URLs.
+
+Rows carry the `html_version` they were rendered with. After changing the
+renderer, bump RENDERER_VERSION and re-render every stale row online with
+
+    flask backfill run recipes_html_v<RENDERER_VERSION>
+"""
+
+import re
+
+from markupsafe import Markup, escape
+from sqlalchemy import event, inspect
+
+from services.backfill import backfill
+from services.models import Recipe
+
+RENDERER_VERSION = 2
+
+# The recipe page owns <h1>, so "# Title" in a recipe becomes an <h2>
+HEADING_OFFSET = 1
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*$")
+_BULLET = re.compile(r"^[-*+]\s+(.*)$")
+_NUMBERED = re.compile(r"^\d{1,3}[.)]\s+(.*)$")
+
+_CODE = re.compile(r"`([^`]+)`")
+# URLs may hold one level of balanced parentheses: [x](https://en.wikipedia.org/wiki/Roux_(cooking))
+_LINK = re.compile(r"\[([^\]]+)\]\(((?:[^()\s]|\([^()\s]*\))+)\)")
+_STRONG = re.compile(r"\*\*(.+?)\*\*|__(.+?)__")
+_EM = re.compile(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?!\w)|(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)")
+_SAFE_URL = re.compile(r"^(https?://|mailto:|/|#)", re.IGNORECASE)
+
+
+def _inline(text: str) -> str:
+    """Escape one line of text and apply inline markup."""
+    # NUL delimits the placeholders below, so user text must not contain it
+    html = str(escape(text.replace("\x00", "")))
+    # Code spans first, parked behind placeholders so emphasis never reaches inside
+    spans = []
+
+    def park(m):
+        spans.append(f"<code>{m.group(1)}</code>")
+        return f"\x00{len(spans) - 1}\x00"
+
+    html = _CODE.sub(park, html)
+
+    def link(m):
+        label, url = m.group(1), m.group(2)
+        # `url` is already escaped, so it cannot close the attribute
+        if not _SAFE_URL.match(url):
+            return label
+        return f'<a href="{url}" rel="nofollow noopener">{label}</a>'
+
+    html = _LINK.sub(link, html)
+    html = _STRONG.sub(lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", html)
+    html = _EM.sub(lambda m: f"<em>{m.group(1) or m.group(2)}</em>", html)
+    return re.sub(r"\x00(\d+)\x00", lambda m: spans[int(m.group(1))], html)
+
+
+def render_markdown(text: str | None) -> str | None:
+    """Sanitized HTML for `text`, or None for empty input."""
+    if not text or not text.strip():
+        return None
+    out = []
+    paragraph = []
+    list_tag = None
+
+    def close_paragraph():
+        if paragraph:
+            out.append("<p>" + "<br>\n".join(paragraph) + "</p>")
+            paragraph.clear()
+
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            out.append(f"</{list_tag}>")
+            list_tag = None
+
+    for raw in text.replace("\r\n", "\n").split("\n"):
+        line = raw.strip()
+        if not line:
+            close_paragraph()
+            close_list()
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            close_paragraph()
+            close_list()
+            level = min(len(heading.group(1)) + HEADING_OFFSET, 6)
+            out.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+            continue
+        item = _BULLET.match(line)
+        tag = "ul"
+        if item is None:
+            item = _NUMBERED.match(line)
+            tag = "ol"
+        if item is not None:
+            close_paragraph()
+            if list_tag != tag:
+                close_list()
+                out.append(f"<{tag}>")
+                list_tag = tag
+            out.append(f"<li>{_inline(item.group(1))}</li>")
+            continue
+        close_list()
+        paragraph.append(_inline(line))
+
+    close_paragraph()
+    close_list()
+    return "\n".join(out)
+
+
+def render_recipe(target: Recipe) -> None:
+    target.instructions_html = render_markdown(target.instructions)
+    target.content_html = render_markdown(target.content)
+    target.html_version = RENDERER_VERSION
+
+
+# --- Render on write: only when the source text (or the renderer) changed ---
+@event.listens_for(Recipe, "before_insert")
+def _render_new(mapper, connection, target):
+    render_recipe(target)
+
+
+@event.listens_for(Recipe, "before_update")
+def _render_changed(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if (attrs.instructions.history.has_changes() or attrs.content.history.has_changes()
+            or target.html_version != RENDERER_VERSION):
+        render_recipe(target)
+
+
+@backfill(f"recipes_html_v{RENDERER_VERSION}", Recipe.__table__,
+          where=Recipe.html_version != RENDERER_VERSION, kind="python",
+          columns=(Recipe.instructions, Recipe.content))
+def _recipes_html(rows):
+    return [
+        {
+            "id": row.id,
+            "instructions_html": render_markdown(row.instructions),
+            "content_html": render_markdown(row.content),
+            "html_version": RENDERER_VERSION,
+        }
+        for row in rows
+    ]
+
+
+def init_app(app) -> None:
+    # Fallback for rows the backfill has not reached yet
+    @app.template_filter("markdown")
+    def markdown_filter(text):
+        html = render_markdown(text)
+        return Markup(html) if html else ""
@@ -0,0 +1,295 @@
+"""
+Sitemap and Atom feed generation.
+
+Both documents are streamed straight from a server-side cursor over a handful
+of recipe columns and tee'd to a cache file on disk as they go out, so every
+request after the first one is a plain file send. The cache directory is
+wiped whenever a committed session inserted, updated or deleted a recipe.
+"""
+
+import gzip
+import os
+import shutil
+import uuid
+from itertools import chain
+from xml.sax.saxutils import escape
+
+from flask import Response, current_app, has_app_context, request, send_file, stream_with_context, url_for
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, object_session
+
+from services.db import db
+from services.jobs import task
+from services.metrics import CACHE_REQUESTS
+from services.models import Recipe
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+ATOM_NS = "http://www.w3.org/2005/Atom"
+XML_MIMETYPE = "application/xml"
+ATOM_MIMETYPE = "application/atom+xml"
+
+# Rows fetched per round-trip from the server-side cursor
+CURSOR_BATCH_SIZE = 1000
+
+_STAMP_FILE = ".stamp"
+
+
+def cache_dir() -> str:
+    return current_app.config["SITEMAP_CACHE_DIR"]
+
+
+def _read_stamp(directory: str) -> str:
+    try:
+        with open(os.path.join(directory, _STAMP_FILE)) as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return ""
+
+
+def invalidate() -> str:
+    """
+    Drop every cached sitemap/feed file and return the new cache stamp.
+
+    A fresh stamp is written first so that a generation already in flight
+    (possibly in another worker) will notice and discard its output instead
+    of publishing a stale file.
+    """
+    directory = cache_dir()
+    os.makedirs(directory, exist_ok=True)
+    stamp_path = os.path.join(directory, _STAMP_FILE)
+    stamp = uuid.uuid4().hex
+    tmp = f"{stamp_path}.{uuid.uuid4().hex}"
+    with open(tmp, "w") as fh:
+        fh.write(stamp)
+    os.replace(tmp, stamp_path)
+
+    for name in os.listdir(directory):
+        if name.endswith((".xml", ".xml.gz")):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+    return stamp
+
+
+def _cached(name: str, mimetype: str) -> Response | None:
+    """
+    Send `name` from the cache directory (its gzipped copy if the client takes
+    gzip), or None if it is not there.
+    """
+    path = os.path.join(cache_dir(), name)
+    gzipped = bool(request.accept_encodings["gzip"])
+    try:
+        resp = send_file(f"{path}.gz" if gzipped else path, mimetype=mimetype, conditional=True,
+                         max_age=current_app.config["SITEMAP_MAX_AGE"])
+    except FileNotFoundError:
+        CACHE_REQUESTS.inc(cache="sitemap", result="miss")
+        return None
+    CACHE_REQUESTS.inc(cache="sitemap", result="hit")
+    resp.vary.add("Accept-Encoding")
+    if gzipped:
+        resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
+
+def _streamed(name: str, mimetype: str, chunks) -> Response:
+    """
+    Stream `chunks` to the client while writing the same text to a temp file
+    that is atomically moved into the cache once the document is complete.
+    """
+    directory = cache_dir()
+    path = os.path.join(directory, name)
+    os.makedirs(directory, exist_ok=True)
+    stamp = _read_stamp(directory)
+
+    def generate():
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        complete = False
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            # Only publish if no recipe changed while we were streaming
+            if complete and _read_stamp(directory) == stamp:
+                _publish(tmp, path)
+            elif os.path.exists(tmp):
+                os.remove(tmp)
+
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+def _publish(tmp: str, path: str) -> None:
+    """Move a finished document into place along with a gzipped copy."""
+    gz_tmp = f"{tmp}.gz"
+    with open(tmp, "rb") as src, gzip.open(gz_tmp, "wb", compresslevel=9) as dst:
+        shutil.copyfileobj(src, dst)
+    # The .gz goes first so a visible plain file always has its gzip twin
+    os.replace(gz_tmp, f"{path}.gz")
+    os.replace(tmp, path)
+
+
+def _w3c_datetime(value) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+def _recipe_rows(stmt):
+    """Iterate `stmt` through a server-side cursor in CURSOR_BATCH_SIZE batches."""
+    result = db.session.execute(stmt.execution_options(yield_per=CURSOR_BATCH_SIZE))
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+def _recipe_url_prefix() -> str:
+    # Built once per document; url_for per row is the expensive part of a sitemap
+    return url_for("recipes", _external=True)
+
+
+def _urlset_chunks(start_id: int | None, limit: int):
+    prefix = _recipe_url_prefix()
+    stmt = select(Recipe.id, Recipe.slug, Recipe.updated_at).order_by(Recipe.id).limit(limit)
+    if start_id is not None:
+        stmt = stmt.where(Recipe.id >= start_id)
+
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+    for rid, slug, updated_at in _recipe_rows(stmt):
+        yield (
+            f"<url><loc>{escape(f'{prefix}/{rid}-{slug}')}</loc>"
+            f"<lastmod>{_w3c_datetime(updated_at)}</lastmod></url>\n"
+        )
+    yield "</urlset>\n"
+
+
+def _index_chunks(shards: int):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'
+    for n in range(shards):
+        loc = url_for("sitemap_shard", shard=n, _external=True)
+        yield f"<sitemap><loc>{escape(loc)}</loc></sitemap>\n"
+    yield "</sitemapindex>\n"
+
+
+def sitemap_response() -> Response:
+    """
+    /sitemap.xml: a single urlset while the catalog fits in one file, otherwise
+    a sitemap index pointing at SITEMAP_MAX_URLS-sized shards.
+    """
+    cached = _cached("sitemap.xml", XML_MIMETYPE)
+    if cached is not None:
+        return cached
+
+    max_urls = current_app.config["SITEMAP_MAX_URLS"]
+    total = db.session.execute(select(func.count(Recipe.id))).scalar_one()
+    if total <= max_urls:
+        return _streamed("sitemap.xml", XML_MIMETYPE, _urlset_chunks(None, max_urls))
+
+    shards = -(-total // max_urls)
+    return _streamed("sitemap.xml", XML_MIMETYPE, _index_chunks(shards))
+
+
+def sitemap_shard_response(shard: int) -> Response | None:
+    """/sitemap-<n>.xml, or None if the shard is past the end of the catalog."""
+    name = f"sitemap-{shard}.xml"
+    cached = _cached(name, XML_MIMETYPE)
+    if cached is not None:
+        return cached
+
+    max_urls = current_app.config["SITEMAP_MAX_URLS"]
+    # Keyset start for the shard: an offset walk over the primary key index only
+    start_id = db.session.execute(
+        select(Recipe.id).order_by(Recipe.id).offset(shard * max_urls).limit(1)
+    ).scalar()
+    if start_id is None:
+        return None
+    return _streamed(name, XML_MIMETYPE, _urlset_chunks(start_id, max_urls))
+
+
+def _feed_chunks(limit: int):
+    prefix = _recipe_url_prefix()
+    stmt = (
+        select(Recipe.id, Recipe.slug, Recipe.title, Recipe.updated_at)
+        .order_by(Recipe.updated_at.desc())
+        .limit(limit)
+    )
+    rows = _recipe_rows(stmt)
+    first = next(rows, None)
+    updated = _w3c_datetime(first.updated_at) if first else "1970-01-01T00:00:00+00:00"
+
+    yield (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="{ATOM_NS}">\n'
+        f"<title>Tasty Truths — Latest Recipes</title>\n"
+        f"<id>{escape(prefix)}</id>\n"
+        f'<link rel="self" href="{escape(url_for("feed", _external=True))}"/>\n'
+        f'<link href="{escape(prefix)}"/>\n'
+        f"<updated>{updated}</updated>\n"
+    )
+    if first is not None:
+        for rid, slug, title, updated_at in chain((first,), rows):
+            link = escape(f"{prefix}/{rid}-{slug}")
+            yield (
+                f"<entry><title>{escape(title)}</title>"
+                f'<link href="{link}"/><id>{link}</id>'
+                f"<updated>{_w3c_datetime(updated_at)}</updated></entry>\n"
+            )
+    yield "</feed>\n"
+
+
+def feed_response() -> Response:
+    """/feed.xml: Atom feed of the most recently updated recipes."""
+    cached = _cached("feed.xml", ATOM_MIMETYPE)
+    if cached is not None:
+        return cached
+    return _streamed("feed.xml", ATOM_MIMETYPE, _feed_chunks(current_app.config["FEED_MAX_ENTRIES"]))
+
+
+@task(max_attempts=3)
+def warm_sitemaps(stamp: str) -> None:
+    """
+    Regenerate sitemap and feed files after an invalidation so crawlers never
+    pay for a cold cache. Skipped if a newer invalidation already happened.
+    """
+    site_url = current_app.config["SITE_URL"]
+    if not site_url or _read_stamp(cache_dir()) != stamp:
+        return
+    max_urls = current_app.config["SITEMAP_MAX_URLS"]
+    total = db.session.execute(select(func.count(Recipe.id))).scalar_one()
+    shards = -(-total // max_urls) if total > max_urls else 0
+    with current_app.test_request_context("/", base_url=site_url):
+        responses = [sitemap_response(), feed_response()]
+        responses += [sitemap_shard_response(n) for n in range(shards)]
+        for resp in responses:
+            if resp is None:
+                continue
+            # Draining a streamed response is what writes its cache file
+            for _ in resp.response:
+                pass
+            resp.close()
+
+
+# --- Cache invalidation: mark on flush, drop on commit ---
+def _mark_stale(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["sitemap_stale"] = True
+
+
+for _evt in ("after_insert", "after_update", "after_delete"):
+    event.listen(Recipe, _evt, _mark_stale)
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_stale_cache(session):
+    if session.info.pop("sitemap_stale", False) and has_app_context():
+        stamp = invalidate()
+        if current_app.config["SITE_URL"]:
+            # The session's transaction is over; enqueue on a connection of our own
+            with db.engine.begin() as conn:
+                warm_sitemaps.delay(stamp, idempotency_key=f"warm_sitemaps:{stamp}", bind=conn)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale(session):
+    session.info.pop("sitemap_stale", None)
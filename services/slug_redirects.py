@@ -0,0 +1,126 @@
+"""
+Historical slug -> canonical URL resolution for recipe_detail.
+
+Every old slug maps straight to its recipe's current `<id>-<slug>`, so a
+recipe renamed many times still answers any of its old URLs with a single
+301. The whole map is loaded lazily with one join, the first time an old URL
+is requested, and dropped only when slug history changes: at once after a
+commit in which recipe_before_update rotated a slug, and in other workers on
+the "slug" message from services/invalidation.py that the same flush writes.
+Votes, edits and view counts leave it alone. A slug missing from the map is
+looked up on its own through the (old_slug, recipe_id) index, so a rename in
+another worker redirects before that message arrives; until then a stale
+target costs one extra canonical redirect.
+`flask slugs-compact` cleans up history written before rows were kept
+unique per old slug.
+"""
+
+import threading
+
+import click
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.orm import Session
+
+from services import invalidation
+from services.db import db
+from services.models import Recipe, RecipeSlugHistory
+
+_lock = threading.Lock()
+_canonical = None       # old slug -> "<id>-<slug>", None until first use
+
+
+def _load() -> dict:
+    rows = db.session.execute(
+        select(RecipeSlugHistory.old_slug, Recipe.id, Recipe.slug)
+        .join(Recipe, Recipe.id == RecipeSlugHistory.recipe_id)
+        .order_by(RecipeSlugHistory.changed_at, RecipeSlugHistory.id)
+    )
+    # Newest row wins if compaction hasn't run over older data yet
+    return {old: f"{rid}-{slug}" for old, rid, slug in rows}
+
+
+def lookup(old_slug: str):
+    """
+    The recipe an old slug points at: one probe of the (old_slug, recipe_id)
+    index, which history has kept unique per old slug since its compaction.
+    """
+    return (
+        select(Recipe.id, Recipe.slug)
+        .join(RecipeSlugHistory, Recipe.id == RecipeSlugHistory.recipe_id)
+        .where(RecipeSlugHistory.old_slug == old_slug)
+        .limit(1)
+    )
+
+
+def _lookup(old_slug: str) -> str | None:
+    row = db.session.execute(lookup(old_slug)).first()
+    return f"{row.id}-{row.slug}" if row else None
+
+
+def resolve(old_slug: str) -> str | None:
+    """Canonical `<id>-<slug>` for a historical slug, or None."""
+    global _canonical
+    mapping = _canonical
+    if mapping is None:
+        mapping = _load()
+        with _lock:
+            _canonical = mapping
+    canonical = mapping.get(old_slug)
+    if canonical is None:
+        canonical = _lookup(old_slug)
+        if canonical is not None:
+            mapping[old_slug] = canonical
+    return canonical
+
+
+def invalidate() -> None:
+    global _canonical
+    with _lock:
+        _canonical = None
+
+
+def compact() -> int:
+    """Remove redundant history rows; return how many were deleted."""
+    history = RecipeSlugHistory.__table__
+    # Slugs that are live again must resolve to their current owner, not redirect
+    removed = db.session.execute(
+        delete(history).where(history.c.old_slug.in_(select(Recipe.slug)))
+    ).rowcount
+    newest = select(func.max(history.c.id)).group_by(history.c.old_slug)
+    removed += db.session.execute(delete(history).where(history.c.id.not_in(newest))).rowcount
+    return removed
+
+
+@invalidation.subscribe(invalidation.SLUG, invalidation.GENERATION)
+def _drop_map(keys):
+    invalidate()
+
+
+@event.listens_for(Session, "after_flush")
+def _publish_history_change(session, flush_context):
+    # Tell the other workers in the transaction that rewrote the history
+    if session.info.pop("slug_history_changed", False):
+        invalidation.publish(session.connection(), invalidation.SLUG)
+        session.info["slug_map_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_stale_map(session):
+    if session.info.pop("slug_map_stale", False):
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_map(session):
+    session.info.pop("slug_history_changed", None)
+    session.info.pop("slug_map_stale", None)
+
+
+def init_app(app) -> None:
+    @app.cli.command("slugs-compact")
+    def slugs_compact():
+        """Deduplicate slug history so every old slug redirects in one hop."""
+        removed = compact()
+        db.session.commit()
+        invalidate()
+        click.echo(f"removed {removed} redundant slug history rows")
@@ -0,0 +1,120 @@
+"""
+Write-behind recipe view counters.
+
+Counting a view with `UPDATE recipes SET view_count = view_count + 1` in the
+request would make every page view queue on SQLite's single writer. Instead
+`record(recipe_id)` bumps an in-process counter, and the buffer is written out
+as one batched UPDATE per flush: when VIEW_FLUSH_EVENTS views are pending,
+every VIEW_FLUSH_INTERVAL seconds from a background thread, and at process
+exit. A crash loses at most one buffer's worth of views, which is fine for a
+popularity signal.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import bindparam, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from services.db import db
+from services.models import Recipe
+
+logger = logging.getLogger("tasty_truths.views")
+
+# Every app's buffer, for the single exit hook; a collected app drops out
+_buffers = weakref.WeakSet()
+
+
+class ViewBuffer:
+    """One app's pending views, stored in `app.extensions["view_counts"]`."""
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.pending = Counter()    # recipe id -> views not yet written
+        self.events = 0
+        self._flusher = None
+        self._flusher_pid = None
+
+    def record(self, recipe_id: int) -> None:
+        with self.lock:
+            self.pending[recipe_id] += 1
+            self.events += 1
+            full = self.events >= self.app.config["VIEW_FLUSH_EVENTS"]
+            self._ensure_flusher()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered views to the database; return how many were written."""
+        with self.lock:
+            if not self.pending:
+                return 0
+            batch = dict(self.pending)
+            self.pending.clear()
+            self.events = 0
+
+        # updated_at is passed through unchanged: a view is not an edit, and bumping
+        # it would also evict the recipe's cached card
+        stmt = (
+            update(Recipe)
+            .where(Recipe.id == bindparam("rid"))
+            .values(view_count=Recipe.view_count + bindparam("n"), updated_at=Recipe.updated_at)
+        )
+        try:
+            with self.app.app_context(), db.engine.begin() as conn:
+                conn.execute(stmt, [{"rid": rid, "n": n} for rid, n in batch.items()])
+        except SQLAlchemyError:
+            logger.exception("view count flush failed; keeping %d recipes buffered", len(batch))
+            with self.lock:
+                self.pending.update(batch)
+            return 0
+        return sum(batch.values())
+
+    def _ensure_flusher(self) -> None:
+        # Threads don't survive fork; each worker starts its own flusher
+        if self._flusher is None or self._flusher_pid != os.getpid():
+            self._flusher = threading.Thread(
+                target=_flush_forever, args=(weakref.ref(self), self.app.config["VIEW_FLUSH_INTERVAL"]),
+                name="view-count-flusher", daemon=True,
+            )
+            self._flusher_pid = os.getpid()
+            self._flusher.start()
+
+
+def _flush_forever(buffer_ref, interval: float) -> None:
+    # A weak reference, so the thread does not keep a discarded app alive
+    while True:
+        time.sleep(interval)
+        buffer = buffer_ref()
+        if buffer is None:
+            return
+        buffer.flush()
+        del buffer
+
+
+def record(recipe_id: int) -> None:
+    current_app.extensions["view_counts"].record(recipe_id)
+
+
+def flush(app=None) -> int:
+    """Write `app`'s (default: the current app's) buffered views; return how many were written."""
+    return (app or current_app).extensions["view_counts"].flush()
+
+
+@atexit.register
+def _flush_all() -> None:
+    for buffer in list(_buffers):
+        buffer.flush()
+
+
+def init_app(app) -> None:
+    buffer = ViewBuffer(app)
+    app.extensions["view_counts"] = buffer
+    _buffers.add(buffer)
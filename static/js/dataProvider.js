@@ -15,11 +15,28 @@ export const ApiProvider = {
     const res = await fetch(`/api/${t}`);
     return await res.json();
   },
-  async getBySlug(t, s) {
-    const res = await fetch(`/api/${t}/${encodeURIComponent(s)}`);
+  async getBySlug(t, s, { fields = "" } = {}) {
+    const query = fields ? `?${new URLSearchParams({ fields })}` : "";
+    const res = await fetch(`/api/${t}/${encodeURIComponent(s)}${query}`);
     if (!res.ok) return null;
     return await res.json();
   },
+  // Many items in one request, in the order of `ids`; missing ids are skipped
+  async getMany(t, ids, { fields = "" } = {}) {
+    const params = new URLSearchParams({ ids: ids.join(",") });
+    if (fields) params.set("fields", fields);
+    const res = await fetch(`/api/${t}?${params}`);
+    if (!res.ok) throw new Error(`getMany ${t}: HTTP ${res.status}`);
+    return await res.json();
+  },
+  // One page of the change feed after `since`: { changes, cursor, has_more }
+  async changes(t, since, { fields = "" } = {}) {
+    const params = new URLSearchParams({ since: String(since) });
+    if (fields) params.set("fields", fields);
+    const res = await fetch(`/api/${t}/changes?${params}`);
+    if (!res.ok) throw new Error(`changes ${t}: HTTP ${res.status}`);
+    return await res.json();
+  },
   async create(t, o) {
     const res = await fetch(`/api/${t}`, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(o) });
     return await res.json();
@@ -2,6 +2,7 @@
 // Page controller for recipe_template.html
 
 import { store } from "/static/js/store.js";
+import { ApiProvider } from "/static/js/dataProvider.js";
 
 // --- initial seed data (only used if store is empty) ---
 const SEED_RECIPES = [
@@ -41,6 +42,27 @@ const SEED_RECIPES = [
   },
 ];
 
+// Map an /api/recipes/changes record onto the card fields used below
+const SYNC_FIELDS = "title,slug,description,image_filename,total_time_minutes,cuisine,dietary_tags,average_rating,rating_count";
+
+function fromServer(r) {
+  return {
+    id: r.id,
+    title: r.title,
+    slug: r.slug,
+    url: `/recipes/${r.id}-${r.slug}`,
+    excerpt: r.description || "",
+    imageSrc: r.image_filename ? `/static/${r.image_filename}` : "",
+    imageAlt: r.title,
+    timeISO: r.total_time_minutes ? `PT${r.total_time_minutes}M` : "",
+    timeLabel: r.total_time_minutes ? `${r.total_time_minutes} min` : "",
+    cuisine: r.cuisine || "",
+    tags: r.dietary_tags || [],
+    ratingValue: r.average_rating,
+    ratingCount: r.rating_count,
+  };
+}
+
 // --- utilities ---
 function minutesFromISO(duration) {
   // Very small helper for PTxxM style strings
@@ -96,7 +118,7 @@ function renderRecipes(recipes) {
     // Link
     const link = node.querySelector(".card-link");
     if (link) {
-      link.href = `/recipes/${recipe.slug}.html`;
+      link.href = recipe.url || `/recipes/${recipe.slug}.html`;
       link.setAttribute("aria-label", `View recipe: ${recipe.title}`);
     }
 
@@ -207,6 +229,16 @@ document.addEventListener("DOMContentLoaded", () => {
   if (applyBtn) applyBtn.addEventListener("click", applyFilters);
   if (clearBtn) clearBtn.addEventListener("click", clearFilters);
 
-  // Initial render
+  // Initial render from local data, then pull only what changed on the server
   renderRecipes(recipes);
+  store
+    .sync("recipes", (since) => ApiProvider.changes("recipes", since, { fields: SYNC_FIELDS }), {
+      transform: fromServer,
+    })
+    .then((applied) => {
+      if (!applied) return;
+      recipes = store.getAll("recipes");
+      applyFilters();
+    })
+    .catch((err) => console.warn("recipe sync failed:", err));
 });
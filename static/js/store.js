@@ -146,6 +146,44 @@ export const store = {
     return next;
   },
 
+  /**
+   * Pull server-side changes into a collection, starting after the cursor
+   * saved by the last sync. `fetchPage(since)` resolves to one page of a
+   * change feed such as ApiProvider.changes. Upserts replace (or add) the
+   * item with the same server id; tombstones remove it. `transform` maps a
+   * server record to the stored shape.
+   * Resolves to the number of changes applied.
+   */
+  async sync(type, fetchPage, { transform = (x) => x } = {}) {
+    const data = loadAll();
+    const col = ensureCollection(data, type);
+    const cursors = data._cursors || (data._cursors = {});
+    let cursor = cursors[type] ?? 0;
+    let applied = 0;
+
+    for (;;) {
+      const page = await fetchPage(cursor);
+
+      for (const change of page.changes) {
+        const id = change.op === "delete" ? change.id : change.recipe.id;
+        const idx = col.findIndex(x => x.serverId === id);
+        if (change.op === "delete") {
+          if (idx !== -1) col.splice(idx, 1);
+        } else {
+          const item = { ...transform(change.recipe), serverId: id };
+          if (idx === -1) col.push(item); else col[idx] = item;
+        }
+        applied++;
+      }
+      cursor = page.cursor;
+      if (!page.has_more) break;
+    }
+
+    cursors[type] = cursor;
+    saveAll(data);
+    return applied;
+  },
+
   /**
    * Remove an item by slug. Returns true if removed.
    */
@@ -0,0 +1,121 @@
+"""The async recipe API behind the ASGI entry point (asgi.py, services/async_api.py) against its Flask routes."""
+
+import asyncio
+
+import pytest
+
+from app import create_app
+from asgi import ASGIApp
+from services import async_api
+from services.db import db
+from services.models import Recipe
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'asgi.db'}",
+        "SITEMAP_CACHE_DIR": str(tmp_path / "sitemap"),
+        "READ_INDEX_PATH": str(tmp_path / "read_index.bin"),
+        "METRICS_DIR": str(tmp_path / "metrics"),
+        "JINJA_BYTECODE_CACHE_DIR": str(tmp_path / "jinja"),
+    })
+    with app.app_context():
+        db.session.add_all([
+            Recipe(title="Green Curry", cuisine="Thai", prep_time_minutes=20),
+            Recipe(title="Gazpacho", cuisine="Spanish", prep_time_minutes=15),
+        ])
+        db.session.commit()
+        db.session.get(Recipe, 1).cuisine = "Thai green"
+        db.session.commit()
+        yield app
+
+
+@pytest.fixture(params=["aiosqlite", "threadpool"])
+def asgi_app(request, app, monkeypatch):
+    if request.param == "threadpool":
+        monkeypatch.setattr(async_api, "aiosqlite", None)
+    asgi_app = ASGIApp(app)
+    assert asgi_app.database.driver == request.param
+    yield asgi_app
+    asyncio.run(asgi_app.database.close())
+
+
+def _get(asgi_app, *requests):
+    """Run GET (path, query_string, headers) requests through the ASGI app, in one event loop."""
+    async def one(path, query, headers):
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        await asgi_app({
+            "type": "http", "method": "GET", "path": path, "query_string": query.encode(),
+            "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+            "http_version": "1.1", "scheme": "http", "server": ("localhost", 80),
+        }, receive, send)
+        body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+        return sent[0]["status"], dict(sent[0]["headers"]), body
+
+    async def run():
+        return [await one(path, query, headers) for path, query, headers in requests]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("path, query", [
+    ("/api/recipes", ""),
+    ("/api/recipes", "fields=id,title&sort=title"),
+    ("/api/recipes", "ids=2,1"),
+    ("/api/recipes", "ids=x"),
+    ("/api/recipes/changes", "since=0"),
+    ("/api/recipes/changes", "since=1&limit=1&fields=id,title"),
+    ("/api/recipes/1", ""),
+    ("/api/recipes/1", "fields=title,cuisine"),
+])
+def test_matches_flask(app, asgi_app, path, query):
+    expected = app.test_client().get(f"{path}?{query}")
+    [(status, headers, body)] = _get(asgi_app, (path, query, {}))
+    assert status == expected.status_code
+    assert body == expected.data
+    if "ETag" in expected.headers:
+        assert headers[b"etag"].decode() == expected.headers["ETag"]
+
+
+def test_detail_by_slug_and_conditional_get(app, asgi_app):
+    slug = db.session.get(Recipe, 2).slug
+    [(status, headers, body)] = _get(asgi_app, (f"/api/recipes/{slug}", "", {}))
+    assert status == 200 and b"Gazpacho" in body
+    [(status, _, body)] = _get(asgi_app, (f"/api/recipes/{slug}", "", {"if-none-match": headers[b"etag"].decode()}))
+    assert status == 304 and body == b""
+
+
+def test_flask_only_paths_skip_the_async_queries(app, asgi_app, monkeypatch):
+    queries = []
+    real_all = asgi_app.database.all
+
+    async def counted(stmt):
+        queries.append(stmt)
+        return await real_all(stmt)
+
+    monkeypatch.setattr(asgi_app.database, "all", counted)
+    [suggest, missing] = _get(asgi_app, ("/api/recipes/suggest", "q=gr", {}), ("/api/recipes/999", "", {}))
+
+    assert suggest[0] == app.test_client().get("/api/recipes/suggest?q=gr").status_code
+    assert missing[0] == 404
+    assert len(queries) == 1  # the lookup of 999 only; "suggest" is not a slug
+
+
+def test_old_slug_redirect_keeps_the_query_string(app):
+    old = db.session.get(Recipe, 2).slug
+    db.session.get(Recipe, 2).title = "Chilled Gazpacho"
+    db.session.commit()
+    assert db.session.get(Recipe, 2).slug != old
+
+    query = "fields=id&fields=title&id_or_slug=x&q=caf%C3%A9"
+    response = app.test_client().get(f"/api/recipes/{old}?{query}")
+    assert response.status_code == 301
+    assert response.headers["Location"] == f"/api/recipes/2?{query}"
@@ -0,0 +1,117 @@
+"""Interrupt/resume behaviour of the chunked backfill runner (services/backfill.py)."""
+
+import pytest
+from sqlalchemy import insert, select
+
+from app import create_app
+from services import backfill
+from services.db import db
+from services.models import Recipe, RecipeChange
+
+ROWS = 250
+CHUNK = 40
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'backfill.db'}",
+        "SITEMAP_CACHE_DIR": str(tmp_path / "sitemap"),
+        "READ_INDEX_PATH": str(tmp_path / "read_index.bin"),
+        "METRICS_DIR": str(tmp_path / "metrics"),
+        "JINJA_BYTECODE_CACHE_DIR": str(tmp_path / "jinja"),
+    })
+    with app.app_context():
+        db.session.execute(insert(Recipe), [
+            {"title": f"Recipe {i}", "slug": f"recipe-{i}", "prep_time_minutes": i % 30, "cook_time_minutes": 10}
+            for i in range(ROWS)
+        ])
+        db.session.commit()
+        yield app
+
+
+def _counting_backfill(fail_on_chunk=None):
+    """Adds 1 to view_count per row, so any repeated or skipped row is visible."""
+    calls = {"chunks": 0}
+
+    def bump(rows):
+        calls["chunks"] += 1
+        if calls["chunks"] == fail_on_chunk:
+            raise RuntimeError("simulated crash mid-backfill")
+        return [{"id": r.id, "view_count": r.view_count + 1} for r in rows]
+
+    spec = backfill.Backfill("test_bump", Recipe.__table__, bump, kind="python", columns=(Recipe.view_count,))
+    return spec, calls
+
+
+def _view_counts():
+    return db.session.execute(select(Recipe.view_count).order_by(Recipe.id)).scalars().all()
+
+
+def _updated_at():
+    return db.session.execute(select(Recipe.updated_at).order_by(Recipe.id)).scalars().all()
+
+
+def _logged_changes():
+    return db.session.execute(select(RecipeChange.recipe_id).order_by(RecipeChange.id)).scalars().all()
+
+
+def test_stops_after_max_chunks_and_resumes(app):
+    spec, _ = _counting_backfill()
+    stamps = _updated_at()
+    assert backfill.run(spec, chunk_size=CHUNK, max_chunks=2) is False
+
+    state = backfill.checkpoint("test_bump")
+    assert state.status == "running"
+    assert state.rows_done == 2 * CHUNK
+    counts = _view_counts()
+    assert counts[:2 * CHUNK] == [1] * (2 * CHUNK)
+    assert counts[2 * CHUNK:] == [0] * (ROWS - 2 * CHUNK)
+    assert _logged_changes() == list(range(1, 2 * CHUNK + 1))
+
+    assert backfill.run(spec, chunk_size=CHUNK) is True
+    assert _view_counts() == [1] * ROWS
+    # Every backfilled row reaches the change feed exactly once
+    assert _logged_changes() == list(range(1, ROWS + 1))
+    # A backfill is not an edit
+    assert _updated_at() == stamps
+    state = backfill.checkpoint("test_bump")
+    assert (state.status, state.rows_done) == ("done", ROWS)
+
+
+def test_crash_rolls_back_only_the_failing_chunk(app):
+    spec, _ = _counting_backfill(fail_on_chunk=3)
+    with pytest.raises(RuntimeError):
+        backfill.run(spec, chunk_size=CHUNK)
+
+    state = backfill.checkpoint("test_bump")
+    assert state.rows_done == 2 * CHUNK
+    assert _view_counts() == [1] * (2 * CHUNK) + [0] * (ROWS - 2 * CHUNK)
+    # The failed chunk's change rows rolled back with its UPDATE
+    assert _logged_changes() == list(range(1, 2 * CHUNK + 1))
+
+    resumed, _ = _counting_backfill()
+    assert backfill.run(resumed, chunk_size=CHUNK) is True
+    assert _view_counts() == [1] * ROWS
+    assert _logged_changes() == list(range(1, ROWS + 1))
+
+
+def test_finished_backfill_is_not_rerun_until_reset(app):
+    spec, calls = _counting_backfill()
+    backfill.run(spec, chunk_size=CHUNK)
+    chunks = calls["chunks"]
+    assert backfill.run(spec, chunk_size=CHUNK) is True
+    assert calls["chunks"] == chunks
+
+    backfill.reset("test_bump")
+    backfill.run(spec, chunk_size=CHUNK)
+    assert _view_counts() == [2] * ROWS
+
+
+def test_sql_backfill_respects_where(app):
+    spec = backfill.registered()["recipes_total_time"]
+    stamps = _updated_at()
+    assert backfill.run(spec, chunk_size=CHUNK) is True
+    rows = db.session.execute(select(Recipe.prep_time_minutes, Recipe.total_time_minutes)).all()
+    assert all(total == prep + 10 for prep, total in rows)
+    assert _updated_at() == stamps
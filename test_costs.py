@@ -0,0 +1,92 @@
+"""Parsing free-text recipe costs into integer cents (services/costs.py)."""
+
+import pytest
+
+from app import create_app
+from services.costs import MAX_CENTS, Cost, cost_columns, parse_cost
+from services.db import db
+from services.models import Recipe
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Symbol or code before the amount
+    ("$12", Cost(1200, "USD", False)),
+    ("$12.50", Cost(1250, "USD", False)),
+    ("€ 3,5", Cost(350, "EUR", False)),
+    ("USD 7.5", Cost(750, "USD", False)),
+    # ... or after it
+    ("12,50 €", Cost(1250, "EUR", False)),
+    ("about 8 EUR", Cost(800, "EUR", False)),
+    ("20 dollars", Cost(2000, "USD", False)),
+    ("12 euros", Cost(1200, "EUR", False)),
+    # Decimal comma vs thousands separator
+    ("$1,5", Cost(150, "USD", False)),
+    ("$1,200", Cost(120000, "USD", False)),
+    ("$1,200.50", Cost(120050, "USD", False)),
+    ("1.200,50 €", Cost(120050, "EUR", False)),
+    # Several amounts and ranges average
+    ("$12 or $12.50", Cost(1225, "USD", False)),
+    ("$10-15", Cost(1250, "USD", False)),
+    ("$10 - $15", Cost(1250, "USD", False)),
+    ("10 to 15 EUR", Cost(1250, "EUR", False)),
+    # The first currency wins
+    ("€5 (about $6)", Cost(500, "EUR", False)),
+    # Bare numbers: one amount or range, never a serving count
+    ("12", Cost(1200, "USD", False)),
+    ("10-15", Cost(1250, "USD", False)),
+    ("serves 4, about 20", Cost(2000, "USD", False)),
+    ("serves 4, ~20 dollars", Cost(2000, "USD", False)),
+    ("4 servings at 3 each", Cost(300, "USD", True)),
+    # Weights are not currency
+    ("1 pound of beef, $5", Cost(500, "USD", False)),
+    # Per-serving markers
+    ("£3 per serving", Cost(300, "GBP", True)),
+    ("$4/serving", Cost(400, "USD", True)),
+    ("$0", Cost(0, "USD", False)),
+    # Nothing usable
+    ("cheap", None),
+    # Beyond any real estimate, or beyond what Decimal and SQLite's INTEGER hold
+    ("$21474836.47", Cost(MAX_CENTS, "USD", False)),
+    ("$21474836.48", None),
+    ("$" + "9" * 20, None),
+    ("$" + "9" * 40, None),
+    ("9" * 50, None),
+    ("", None),
+    (None, None),
+])
+def test_parse_cost(text, expected):
+    assert parse_cost(text) == expected
+
+
+def test_bare_amounts_use_the_default_currency():
+    assert parse_cost("12,50", default_currency="EUR") == Cost(1250, "EUR", False)
+    assert parse_cost("$12", default_currency="EUR") == Cost(1200, "USD", False)
+
+
+@pytest.mark.parametrize("text, servings, expected", [
+    ("$12", 4, (1200, 300)),
+    ("$12", None, (1200, None)),
+    ("£3 per serving", 2, (600, 300)),
+    ("£3 per serving", None, (None, 300)),
+    ("$10", 3, (1000, 333)),
+    ("cheap", 4, (None, None)),
+    ("$20000000 per serving", 2, (None, 2000000000)),
+])
+def test_cost_columns_total_and_per_serving(text, servings, expected):
+    columns = cost_columns(text, servings)
+    assert (columns["cost_cents"], columns["cost_per_serving_cents"]) == expected
+
+
+def test_oversized_cost_saves_with_null_columns(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'costs.db'}",
+        "SITEMAP_CACHE_DIR": str(tmp_path / "sitemap"),
+        "READ_INDEX_PATH": str(tmp_path / "read_index.bin"),
+        "METRICS_DIR": str(tmp_path / "metrics"),
+        "JINJA_BYTECODE_CACHE_DIR": str(tmp_path / "jinja"),
+    })
+    with app.app_context():
+        db.session.add(Recipe(title="Gold Leaf Toast", estimated_cost="$" + "9" * 40, servings=2))
+        db.session.commit()
+        recipe = db.session.get(Recipe, 1)
+        assert (recipe.cost_cents, recipe.cost_per_serving_cents, recipe.cost_currency) == (None, None, None)
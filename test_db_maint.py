@@ -0,0 +1,59 @@
+"""Query plan checks of `flask db-maint report` (services/db_maint.py)."""
+
+import pytest
+
+from app import create_app
+from services import db_maint
+from services.db import db
+from services.models import Recipe
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'maint.db'}",
+        "SITEMAP_CACHE_DIR": str(tmp_path / "sitemap"),
+        "READ_INDEX_PATH": str(tmp_path / "read_index.bin"),
+        "METRICS_DIR": str(tmp_path / "metrics"),
+        "JINJA_BYTECODE_CACHE_DIR": str(tmp_path / "jinja"),
+    })
+    with app.app_context():
+        db.session.add_all([Recipe(title=f"Recipe {i}", prep_time_minutes=i) for i in range(5)])
+        db.session.commit()
+        yield app
+
+
+@pytest.mark.parametrize("details, large, expected", [
+    (["SEARCH recipes USING INDEX ix_recipes_slug (slug=?)"], {"recipes"}, []),
+    (["SCAN recipes"], set(), ["full scan (SCAN recipes)"]),
+    (["SCAN recipes USING INDEX ix_recipes_created_at"], set(), []),
+    (["SCAN recipes USING INDEX ix_recipes_created_at"], {"recipes"},
+     ["full index scan (SCAN recipes USING INDEX ix_recipes_created_at)"]),
+    (["SCAN recipes USING COVERING INDEX ix_recipes_view_count"], {"recipes"},
+     ["full index scan (SCAN recipes USING COVERING INDEX ix_recipes_view_count)"]),
+    (["SCAN users USING INDEX ix_users_name"], {"recipes"}, []),
+    (["SEARCH recipes USING INTEGER PRIMARY KEY (rowid=?)", "USE TEMP B-TREE FOR ORDER BY"], set(),
+     ["use temp b-tree for order by"]),
+])
+def test_plan_problems(details, large, expected):
+    assert db_maint.plan_problems(details, large) == expected
+
+
+def test_hot_query_plans_are_healthy(app):
+    with db.engine.connect() as conn:
+        for name, stmt, expected in db_maint.HOT_QUERIES:
+            problems = db_maint.plan_problems(db_maint.explain(conn, stmt), {"recipes"})
+            assert expected or not problems, (name, problems)
+
+
+def test_report_flags_full_index_scans_on_large_tables(app, monkeypatch):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["db-maint", "report", "--strict"])
+    assert result.exit_code == 0, result.output
+    assert "full index scan" not in result.output
+
+    monkeypatch.setattr(db_maint, "LARGE_TABLE_ROWS", 5)
+    result = runner.invoke(args=["db-maint", "report", "--strict"])
+    assert result.exit_code == 0, result.output
+    assert "full index scan (SCAN recipes USING INDEX ix_recipes_created_at) " \
+           "(expected: unpaginated list returns every row)" in result.output
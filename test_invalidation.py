@@ -0,0 +1,194 @@
+"""Cross-process delivery of cache invalidation messages (services/invalidation.py)."""
+
+import multiprocessing
+
+import pytest
+from sqlalchemy import delete, insert
+
+from app import create_app
+from services import fragment_cache, invalidation, ratings, slug_redirects
+from services.db import db
+from services.models import CacheInvalidation, Recipe, RecipeSlugHistory, User
+from utilities import result_cache
+
+TIMEOUT = 60
+
+
+def _config(tmp_path) -> dict:
+    return {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'bus.db'}",
+        "SITEMAP_CACHE_DIR": str(tmp_path / "sitemap"),
+        "READ_INDEX_PATH": str(tmp_path / "read_index.bin"),
+        "METRICS_DIR": str(tmp_path / "metrics"),
+        "JINJA_BYTECODE_CACHE_DIR": str(tmp_path / "jinja"),
+        "INVALIDATION_POLL_INTERVAL": 0,
+    }
+
+
+def _worker(config, commands, replies):
+    """A separate worker process: records every message it is handed, answers commands."""
+    from utilities import recipe_filters
+
+    app = create_app(config)
+    received = []
+    for kind in invalidation.KINDS:
+        invalidation.subscribe(kind)(lambda keys, kind=kind: received.append((kind, sorted(keys))))
+    client = app.test_client()
+    client.get("/api/whoami")  # first request: the cursor starts at the current end of the bus
+    replies.put("ready")
+
+    while True:
+        command = commands.get(timeout=TIMEOUT)
+        if command == "stop":
+            return
+        if command == "request":
+            # Any request polls first (the interval is 0 here)
+            client.get("/api/whoami")
+            replies.put(list(received))
+            received.clear()
+        elif command == "thai":
+            with app.app_context():
+                replies.put([r.title for r in recipe_filters.get_recipes_by_cuisine("Thai")])
+
+
+class Worker:
+    def __init__(self, config):
+        ctx = multiprocessing.get_context("spawn")
+        self.commands = ctx.Queue()
+        self.replies = ctx.Queue()
+        self.process = ctx.Process(target=_worker, args=(config, self.commands, self.replies), daemon=True)
+        self.process.start()
+        assert self.replies.get(timeout=TIMEOUT) == "ready"
+
+    def ask(self, command):
+        self.commands.put(command)
+        return self.replies.get(timeout=TIMEOUT)
+
+    def stop(self):
+        self.commands.put("stop")
+        self.process.join(timeout=TIMEOUT)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(_config(tmp_path))
+    with app.app_context():
+        db.session.add_all([
+            Recipe(title="Green Curry", cuisine="Thai"),
+            Recipe(title="Carbonara", cuisine="Italian"),
+            User(username="cook", password_hash="x"),
+        ])
+        db.session.commit()
+        yield app
+
+
+@pytest.fixture
+def workers(app, tmp_path):
+    started = []
+
+    def start(n=1):
+        for _ in range(n):
+            started.append(Worker(_config(tmp_path)))
+        return started[-n:]
+
+    yield start
+    for worker in started:
+        worker.stop()
+
+
+def test_every_worker_receives_typed_messages(app, workers):
+    first, second = workers(2)
+
+    recipe = db.session.get(Recipe, 2)
+    recipe.description = "Eggs, pecorino, guanciale"
+    user = db.session.execute(db.select(User)).scalar_one()
+    user.first_name = "Ada"
+    db.session.commit()
+    with db.engine.begin() as conn:
+        invalidation.publish(conn, invalidation.GENERATION)
+
+    expected = [("recipe", [2]), ("user", [user.id]), ("generation", [])]
+    assert first.ask("request") == expected
+    assert second.ask("request") == expected
+    # Nothing is delivered twice
+    assert first.ask("request") == []
+
+
+def test_rolled_back_write_sends_nothing(app, workers):
+    (worker,) = workers(1)
+    db.session.get(Recipe, 1).title = "Red Curry"
+    db.session.flush()
+    db.session.rollback()
+    assert worker.ask("request") == []
+
+
+def test_filter_cache_in_other_worker_sees_edit(app, workers):
+    (worker,) = workers(1)
+    assert worker.ask("thai") == ["Green Curry"]
+
+    db.session.get(Recipe, 2).cuisine = "Thai"
+    db.session.commit()
+    worker.ask("request")
+    assert sorted(worker.ask("thai")) == ["Carbonara", "Green Curry"]
+
+
+def test_idle_worker_missing_pruned_messages_resets(app, workers):
+    (worker,) = workers(1)
+    with db.engine.begin() as conn:
+        invalidation.publish(conn, invalidation.RECIPE, [1])
+        # Pruned before the worker got to read it
+        conn.execute(delete(CacheInvalidation.__table__))
+        invalidation.publish(conn, invalidation.RECIPE, [2])
+
+    assert worker.ask("request") == [("recipe", [2]), ("generation", [])]
+
+
+def test_rename_sends_slug_message(app, workers):
+    (worker,) = workers(1)
+    db.session.get(Recipe, 1).title = "Red Curry"
+    db.session.commit()
+    assert sorted(worker.ask("request")) == [("recipe", [1]), ("slug", [])]
+
+    db.session.get(Recipe, 1).description = "Not a rename"
+    db.session.commit()
+    assert worker.ask("request") == [("recipe", [1])]
+
+
+def test_votes_drop_cards_but_keep_filter_results(app, workers):
+    (worker,) = workers(1)
+    with app.test_request_context():
+        fragment_cache.recipe_card(db.session.get(Recipe, 1))
+        assert len(fragment_cache._cache()) == 1
+        generation = result_cache.generation()
+
+        ratings.rate(1, 1, 5)
+        db.session.commit()
+        assert worker.ask("request") == [("rating", [1])]
+
+        invalidation.dispatch([(invalidation.RATING, 1)])
+        assert len(fragment_cache._cache()) == 0
+        assert result_cache.generation() == generation
+
+
+def test_slug_map_survives_edits_and_resolves_misses(app):
+    recipe = db.session.get(Recipe, 1)
+    old_slug = recipe.slug
+    recipe.title = "Red Curry"
+    db.session.commit()
+    assert slug_redirects.resolve(old_slug) == f"1-{recipe.slug}"
+    loaded = slug_redirects._canonical
+
+    # Votes and edits that keep the title do not touch slug history
+    db.session.get(Recipe, 2).description = "Eggs, pecorino, guanciale"
+    db.session.commit()
+    invalidation.dispatch([(invalidation.RECIPE, 2)])
+    assert slug_redirects._canonical is loaded
+
+    # History written elsewhere and not yet announced: found by the single-row lookup
+    db.session.execute(insert(RecipeSlugHistory).values(recipe_id=2, old_slug="spaghetti-carbonara"))
+    db.session.commit()
+    assert slug_redirects.resolve("spaghetti-carbonara") == f"2-{db.session.get(Recipe, 2).slug}"
+    assert slug_redirects.resolve("no-such-slug") is None
+
+    invalidation.dispatch([(invalidation.SLUG, None)])
+    assert slug_redirects._canonical is None
@@ -0,0 +1,64 @@
+"""Row and date encoding of the API JSON provider (services/json_provider.py)."""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import JSON, Column, DateTime, Integer, MetaData, String, Table, create_engine, insert, select
+from werkzeug.http import http_date
+
+import services.json_provider as json_provider
+
+ITEMS = Table(
+    "items", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("name", String),
+    Column("tags", JSON),
+    Column("created_at", DateTime),
+)
+
+
+@pytest.fixture
+def rows():
+    engine = create_engine("sqlite://")
+    ITEMS.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(ITEMS), [
+            {"id": 1, "name": "Green Curry", "tags": ["vegan"], "created_at": None},
+            {"id": 2, "name": "Café \"au\" lait", "tags": {"b": 1, "a": 2}, "created_at": datetime(2024, 2, 29, 23, 59, 1)},
+            {"id": 3, "name": None, "tags": [], "created_at": datetime(1999, 12, 31)},
+        ])
+        return conn.execute(select(ITEMS.c.name, ITEMS.c.id, ITEMS.c.created_at, ITEMS.c.tags)).all()
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def provider(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(json_provider, "orjson", None)
+    elif json_provider.orjson is None:
+        pytest.skip("orjson is not installed")
+    app = Flask(__name__)
+    with app.app_context():
+        yield json_provider.FastJSONProvider(app), DefaultJSONProvider(app)
+
+
+def test_rows_encode_like_flask_encodes_their_dicts(rows, provider):
+    fast, default = provider
+    expected = default.dumps([row._asdict() for row in rows])
+    # orjson writes UTF-8 where the stdlib escapes to ASCII; the documents are equal
+    assert fast.loads(fast.response(rows).get_data()) == default.loads(expected)
+    if json_provider.orjson is None:
+        assert fast.dumps(rows) == expected
+    # Single rows go through default()
+    assert fast.loads(fast.dumps(rows[1])) == default.loads(default.dumps(rows[1]._asdict()))
+
+
+def test_http_date_matches_werkzeug():
+    values = [date(2024, 2, 29), datetime(1, 1, 1), datetime(9999, 12, 31, 23, 59, 59, 999999)]
+    start = datetime(2026, 10, 19, 5, 6, 7)
+    for hours in range(0, 24 * 14, 7):
+        values.append(start + timedelta(hours=hours))
+        values.append((start + timedelta(hours=hours)).replace(tzinfo=timezone(timedelta(hours=-5, minutes=-30))))
+    for value in values:
+        assert json_provider._http_date(value) == http_date(value)
@@ -0,0 +1,66 @@
+"""Multiprocess metric files under METRICS_DIR (services/metrics.py)."""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from services import metrics
+
+REQUESTS = metrics._key("tt_http_requests_total", (("endpoint", "index"), ("method", "GET"), ("status", "200")))
+POOL_SIZE = metrics._key("tt_db_pool_size", ())
+
+
+@pytest.fixture
+def directory(tmp_path):
+    metrics.configure(str(tmp_path))
+    yield tmp_path
+    metrics.configure(None)
+
+
+def _dead_pid() -> int:
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    return child.pid
+
+
+def _sample(key: str):
+    name, labels = json.loads(key)
+    return metrics.collect().get((name, tuple(tuple(pair) for pair in labels)))
+
+
+def test_threads_share_one_file_per_process(directory):
+    def work():
+        for _ in range(500):
+            metrics.HTTP_REQUESTS.inc(endpoint="index", method="GET", status=200)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert os.listdir(directory) == [f"{os.getpid()}.db"]
+    assert _sample(REQUESTS) == 4000
+
+
+def test_scrape_folds_dead_processes_into_the_archive(directory):
+    metrics.HTTP_REQUESTS.inc(endpoint="index", method="GET", status=200)
+    metrics.DB_POOL_SIZE.set(5)
+    for count in (2, 3):
+        dead = metrics._MmapStore(str(directory / f"{_dead_pid()}.db"))
+        dead.inc(REQUESTS, count)
+        dead.set(POOL_SIZE, 7)
+        dead.close()
+
+    assert _sample(REQUESTS) == 6
+    assert _sample(POOL_SIZE) == 5  # an exited worker's gauges are dropped
+    assert sorted(os.listdir(directory)) == sorted([f"{os.getpid()}.db", metrics.ARCHIVE, "archive.lock"])
+
+    # Folded once: the next scrape reads the same totals from the archive
+    metrics.HTTP_REQUESTS.inc(endpoint="index", method="GET", status=200)
+    assert _sample(REQUESTS) == 7
+    assert _sample(POOL_SIZE) == 5
@@ -0,0 +1,74 @@
+"""Incremental rating aggregates and their reconcile (services/ratings.py)."""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, select
+
+from app import create_app
+from services import ratings
+from services.db import db
+from services.models import Recipe, RecipeChange, RecipeRating, User
+
+EDITED = datetime(2024, 1, 2, 3, 4, 5)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'ratings.db'}",
+        "SITEMAP_CACHE_DIR": str(tmp_path / "sitemap"),
+        "READ_INDEX_PATH": str(tmp_path / "read_index.bin"),
+        "METRICS_DIR": str(tmp_path / "metrics"),
+        "JINJA_BYTECODE_CACHE_DIR": str(tmp_path / "jinja"),
+    })
+    with app.app_context():
+        db.session.add_all([
+            Recipe(title="Green Curry"),
+            User(username="ada", password_hash="x"),
+            User(username="bob", password_hash="x"),
+        ])
+        db.session.commit()
+        db.session.get(Recipe, 1).updated_at = EDITED
+        db.session.commit()
+        yield app
+
+
+def _recipe():
+    db.session.expire_all()
+    return db.session.get(Recipe, 1)
+
+
+def test_votes_adjust_aggregates_without_touching_updated_at(app):
+    logged = db.session.scalar(select(db.func.count()).select_from(RecipeChange))
+
+    assert ratings.rate(1, 1, 5) == (1, 5.0)
+    assert ratings.rate(1, 2, 2) == (2, 3.5)
+    assert ratings.rate(1, 1, 3) == (2, 2.5)  # a changed vote replaces the old one
+    assert ratings.rate(99, 1, 3) is None
+    db.session.commit()
+
+    recipe = _recipe()
+    assert (recipe.rating_count, recipe.rating_total, recipe.average_rating) == (2, 5, 2.5)
+    assert recipe.updated_at == EDITED
+    assert db.session.scalar(select(db.func.count()).select_from(RecipeChange)) == logged + 3
+
+
+def test_reconcile_repairs_aggregates_without_touching_updated_at(app):
+    ratings.rate(1, 1, 4)
+    ratings.rate(1, 2, 2)
+    db.session.commit()
+    assert ratings.reconcile() == 0
+
+    db.session.execute(delete(RecipeRating).where(RecipeRating.user_id == 2))
+    assert ratings.reconcile() == 1
+    db.session.commit()
+    recipe = _recipe()
+    assert (recipe.rating_count, recipe.rating_total, recipe.average_rating) == (1, 4, 4.0)
+
+    db.session.execute(delete(RecipeRating))
+    assert ratings.reconcile() == 1
+    db.session.commit()
+    recipe = _recipe()
+    assert (recipe.rating_count, recipe.rating_total, recipe.average_rating) == (0, 0, None)
+    assert recipe.updated_at == EDITED
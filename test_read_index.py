@@ -0,0 +1,146 @@
+"""Snapshot build, mmap, atomic swap and remap of the shared read index (services/read_index.py)."""
+
+import os
+
+import pytest
+
+from app import create_app
+from services import jobs, ratings, read_index
+from services.db import db
+from services.models import Job, Recipe, User
+from utilities import recipe_filters
+from utilities.result_cache import clear_all
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'index.db'}",
+        "SITEMAP_CACHE_DIR": str(tmp_path / "sitemap"),
+        "READ_INDEX_PATH": str(tmp_path / "read_index.bin"),
+        "METRICS_DIR": str(tmp_path / "metrics"),
+        "JINJA_BYTECODE_CACHE_DIR": str(tmp_path / "jinja"),
+    })
+    with app.app_context():
+        db.session.add_all([
+            Recipe(title="Green Curry", cuisine="Thai", prep_time_minutes=20, dietary_tags=["vegan", "gluten-free"]),
+            Recipe(title="Carbonara", cuisine="Italian", prep_time_minutes=10, dietary_tags=[]),
+            Recipe(title="Granola", cuisine="", prep_time_minutes=None, dietary_tags=["vegan"]),
+        ])
+        db.session.commit()
+        clear_all()
+        yield app
+
+
+def _path(app) -> str:
+    return app.config["READ_INDEX_PATH"]
+
+
+def test_build_and_map(app):
+    header = read_index.build(db.engine, _path(app))
+    index = read_index.current(_path(app), check_interval=0)
+
+    assert header["count"] == len(index) == 3
+    assert list(index.ids) == [1, 2, 3]
+    assert index.id_for_slug(db.session.get(Recipe, 2).slug) == 2
+    assert index.id_for_slug("no-such-slug") is None
+    assert sorted(index.ids_with_tags(["vegan"])) == [1, 3]
+    assert index.ids_with_tags(["vegan", "gluten-free"]) == [1]
+    assert index.ids_with_tags(["unknown"]) == []
+    assert index.ids_with_max_prep(15) == [2]
+    assert index.ids_for_cuisine("thai") == [1]
+    assert index.autocomplete("gr") == [3, 1]  # "granola" < "green curry"
+
+
+def test_rebuild_swaps_atomically_and_readers_remap(app):
+    read_index.build(db.engine, _path(app))
+    old = read_index.current(_path(app), check_interval=0)
+    old_inode = os.stat(_path(app)).st_ino
+
+    db.session.add(Recipe(title="Gazpacho", cuisine="Spanish", prep_time_minutes=15))
+    db.session.commit()
+    read_index.build(db.engine, _path(app))
+
+    assert os.stat(_path(app)).st_ino != old_inode
+    assert not [f for f in os.listdir(os.path.dirname(_path(app))) if f.endswith(".tmp")]
+    new = read_index.current(_path(app), check_interval=0)
+    assert new is not old
+    assert new.generation > old.generation
+    assert new.autocomplete("ga") == [4]
+    # The replaced file stays readable through views taken before the swap
+    assert len(old) == 3 and old.autocomplete("ga") == []
+
+
+def test_fresh_only_while_generation_matches(app):
+    assert read_index.fresh() is None  # no snapshot yet
+    read_index.build(db.engine, _path(app))
+    assert read_index.fresh() is not None
+
+    db.session.get(Recipe, 2).cuisine = "Thai"
+    db.session.commit()
+    assert read_index.fresh() is None
+
+
+def test_filters_answer_from_index_and_fall_back_when_stale(app, monkeypatch):
+    read_index.build(db.engine, _path(app))
+    sql_only = {"used": False}
+    real_fresh = read_index.fresh
+
+    def watched():
+        index = real_fresh()
+        sql_only["used"] = index is None
+        return index
+
+    monkeypatch.setattr(read_index, "fresh", watched)
+    assert [r.title for r in recipe_filters.get_recipes_by_cuisine("tha")] == ["Green Curry"]
+    assert sql_only["used"] is False
+    assert [r.title for r in recipe_filters.get_recipes_by_multiple_filters(dietary_tags=["vegan"], max_prep_time=30)] \
+        == ["Green Curry"]
+
+    db.session.get(Recipe, 2).cuisine = "Thai"
+    db.session.commit()
+    assert sorted(r.title for r in recipe_filters.get_recipes_by_cuisine("tha")) == ["Carbonara", "Green Curry"]
+    assert sql_only["used"] is True
+
+
+def test_bare_slug_url_redirects_to_canonical(app):
+    read_index.build(db.engine, _path(app))
+    recipe = db.session.get(Recipe, 1)
+    response = app.test_client().get(f"/recipes/{recipe.slug}")
+    assert response.status_code == 301
+    assert response.headers["Location"].endswith(f"/recipes/1-{recipe.slug}")
+
+
+def test_core_writes_queue_a_rebuild(app):
+    app.config["READ_INDEX_REBUILD_DELAY"] = 0
+    db.session.add(User(username="ada", password_hash="x"))
+    db.session.commit()
+    read_index.build(db.engine, _path(app))
+    queued = db.session.scalar(db.select(db.func.count()).select_from(Job))
+
+    # A vote is a Core write: it logs a change but fires no ORM recipe event
+    ratings.rate(1, 1, 5)
+    db.session.commit()
+    assert read_index.fresh() is None
+    assert db.session.scalar(db.select(db.func.count()).select_from(Job)) == queued + 1
+
+    assert jobs.work(app, burst=True) == 1
+    read_index.current(_path(app), check_interval=0)
+    assert read_index.fresh() is not None
+
+
+def test_stale_slug_hit_falls_back_to_sql(app):
+    read_index.build(db.engine, _path(app))
+    renamed = db.session.get(Recipe, 1)
+    old_slug = renamed.slug
+    renamed.title = "Red Curry"
+    db.session.commit()
+    # The freed slug now belongs to a new recipe the snapshot has never seen
+    db.session.add(Recipe(title="Green Curry"))
+    db.session.commit()
+    newcomer = db.session.execute(db.select(Recipe).where(Recipe.slug == old_slug)).scalar_one()
+    assert read_index.current(_path(app), check_interval=0).id_for_slug(old_slug) == 1
+
+    response = app.test_client().get(f"/recipes/{old_slug}")
+    assert response.status_code == 301
+    assert response.headers["Location"].endswith(f"/recipes/{newcomer.id}-{old_slug}")
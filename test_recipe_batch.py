@@ -0,0 +1,62 @@
+"""Bulk creation through POST /api/recipes/batch (services/recipe_batch.py)."""
+
+import json
+
+import pytest
+
+from app import create_app
+from services.db import db
+from services.models import Recipe, User
+
+ITEM = {
+    "title": "Green Curry",
+    "instructions": "Simmer for twenty minutes.",
+    "ingredients": ["coconut milk", "curry paste"],
+}
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'batch.db'}",
+        "SITEMAP_CACHE_DIR": str(tmp_path / "sitemap"),
+        "READ_INDEX_PATH": str(tmp_path / "read_index.bin"),
+        "METRICS_DIR": str(tmp_path / "metrics"),
+        "JINJA_BYTECODE_CACHE_DIR": str(tmp_path / "jinja"),
+    })
+    with app.app_context():
+        db.session.add(User(username="cook", password_hash="x"))
+        db.session.commit()
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = "1"
+    return client
+
+
+@pytest.mark.parametrize("content_type, body", [
+    ("application/json", json.dumps([ITEM])),
+    ("application/json; charset=utf-8", json.dumps([ITEM])),
+    ("application/x-ndjson", json.dumps(ITEM) + "\n"),
+])
+def test_json_and_ndjson_bodies_are_accepted(client, content_type, body):
+    response = client.post("/api/recipes/batch", data=body, content_type=content_type)
+    assert response.status_code == 201, response.get_json()
+    assert db.session.scalar(db.select(db.func.count()).select_from(Recipe)) == 1
+
+
+@pytest.mark.parametrize("content_type", [
+    # What a cross-site <form> can send without a CORS preflight
+    "text/plain",
+    "application/x-www-form-urlencoded",
+    "multipart/form-data; boundary=x",
+    None,
+])
+def test_other_bodies_are_refused(client, content_type):
+    response = client.post("/api/recipes/batch", data=json.dumps([ITEM]), content_type=content_type)
+    assert response.status_code == 415
+    assert db.session.scalar(db.select(db.func.count()).select_from(Recipe)) == 0
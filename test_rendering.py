@@ -0,0 +1,55 @@
+"""Sanitizing Markdown renderer for recipe text (services/rendering.py)."""
+
+import pytest
+
+from services.rendering import render_markdown
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("<script>alert(1)</script>", "<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>"),
+    ("**<img src=x onerror=alert(1)>**", "<p><strong>&lt;img src=x onerror=alert(1)&gt;</strong></p>"),
+    ("# <b>Title</b>", "<h2>&lt;b&gt;Title&lt;/b&gt;</h2>"),
+    ("- <iframe>", "<ul>\n<li>&lt;iframe&gt;</li>\n</ul>"),
+])
+def test_markup_in_text_is_escaped(text, expected):
+    assert render_markdown(text) == expected
+
+
+@pytest.mark.parametrize("url", [
+    "javascript:alert(1)",
+    "JavaScript:alert(document.cookie)",
+    "data:text/html;base64,PHNjcmlwdD5hbGVydCgxKTwvc2NyaXB0Pg==",
+    "vbscript:msgbox(1)",
+])
+def test_unsafe_link_schemes_render_as_plain_label(url):
+    html = render_markdown(f"[click]({url})")
+    assert html == "<p>click</p>"
+
+
+def test_safe_links_keep_parentheses():
+    html = render_markdown("[Roux](https://en.wikipedia.org/wiki/Roux_(cooking)) first")
+    assert html == ('<p><a href="https://en.wikipedia.org/wiki/Roux_(cooking)" rel="nofollow noopener">'
+                    "Roux</a> first</p>")
+
+
+@pytest.mark.parametrize("url", [
+    'https://x.example/"onmouseover="alert(1)',
+    "https://x.example/'onmouseover='alert(1)",
+])
+def test_quotes_cannot_break_out_of_href(url):
+    html = render_markdown(f"[x]({url})")
+    assert '"onmouseover' not in html and "'onmouseover" not in html
+    assert "&#34;" in html or "&#39;" in html
+
+
+def test_code_spans_are_escaped_and_not_formatted():
+    assert render_markdown("Use `<b>**hot**</b>` pans") == (
+        "<p>Use <code>&lt;b&gt;**hot**&lt;/b&gt;</code> pans</p>"
+    )
+
+
+@pytest.mark.parametrize("text", ["\x005\x00", "`a` \x000\x00 `b`", "x\x00\x00y"])
+def test_nul_bytes_cannot_forge_code_placeholders(text):
+    html = render_markdown(text)
+    assert "\x00" not in html
+    assert html.count("<code>") == text.count("`") // 2
@@ -1,15 +1,71 @@
 """
 Recipe filtering and query utilities.
 
-This module provides helper functions for querying recipes by dietary restrictions
-and prep time, making it easy to implement filtering UI later.
+This module provides helper functions for querying recipes by dietary restrictions,
+prep time and cost, making it easy to implement filtering UI later.
+
+Tag, prep-time and cuisine filters take their candidate ids from the shared
+read index (services/read_index.py) when a snapshot at the current catalog
+generation exists, and load just those rows by primary key; otherwise, or
+when there are too many candidates, they filter in SQL.
+
+Cost filters and sort="cost" read the integer cents parsed from
+`estimated_cost` on write (services/costs.py), through their indexes. Amounts
+are compared in each recipe's own currency; nothing is converted.
+
+Results are cached per normalized argument set (see utilities/result_cache.py)
+until a recipe is inserted, updated or deleted: at once in the worker that
+committed it, within INVALIDATION_POLL_INTERVAL in the others
+(services/invalidation.py). Votes do not count: no filter depends on the
+rating, and cached results are ids whose rows are reloaded fresh.
 """
 
 from services.db import db
 from services.models import Recipe
+from services import invalidation, read_index
+from services.costs import to_cents
 from sqlalchemy import and_
+from utilities.result_cache import bump_generation, cached_query
+
+
+# More candidates than this are cheaper to filter in SQL than to load with an IN list
+INDEX_MAX_IDS = 2000
+
+
+def _indexed_ids(dietary_tags=None, max_prep_time=None, cuisine=None):
+    """Ids matching every given filter per a current read index, or None to filter in SQL."""
+    if not (dietary_tags or max_prep_time is not None or cuisine):
+        return None
+    index = read_index.fresh()
+    if index is None:
+        return None
+    matches = []
+    if dietary_tags:
+        matches.append(index.ids_with_tags(dietary_tags))
+    if max_prep_time is not None:
+        matches.append(index.ids_with_max_prep(max_prep_time))
+    if cuisine:
+        matches.append(index.ids_for_cuisine(cuisine))
+    ids = set(matches[0]).intersection(*matches[1:])
+    return ids if len(ids) <= INDEX_MAX_IDS else None
+
+
+def _cost_column(per_serving: bool):
+    return Recipe.cost_per_serving_cents if per_serving else Recipe.cost_cents
 
 
+def _order_by(sort: str, per_serving: bool = False, costed_only: bool = False) -> tuple:
+    """ORDER BY for a `sort` value ("newest" or "cost"); raises ValueError for others."""
+    if sort == "newest":
+        return (Recipe.created_at.desc(),)
+    if sort == "cost":
+        column = _cost_column(per_serving)
+        # With a cost filter there are no NULLs left, and the plain order walks the index
+        return (column.asc() if costed_only else column.asc().nulls_last(), Recipe.id)
+    raise ValueError("sort must be 'newest' or 'cost'")
+
+
+@cached_query(model=Recipe)
 def get_recipes_by_dietary_tags(dietary_tags: list, exclude_recipes=False) -> list:
     """
     Query recipes that match ALL specified dietary tags.
@@ -29,8 +85,11 @@ def get_recipes_by_dietary_tags(dietary_tags: list, exclude_recipes=False) -> li
         return Recipe.query.all()
     
     query = Recipe.query
+    ids = None if exclude_recipes else _indexed_ids(dietary_tags=dietary_tags)
     
-    if exclude_recipes:
+    if ids is not None:
+        query = query.filter(Recipe.id.in_(ids))
+    elif exclude_recipes:
         # Exclude recipes with ANY of the tags
         for tag in dietary_tags:
             query = query.filter(~Recipe.dietary_tags.contains(tag))
@@ -42,6 +101,7 @@ def get_recipes_by_dietary_tags(dietary_tags: list, exclude_recipes=False) -> li
     return query.order_by(Recipe.created_at.desc()).all()
 
 
+@cached_query(model=Recipe)
 def get_recipes_by_max_prep_time(max_minutes: int) -> list:
     """
     Query recipes with prep time <= max_minutes.
@@ -59,14 +119,17 @@ def get_recipes_by_max_prep_time(max_minutes: int) -> list:
     if not max_minutes or max_minutes < 0:
         return Recipe.query.all()
     
+    ids = _indexed_ids(max_prep_time=max_minutes)
+    matching = Recipe.id.in_(ids) if ids is not None else Recipe.prep_time_minutes <= max_minutes
     return (
         Recipe.query
-        .filter(Recipe.prep_time_minutes <= max_minutes)
+        .filter(matching)
         .order_by(Recipe.prep_time_minutes.asc())
         .all()
     )
 
 
+@cached_query(model=Recipe)
 def get_recipes_by_prep_time_range(min_minutes: int = 0, max_minutes: int = 999) -> list:
     """
     Query recipes with prep time within a range.
@@ -95,6 +158,35 @@ def get_recipes_by_prep_time_range(min_minutes: int = 0, max_minutes: int = 999)
     )
 
 
+@cached_query(model=Recipe)
+def get_recipes_by_max_cost(max_cost, per_serving: bool = False) -> list:
+    """
+    Query recipes with an estimated cost <= max_cost, cheapest first.
+    
+    Args:
+        max_cost: Maximum cost in major units (e.g., 12.5 for $12.50)
+        per_serving: If True, compare the cost per serving instead of the total
+    
+    Returns:
+        List of Recipe objects with a parsed cost <= max_cost; recipes whose
+        cost could not be parsed (or, per serving, have no servings) are left out
+    
+    Example:
+        # Get recipes that cost $3 or less per serving
+        cheap_recipes = get_recipes_by_max_cost(3, per_serving=True)
+    """
+    if max_cost is None or max_cost < 0:
+        return Recipe.query.all()
+    
+    return (
+        Recipe.query
+        .filter(_cost_column(per_serving) <= to_cents(max_cost))
+        .order_by(*_order_by("cost", per_serving, costed_only=True))
+        .all()
+    )
+
+
+@cached_query(model=Recipe)
 def get_recipes_by_cuisine(cuisine: str) -> list:
     """
     Query recipes by cuisine type.
@@ -112,18 +204,24 @@ def get_recipes_by_cuisine(cuisine: str) -> list:
     if not cuisine:
         return Recipe.query.all()
     
+    ids = _indexed_ids(cuisine=cuisine)
+    matching = Recipe.id.in_(ids) if ids is not None else Recipe.cuisine.ilike(f"%{cuisine}%")
     return (
         Recipe.query
-        .filter(Recipe.cuisine.ilike(f"%{cuisine}%"))
+        .filter(matching)
         .order_by(Recipe.created_at.desc())
         .all()
     )
 
 
+@cached_query(model=Recipe)
 def get_recipes_by_multiple_filters(
     dietary_tags: list = None,
     max_prep_time: int = None,
-    cuisine: str = None
+    cuisine: str = None,
+    max_cost=None,
+    per_serving: bool = False,
+    sort: str = "newest"
 ) -> list:
     """
     Query recipes using multiple filters combined.
@@ -134,35 +232,63 @@ def get_recipes_by_multiple_filters(
         dietary_tags: List of dietary restrictions (e.g., ["gluten-free", "halal"])
         max_prep_time: Maximum prep time in minutes
         cuisine: Cuisine type
+        max_cost: Maximum cost in major units (e.g., 12.5 for $12.50)
+        per_serving: If True, max_cost and sort="cost" use the cost per serving
+        sort: "newest" (default) or "cost" (cheapest first, uncosted last)
     
     Returns:
         List of Recipe objects matching all specified criteria
     
+    Raises:
+        ValueError: If sort is not "newest" or "cost"
+    
     Example:
         # Get gluten-free AND halal recipes that take 30 minutes or less
         recipes = get_recipes_by_multiple_filters(
             dietary_tags=["gluten-free", "halal"],
             max_prep_time=30
         )
+        
+        # Vegetarian recipes under $4 a serving, cheapest first
+        recipes = get_recipes_by_multiple_filters(
+            dietary_tags=["vegetarian"],
+            max_cost=4,
+            per_serving=True,
+            sort="cost"
+        )
     """
+    costed_only = max_cost is not None and max_cost >= 0
+    order = _order_by(sort, per_serving, costed_only)
     query = Recipe.query
+    if max_prep_time is not None and max_prep_time <= 0:
+        max_prep_time = None
+    ids = _indexed_ids(dietary_tags, max_prep_time, cuisine)
     
-    # Apply dietary tag filter
-    if dietary_tags:
-        for tag in dietary_tags:
-            query = query.filter(Recipe.dietary_tags.contains(tag))
-    
-    # Apply prep time filter
-    if max_prep_time is not None and max_prep_time > 0:
-        query = query.filter(Recipe.prep_time_minutes <= max_prep_time)
-    
-    # Apply cuisine filter
-    if cuisine:
-        query = query.filter(Recipe.cuisine.ilike(f"%{cuisine}%"))
-    
-    return query.order_by(Recipe.created_at.desc()).all()
+    if ids is not None:
+        # Tag, prep time and cuisine filters answered by the read index
+        query = query.filter(Recipe.id.in_(ids))
+    else:
+        # Apply dietary tag filter
+        if dietary_tags:
+            for tag in dietary_tags:
+                query = query.filter(Recipe.dietary_tags.contains(tag))
+        
+        # Apply prep time filter
+        if max_prep_time is not None:
+            query = query.filter(Recipe.prep_time_minutes <= max_prep_time)
+        
+        # Apply cuisine filter
+        if cuisine:
+            query = query.filter(Recipe.cuisine.ilike(f"%{cuisine}%"))
+    
+    # Apply cost filter
+    if costed_only:
+        query = query.filter(_cost_column(per_serving) <= to_cents(max_cost))
+    
+    return query.order_by(*order).all()
 
 
+@cached_query()
 def get_all_available_dietary_tags() -> list:
     """
     Get a list of all unique dietary tags used across recipes.
@@ -187,6 +313,7 @@ def get_all_available_dietary_tags() -> list:
     return sorted(list(unique_tags))
 
 
+@cached_query()
 def get_all_available_cuisines() -> list:
     """
     Get a list of all unique cuisines used across recipes.
@@ -206,3 +333,9 @@ def get_all_available_cuisines() -> list:
     ).distinct().all()
     
     return sorted([c[0] for c in cuisines if c[0]])
+
+
+# --- Catalog generation: any committed recipe write, in any worker, invalidates cached results ---
+@invalidation.subscribe(invalidation.RECIPE, invalidation.GENERATION)
+def _bump_on_recipe_change(recipe_ids):
+    bump_generation()
@@ -0,0 +1,148 @@
+"""
+Generation-stamped result cache for query helper functions.
+
+    @cached_query(model=Recipe, maxsize=256, ttl=300)
+    def get_recipes_by_cuisine(cuisine): ...
+
+Results are keyed by the function's normalized arguments: defaults applied
+and list/set arguments sorted, so `f(["vegan", "halal"])` and
+`f(["halal", "vegan"])` share an entry. Only use it on functions for which
+the order of a list argument does not matter. With
+`model=` only the primary keys of the returned objects are stored and a hit
+reloads them with one `IN` query in the original order; other return values
+are stored as they are.
+
+Every entry records the catalog generation it was computed at. Calling
+`bump_generation()` (wired to recipe invalidation messages from every worker
+in utilities/recipe_filters.py) makes all older entries misses at once,
+without walking the caches. Entries also expire after `ttl` seconds as a
+backstop for writes that publish no message, and each function's cache is an
+LRU of `maxsize` entries.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+from services.metrics import CACHE_REQUESTS
+
+_generation = 0
+_generation_lock = threading.Lock()
+_caches = {}
+
+
+def generation() -> int:
+    return _generation
+
+
+def bump_generation() -> int:
+    """Invalidate every cached result; returns the new generation."""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        return _generation
+
+
+def _normalize(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted((_normalize(v) for v in value), key=repr))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    return value
+
+
+class ResultCache:
+    """LRU of (generation, expires_at, value) for one function, with hit/miss counts."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    _MISSING = object()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == _generation and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return self._MISSING
+
+    def set(self, key, gen: int, value) -> None:
+        with self._lock:
+            self._entries[key] = (gen, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+def cached_query(model=None, maxsize: int = 256, ttl: float = 300.0, max_ids: int = 5000):
+    """
+    Cache the decorated function's results until the next generation bump.
+    Results with more than `max_ids` objects are not cached: reloading them
+    by primary key would cost as much as re-running the query.
+    """
+    def decorate(fn):
+        sig = inspect.signature(fn)
+        cache = _caches[fn.__qualname__] = ResultCache(fn.__qualname__, maxsize, ttl)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple((name, _normalize(v)) for name, v in bound.arguments.items())
+
+            cached = cache.get(key)
+            if cached is not ResultCache._MISSING:
+                CACHE_REQUESTS.inc(cache="query", result="hit")
+                return _load(model, cached) if model is not None else list(cached)
+
+            CACHE_REQUESTS.inc(cache="query", result="miss")
+            # Read before running: a write committed meanwhile leaves this entry already stale
+            gen = _generation
+            result = fn(*args, **kwargs)
+            if model is None:
+                cache.set(key, gen, tuple(result))
+            elif len(result) <= max_ids:
+                cache.set(key, gen, tuple(obj.id for obj in result))
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+    return decorate
+
+
+def _load(model, ids) -> list:
+    if not ids:
+        return []
+    by_id = {obj.id: obj for obj in model.query.filter(model.id.in_(ids))}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def stats() -> dict:
+    """Hit/miss/size counters for every cached function, by qualified name."""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def clear_all() -> None:
+    for cache in _caches.values():
+        cache.clear()